@@ -63,6 +63,7 @@ service_list = {
   "laneSpeedButton": Service(8083, False, 0.),
   "dynamicCameraOffset": Service(8084, False, 0.),
   "modelLongButton": Service(8085, False, 0.),
+  "serviceStats": Service(8086, True, 1.),
 
   "testModel": Service(8040, False, 0.),
   "testLiveLocation": Service(8045, False, 0.),
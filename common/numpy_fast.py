@@ -1,22 +1,69 @@
+from bisect import bisect_left
+
+import numpy as np
+
+
 def int_rnd(x):
   return int(round(x))
 
 def clip(x, lo, hi):
-  return max(lo, min(hi, x))
+  # same as max(lo, min(hi, x)), including for nan, without the builtin calls
+  x = x if x < hi else hi
+  return x if x > lo else lo
 
 def interp(x, xp, fp):
-  N = len(xp)
+  if hasattr(x, '__iter__'):
+    return [interp(v, xp, fp) for v in x]
 
-  def get_interp(xv):
-    hi = 0
-    while hi < N and xv > xp[hi]:
-      hi += 1
-    low = hi - 1
-    return fp[-1] if hi == N and xv > xp[low] else (
-      fp[0] if hi == 0 else
-      (xv - xp[low]) * (fp[hi] - fp[low]) / (xp[hi] - xp[low]) + fp[low])
-
-  return [get_interp(v) for v in x] if hasattr(x, '__iter__') else get_interp(x)
+  N = len(xp)
+  hi = 0
+  while hi < N and x > xp[hi]:
+    hi += 1
+  if hi == 0:
+    return fp[0]
+  if hi == N:
+    return fp[-1]
+  low = hi - 1
+  return (x - xp[low]) * (fp[hi] - fp[low]) / (xp[hi] - xp[low]) + fp[low]
 
 def mean(x):
   return sum(x) / len(x)
+
+
+class Interp():
+  """interp with a fixed table, for the tables that are looked up every cycle.
+
+  xp must be non-decreasing, this is checked once here instead of on every
+  lookup. Scalars are looked up by bisection with precomputed slopes and match
+  interp up to rounding, arrays and lists are interpolated at once with
+  np.interp and return an array.
+  """
+  __slots__ = ('xp', 'fp', 'slopes', '_xp_arr', '_fp_arr')
+
+  def __init__(self, xp, fp):
+    xp = tuple(float(v) for v in xp)
+    fp = tuple(float(v) for v in fp)
+    if not len(xp) or len(xp) != len(fp):
+      raise ValueError(f"xp and fp must have the same nonzero length, got {len(xp)} and {len(fp)}")
+    if any(b < a for a, b in zip(xp, xp[1:])):
+      raise ValueError(f"xp must be non-decreasing: {xp}")
+
+    self.xp = xp
+    self.fp = fp
+    # slope of the segment ending at every breakpoint, never used for zero length segments
+    self.slopes = (0.,) + tuple((f1 - f0) / (x1 - x0) if x1 > x0 else 0.
+                                for x0, x1, f0, f1 in zip(xp, xp[1:], fp, fp[1:]))
+    self._xp_arr = np.array(xp)
+    self._fp_arr = np.array(fp)
+
+  def __call__(self, x):
+    if hasattr(x, '__iter__'):
+      return np.interp(x, self._xp_arr, self._fp_arr)
+
+    xp = self.xp
+    hi = bisect_left(xp, x)
+    if hi == 0:
+      return self.fp[0]
+    if hi == len(xp):
+      return self.fp[-1]
+    return self.fp[hi - 1] + (x - xp[hi - 1]) * self.slopes[hi]
@@ -1,4 +1,13 @@
+import gc
+import json
+import os
 import time
+from collections import deque
+
+# Stats blocks are small json files on a tmpfs, one per profiled process.
+# selfdrive/debug/loop_profile.py reads them back and aggregates them.
+PROFILE_DIR = os.getenv("LOOP_PROFILE_DIR", "/dev/shm/loop_profile" if os.path.isdir("/dev/shm") else "/tmp/loop_profile")
+
 
 class Profiler():
   def __init__(self, enabled=False):
@@ -43,3 +52,144 @@ class Profiler():
       else:
         print("%30s: %9.2f  avg: %7.2f  percent: %3.0f" % (n, ms*1000.0, ms*1000.0/self.iter, ms/self.tot*100))
     print("Iter clock: %2.6f   TOTAL: %2.2f" % (self.tot/self.iter, self.tot))
+
+
+def loop_profile_enabled(name):
+  """LOOP_PROFILE is either 1/all or a comma separated list of process names"""
+  procs = os.getenv("LOOP_PROFILE", "")
+  return procs in ("1", "all") or name in procs.split(",")
+
+
+def summarize(samples):
+  """p50/p99/max/mean in ms of a sequence of durations in seconds"""
+  if not len(samples):
+    return {"n": 0, "p50": 0., "p99": 0., "max": 0., "mean": 0.}
+  s = sorted(samples)
+  n = len(s)
+  return {
+    "n": n,
+    "p50": s[min(n - 1, int(0.50 * n))] * 1000.,
+    "p99": s[min(n - 1, int(0.99 * n))] * 1000.,
+    "max": s[-1] * 1000.,
+    "mean": sum(s) / n * 1000.,
+  }
+
+
+def write_stats(path, stats):
+  """Atomically replaces the stats block at path, readers never see a partial file"""
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  tmp_path = path + ".tmp"
+  with open(tmp_path, "w") as f:
+    json.dump(stats, f)
+  os.replace(tmp_path, path)
+
+
+class LoopProfiler():
+  """Per-iteration timing of a realtime loop.
+
+  Keeps the last `window` iterations of wall time per checkpoint, wall and cpu
+  time of the whole iteration, ratekeeper lag and gc pauses, and periodically
+  writes a summary to PROFILE_DIR. Every method is a no-op when disabled, so
+  it can stay in the hot path.
+  """
+  def __init__(self, name, enabled=None, budget=None, window=1000, export_interval=5.):
+    self.name = name
+    self.enabled = loop_profile_enabled(name) if enabled is None else enabled
+    self.budget = budget
+    self.window = window
+    self.export_interval = export_interval
+    self.path = os.path.join(PROFILE_DIR, name)
+
+    self.cp = {}
+    self.cp_ignored = set()
+    self.wall = deque(maxlen=window)
+    self.cpu = deque(maxlen=window)
+    self.lag = deque(maxlen=window)
+    self.gc_pauses = deque(maxlen=window)
+    self.gc_count = 0
+    self.iter = 0
+    self.lag_count = 0
+
+    self._gc_start = None
+    self._iter_start = None
+    self._iter_cpu_start = None
+    self._iter_ignored = 0.
+    self._last_time = None
+    self._last_export = time.monotonic()
+
+    if self.enabled:
+      gc.callbacks.append(self._gc_callback)
+
+  def _gc_callback(self, phase, info):
+    if phase == "start":
+      self._gc_start = time.perf_counter()
+    elif self._gc_start is not None:
+      self.gc_pauses.append(time.perf_counter() - self._gc_start)
+      self.gc_count += 1
+      self._gc_start = None
+
+  def start(self):
+    if not self.enabled:
+      return
+    self._iter_start = self._last_time = time.monotonic()
+    self._iter_cpu_start = time.thread_time()
+    self._iter_ignored = 0.
+
+  def checkpoint(self, name, ignore=False):
+    # ignored checkpoints (e.g. waiting on a socket) don't count towards the iteration time
+    if not self.enabled:
+      return
+    if self._iter_start is None:
+      self.start()
+      return
+    tt = time.monotonic()
+    if name not in self.cp:
+      self.cp[name] = deque(maxlen=self.window)
+      if ignore:
+        self.cp_ignored.add(name)
+    self.cp[name].append(tt - self._last_time)
+    if ignore:
+      self._iter_ignored += tt - self._last_time
+    self._last_time = tt
+
+  def end(self, remaining=None):
+    """Call at the end of every iteration, remaining is Ratekeeper.remaining"""
+    if not self.enabled or self._iter_start is None:
+      return
+    tt = time.monotonic()
+    self.wall.append(tt - self._iter_start - self._iter_ignored)
+    self.cpu.append(time.thread_time() - self._iter_cpu_start)
+    if remaining is not None:
+      self.lag.append(max(0., -remaining))
+      if remaining < 0:
+        self.lag_count += 1
+    self.iter += 1
+    self._iter_start = None
+
+    if tt - self._last_export > self.export_interval:
+      self._last_export = tt
+      self.export()
+
+  def stats(self):
+    gc_ms = [p * 1000. for p in self.gc_pauses]
+    return {
+      "name": self.name,
+      "pid": os.getpid(),
+      "time": time.time(),
+      "iterations": self.iter,
+      "budget": self.budget * 1000. if self.budget is not None else None,
+      "wall": summarize(self.wall),
+      "cpu": summarize(self.cpu),
+      "lag": dict(summarize(self.lag), count=self.lag_count),
+      "gc": {"count": self.gc_count, "total": sum(gc_ms), "max": max(gc_ms, default=0.)},
+      "checkpoints": {n: dict(summarize(s), ignored=n in self.cp_ignored) for n, s in self.cp.items()},
+    }
+
+  def export(self):
+    if not self.enabled:
+      return
+    write_stats(self.path, self.stats())
+
+  def close(self):
+    if self._gc_callback in gc.callbacks:
+      gc.callbacks.remove(self._gc_callback)
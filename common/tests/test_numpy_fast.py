@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+import math
+import unittest
+
+import numpy as np
+
+from common.numpy_fast import Interp, clip, interp
+
+
+class TestInterp(unittest.TestCase):
+  def test_interp(self):
+    xp, fp = [0., 10., 20.], [1., 3., -1.]
+    self.assertEqual(interp(-1., xp, fp), 1.)
+    self.assertEqual(interp(0., xp, fp), 1.)
+    self.assertAlmostEqual(interp(5., xp, fp), 2.)
+    self.assertAlmostEqual(interp(15., xp, fp), 1.)
+    self.assertEqual(interp(25., xp, fp), -1.)
+    self.assertEqual(interp([-1., 5., 25.], xp, fp), [1., 2., -1.])
+
+  def test_interp_object(self):
+    xp, fp = [0., 5., 5., 10., 22.5, 40.], [-1.5, -1.2, -0.9, -0.67, -0.5, -0.3]
+    f = Interp(xp, fp)
+    for x in np.linspace(-5., 45., 501):
+      self.assertAlmostEqual(f(x), interp(x, xp, fp), places=12)
+    xs = np.linspace(-5., 45., 101)
+    np.testing.assert_allclose(f(xs), np.interp(xs, xp, fp))
+    np.testing.assert_allclose(f(list(xs)), np.interp(xs, xp, fp))
+
+    self.assertEqual(Interp([1.], [2.])(0.), 2.)
+    self.assertEqual(Interp([1.], [2.])(3.), 2.)
+
+  def test_interp_object_invalid(self):
+    with self.assertRaises(ValueError):
+      Interp([0., 2., 1.], [0., 1., 2.])
+    with self.assertRaises(ValueError):
+      Interp([0., 1.], [0.])
+    with self.assertRaises(ValueError):
+      Interp([], [])
+
+  def test_clip(self):
+    self.assertEqual(clip(5, 0, 3), 3)
+    self.assertEqual(clip(-5, 0, 3), 0)
+    self.assertEqual(clip(1.5, 0, 3), 1.5)
+    # same as max(lo, min(hi, x))
+    self.assertEqual(clip(math.nan, 0, 3), 3)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import gc
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import common.profiler as profiler
+from common.profiler import LoopProfiler, summarize
+
+
+class TestLoopProfiler(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.patch = mock.patch.object(profiler, "PROFILE_DIR", self.tmpdir.name)
+    self.patch.start()
+
+  def tearDown(self):
+    self.patch.stop()
+    self.tmpdir.cleanup()
+
+  def test_summarize(self):
+    s = summarize([i / 1000. for i in range(1, 101)])
+    self.assertEqual(s['n'], 100)
+    self.assertAlmostEqual(s['p50'], 51.)
+    self.assertAlmostEqual(s['p99'], 100.)
+    self.assertAlmostEqual(s['max'], 100.)
+    self.assertAlmostEqual(s['mean'], 50.5)
+    self.assertEqual(summarize([])['n'], 0)
+
+  def test_disabled_is_noop(self):
+    prof = LoopProfiler('test', enabled=False)
+    prof.start()
+    prof.checkpoint("a")
+    prof.end(-1.)
+    prof.export()
+    self.assertEqual(prof.iter, 0)
+    self.assertFalse(os.path.exists(prof.path))
+
+  def test_enabled_from_env(self):
+    with mock.patch.dict(os.environ, {"LOOP_PROFILE": "controlsd,radard"}):
+      self.assertTrue(LoopProfiler('radard').enabled)
+      self.assertFalse(LoopProfiler('plannerd').enabled)
+
+  def test_loop_stats(self):
+    prof = LoopProfiler('test', enabled=True, budget=0.01, window=10)
+    try:
+      for i in range(20):
+        prof.start()
+        time.sleep(0.002)
+        prof.checkpoint("wait", ignore=True)
+        time.sleep(0.001)
+        prof.checkpoint("work")
+        prof.end(-0.001 if i % 2 else 0.001)
+      gc.collect()
+      prof.export()
+    finally:
+      prof.close()
+
+    with open(os.path.join(self.tmpdir.name, 'test')) as f:
+      stats = json.load(f)
+
+    self.assertEqual(stats['iterations'], 20)
+    self.assertEqual(stats['wall']['n'], 10)
+    self.assertEqual(stats['lag']['count'], 10)
+    self.assertEqual(stats['budget'], 10.)
+    self.assertGreaterEqual(stats['gc']['count'], 1)
+    self.assertTrue(stats['checkpoints']['wait']['ignored'])
+    self.assertFalse(stats['checkpoints']['work']['ignored'])
+    # ignored checkpoints don't count towards the iteration time
+    self.assertLess(stats['wall']['p50'], stats['checkpoints']['wait']['p50'] + stats['checkpoints']['work']['p50'])
+    self.assertGreaterEqual(stats['wall']['p50'], stats['checkpoints']['work']['p50'] * 0.9)
+
+
+if __name__ == "__main__":
+  unittest.main()
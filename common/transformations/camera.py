@@ -56,10 +56,12 @@ if not TICI:
   FULL_FRAME_SIZE = eon_f_frame_size
   FOCAL = eon_f_focal_length
   fcam_intrinsics = eon_fcam_intrinsics
+  fcam_intrinsics_inv = eon_fcam_intrinsics_inv
 else:
   FULL_FRAME_SIZE = tici_f_frame_size
   FOCAL = tici_f_focal_length
   fcam_intrinsics = tici_fcam_intrinsics
+  fcam_intrinsics_inv = tici_fcam_intrinsics_inv
 
 W, H = FULL_FRAME_SIZE[0], FULL_FRAME_SIZE[1]
 
@@ -122,7 +124,7 @@ def roll_from_ke(m):
 def normalize(img_pts, intrinsics=fcam_intrinsics):
   # normalizes image coordinates
   # accepts single pt or array of pts
-  intrinsics_inv = np.linalg.inv(intrinsics)
+  intrinsics_inv = fcam_intrinsics_inv if intrinsics is fcam_intrinsics else np.linalg.inv(intrinsics)
   img_pts = np.array(img_pts)
   input_shape = img_pts.shape
   img_pts = np.atleast_2d(img_pts)
@@ -182,3 +184,23 @@ def get_camera_frame_from_calib_frame(camera_frame_from_road_frame, intrinsics=f
   ground_from_calib_frame = np.linalg.inv(calib_frame_from_ground)
   camera_frame_from_calib_frame = np.dot(camera_frame_from_ground, ground_from_calib_frame)
   return camera_frame_from_calib_frame
+
+
+class CameraProjection:
+  """Projects points in the calib frame to image coordinates. The intrinsics and
+  extrinsics are composed once, make a new one when the calibration changes."""
+  def __init__(self, rpy, intrinsics=fcam_intrinsics, height=0.):
+    self.intrinsics = intrinsics
+    self.view_from_calib = get_view_frame_from_calib_frame(rpy[0], rpy[1], rpy[2], height)
+    self.camera_from_calib = np.dot(intrinsics, self.view_from_calib)
+    self._rot_t = self.camera_from_calib[:, :3].T.copy()
+    self._trans = self.camera_from_calib[:, 3].copy()
+
+  def img_from_calib(self, pts_calib):
+    # accepts single pt or array of pts, pts behind the camera are nan
+    pts_calib = np.asarray(pts_calib, dtype=np.float64)
+    input_shape = pts_calib.shape
+    pts_cam = np.atleast_2d(pts_calib).dot(self._rot_t) + self._trans
+    pts_cam[pts_cam[:, 2] <= 0] = np.nan
+    pts_img = pts_cam[:, :2] / pts_cam[:, 2:3]
+    return pts_img.reshape(input_shape[:-1] + (2,))
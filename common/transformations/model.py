@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 
 from common.transformations.camera import (FULL_FRAME_SIZE,
@@ -155,10 +157,18 @@ def get_camera_frame_from_bigmodel_frame(camera_frame_from_road_frame):
   return camera_frame_from_bigmodel_frame
 
 
+@lru_cache(maxsize=None)
+def _model_frame_pixels(size):
+  # homogeneous coordinates of every pixel, row by row
+  pixels = np.column_stack([np.tile(np.arange(size[0]), size[1]),
+                            np.tile(np.arange(size[1]), (size[0], 1)).T.flatten(),
+                            np.ones(size[0] * size[1])]).T
+  pixels.flags.writeable = False
+  return pixels
+
+
 def get_model_frame(snu_full, camera_frame_from_model_frame, size):
-  idxs = camera_frame_from_model_frame.dot(np.column_stack([np.tile(np.arange(size[0]), size[1]),
-                                                            np.tile(np.arange(size[1]), (size[0], 1)).T.flatten(),
-                                                            np.ones(size[0] * size[1])]).T).T.astype(int)
+  idxs = camera_frame_from_model_frame.dot(_model_frame_pixels(tuple(size))).T.astype(int)
   calib_flat = snu_full[idxs[:, 1], idxs[:, 0]]
   if len(snu_full.shape) == 3:
     calib = calib_flat.reshape((size[1], size[0], 3))
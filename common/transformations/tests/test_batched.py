@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import unittest
+
+import numpy as np
+
+import common.transformations.coordinates as coord
+import common.transformations.orientation as orient
+import common.transformations.transformations as single
+
+N = 1000
+
+
+class TestBatched(unittest.TestCase):
+  """The conversions of arrays of rows match the scalar versions exactly"""
+  @classmethod
+  def setUpClass(cls):
+    rng = np.random.default_rng(0)
+    cls.euler = rng.uniform(-np.pi, np.pi, (N, 3))
+    cls.quats = np.array([single.euler2quat_single(e) for e in cls.euler])
+    cls.rots = np.array([single.euler2rot_single(e) for e in cls.euler])
+    cls.geodetic = np.column_stack([rng.uniform(-80, 80, N), rng.uniform(-180, 180, N), rng.uniform(-100, 3000, N)])
+    cls.ecef = np.array([single.geodetic2ecef_single(g) for g in cls.geodetic])
+
+  def assert_rows_equal(self, batched, scalar, inputs, *args):
+    expected = np.array([scalar(*args, x) for x in inputs])
+    np.testing.assert_array_equal(batched(*args, inputs), expected)
+    np.testing.assert_array_equal(batched(*args, inputs[0]), expected[0])
+    np.testing.assert_array_equal(batched(*args, inputs[:2].tolist()), expected[:2])
+
+  def test_orientation(self):
+    self.assert_rows_equal(orient.euler2quat, single.euler2quat_single, self.euler)
+    self.assert_rows_equal(orient.quat2euler, single.quat2euler_single, self.quats)
+    self.assert_rows_equal(orient.quat2rot, single.quat2rot_single, self.quats)
+    self.assert_rows_equal(orient.rot2quat, single.rot2quat_single, self.rots)
+    self.assert_rows_equal(orient.euler2rot, single.euler2rot_single, self.euler)
+    self.assert_rows_equal(orient.rot2euler, single.rot2euler_single, self.rots)
+    self.assert_rows_equal(orient.ecef_euler_from_ned, single.ecef_euler_from_ned_single, self.euler, self.ecef[0])
+    self.assert_rows_equal(orient.ned_euler_from_ecef, single.ned_euler_from_ecef_single, self.euler, self.ecef[0])
+
+  def test_coordinates(self):
+    self.assert_rows_equal(coord.geodetic2ecef, single.geodetic2ecef_single, self.geodetic)
+    self.assert_rows_equal(coord.ecef2geodetic, single.ecef2geodetic_single, self.ecef)
+
+    lc = coord.LocalCoord.from_geodetic(self.geodetic[0])
+    ned = np.array([lc.ecef2ned_single(e) for e in self.ecef])
+    self.assert_rows_equal(lc.ecef2ned, lc.ecef2ned_single, self.ecef)
+    self.assert_rows_equal(lc.ned2ecef, lc.ned2ecef_single, ned)
+    self.assert_rows_equal(lc.geodetic2ned, lc.geodetic2ned_single, self.geodetic)
+    self.assert_rows_equal(lc.ned2geodetic, lc.ned2geodetic_single, ned)
+
+  def test_shapes(self):
+    self.assertEqual(orient.euler2quat(np.zeros((0, 3))).shape, (0, 4))
+    self.assertEqual(orient.quat2rot([1, 0, 0, 0]).shape, (3, 3))
+    np.testing.assert_array_equal(orient.quat2rot([1, 0, 0, 0]), np.eye(3))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+import unittest
+
+import numpy as np
+
+from common.transformations.camera import (CameraProjection, eon_fcam_intrinsics, get_view_frame_from_calib_frame,
+                                           img_from_device, normalize)
+
+
+class TestCameraProjection(unittest.TestCase):
+  def test_img_from_calib(self):
+    rng = np.random.default_rng(0)
+    pts = np.column_stack([rng.uniform(1, 100, 100), rng.uniform(-10, 10, 100), rng.uniform(-2, 2, 100)])
+    rpy = [0.01, -0.03, 0.02]
+    projection = CameraProjection(rpy, eon_fcam_intrinsics, height=1.22)
+
+    view_from_calib = get_view_frame_from_calib_frame(rpy[0], rpy[1], rpy[2], 1.22)
+    kep = eon_fcam_intrinsics.dot(view_from_calib.dot(np.column_stack([pts, np.ones(len(pts))]).T))
+    expected = (kep[:2] / kep[2]).T
+    np.testing.assert_allclose(projection.img_from_calib(pts), expected)
+    np.testing.assert_allclose(projection.img_from_calib(pts[0]), expected[0])
+
+    # points behind the camera
+    self.assertTrue(np.isnan(projection.img_from_calib([-10., 0., 0.])).all())
+
+  def test_identity_calib(self):
+    pts = np.array([[10., 1., 0.5], [50., -2., 1.]])
+    projection = CameraProjection([0., 0., 0.], np.eye(3))
+    np.testing.assert_allclose(projection.img_from_calib(pts), img_from_device(pts))
+
+  def test_normalize(self):
+    pt = [500., 400.]
+    np.testing.assert_allclose(normalize(pt, eon_fcam_intrinsics), np.linalg.inv(eon_fcam_intrinsics).dot([500., 400., 1.])[:2])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -54,6 +54,71 @@ cdef Geodetic list2geodetic(geodetic):
     g.alt = geodetic[2]
     return g
 
+# The *_array functions take and return C contiguous arrays of rows, (N, 3) vectors,
+# (N, 4) quaternions or (N, 3, 3) matrices, and loop over them without Python objects
+
+cdef Matrix3 row2matrix(const double[:, :, ::1] m, Py_ssize_t i):
+    # Matrix3(double*) is column major
+    cdef double[9] buf
+    cdef int r, c
+    for r in range(3):
+        for c in range(3):
+            buf[c * 3 + r] = m[i, r, c]
+    return Matrix3(buf)
+
+cdef void matrix2row(Matrix3 m, double[:, :, ::1] out, Py_ssize_t i):
+    cdef int r, c
+    for r in range(3):
+        for c in range(3):
+            out[i, r, c] = m(r, c)
+
+cdef inline void quat2row(Quaternion q, double[:, ::1] out, Py_ssize_t i):
+    out[i, 0] = q.w()
+    out[i, 1] = q.x()
+    out[i, 2] = q.y()
+    out[i, 3] = q.z()
+
+cdef inline void vector2row(Vector3 v, double[:, ::1] out, Py_ssize_t i):
+    out[i, 0] = v(0)
+    out[i, 1] = v(1)
+    out[i, 2] = v(2)
+
+cdef inline ECEF row2ecef(const double[:, ::1] a, Py_ssize_t i):
+    cdef ECEF e
+    e.x = a[i, 0]
+    e.y = a[i, 1]
+    e.z = a[i, 2]
+    return e
+
+cdef inline NED row2ned(const double[:, ::1] a, Py_ssize_t i):
+    cdef NED n
+    n.n = a[i, 0]
+    n.e = a[i, 1]
+    n.d = a[i, 2]
+    return n
+
+cdef inline Geodetic row2geodetic(const double[:, ::1] a, Py_ssize_t i):
+    cdef Geodetic g
+    g.lat = a[i, 0]
+    g.lon = a[i, 1]
+    g.alt = a[i, 2]
+    return g
+
+cdef inline void ecef2row(ECEF e, double[:, ::1] out, Py_ssize_t i):
+    out[i, 0] = e.x
+    out[i, 1] = e.y
+    out[i, 2] = e.z
+
+cdef inline void ned2row(NED n, double[:, ::1] out, Py_ssize_t i):
+    out[i, 0] = n.n
+    out[i, 1] = n.e
+    out[i, 2] = n.d
+
+cdef inline void geodetic2row(Geodetic g, double[:, ::1] out, Py_ssize_t i):
+    out[i, 0] = g.lat
+    out[i, 1] = g.lon
+    out[i, 2] = g.alt
+
 def euler2quat_single(euler):
     cdef Vector3 e = Vector3(euler[0], euler[1], euler[2])
     cdef Quaternion q = euler2quat_c(e)
@@ -84,6 +149,66 @@ def rot2euler_single(rot):
     cdef Vector3 e = rot2euler_c(r)
     return [e(0), e(1), e(2)]
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def euler2quat_array(const double[:, ::1] euler):
+    cdef Py_ssize_t i
+    out = np.empty((euler.shape[0], 4))
+    cdef double[:, ::1] o = out
+    for i in range(euler.shape[0]):
+        quat2row(euler2quat_c(Vector3(euler[i, 0], euler[i, 1], euler[i, 2])), o, i)
+    return out
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def quat2euler_array(const double[:, ::1] quat):
+    cdef Py_ssize_t i
+    out = np.empty((quat.shape[0], 3))
+    cdef double[:, ::1] o = out
+    for i in range(quat.shape[0]):
+        vector2row(quat2euler_c(Quaternion(quat[i, 0], quat[i, 1], quat[i, 2], quat[i, 3])), o, i)
+    return out
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def quat2rot_array(const double[:, ::1] quat):
+    cdef Py_ssize_t i
+    out = np.empty((quat.shape[0], 3, 3))
+    cdef double[:, :, ::1] o = out
+    for i in range(quat.shape[0]):
+        matrix2row(quat2rot_c(Quaternion(quat[i, 0], quat[i, 1], quat[i, 2], quat[i, 3])), o, i)
+    return out
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def rot2quat_array(const double[:, :, ::1] rot):
+    cdef Py_ssize_t i
+    out = np.empty((rot.shape[0], 4))
+    cdef double[:, ::1] o = out
+    for i in range(rot.shape[0]):
+        quat2row(rot2quat_c(row2matrix(rot, i)), o, i)
+    return out
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def euler2rot_array(const double[:, ::1] euler):
+    cdef Py_ssize_t i
+    out = np.empty((euler.shape[0], 3, 3))
+    cdef double[:, :, ::1] o = out
+    for i in range(euler.shape[0]):
+        matrix2row(euler2rot_c(Vector3(euler[i, 0], euler[i, 1], euler[i, 2])), o, i)
+    return out
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def rot2euler_array(const double[:, :, ::1] rot):
+    cdef Py_ssize_t i
+    out = np.empty((rot.shape[0], 3))
+    cdef double[:, ::1] o = out
+    for i in range(rot.shape[0]):
+        vector2row(rot2euler_c(row2matrix(rot, i)), o, i)
+    return out
+
 def rot_matrix(roll, pitch, yaw):
     return matrix2numpy(rot_matrix_c(roll, pitch, yaw))
 
@@ -101,6 +226,28 @@ def ned_euler_from_ecef_single(ecef_init, ecef_pose):
     cdef Vector3 e = ned_euler_from_ecef_c(init, pose)
     return [e(0), e(1), e(2)]
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def ecef_euler_from_ned_array(ecef_init, const double[:, ::1] ned_pose):
+    cdef ECEF init = list2ecef(ecef_init)
+    cdef Py_ssize_t i
+    out = np.empty((ned_pose.shape[0], 3))
+    cdef double[:, ::1] o = out
+    for i in range(ned_pose.shape[0]):
+        vector2row(ecef_euler_from_ned_c(init, Vector3(ned_pose[i, 0], ned_pose[i, 1], ned_pose[i, 2])), o, i)
+    return out
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def ned_euler_from_ecef_array(ecef_init, const double[:, ::1] ecef_pose):
+    cdef ECEF init = list2ecef(ecef_init)
+    cdef Py_ssize_t i
+    out = np.empty((ecef_pose.shape[0], 3))
+    cdef double[:, ::1] o = out
+    for i in range(ecef_pose.shape[0]):
+        vector2row(ned_euler_from_ecef_c(init, Vector3(ecef_pose[i, 0], ecef_pose[i, 1], ecef_pose[i, 2])), o, i)
+    return out
+
 def geodetic2ecef_single(geodetic):
     cdef Geodetic g = list2geodetic(geodetic)
     cdef ECEF e = geodetic2ecef_c(g)
@@ -111,6 +258,26 @@ def ecef2geodetic_single(ecef):
     cdef Geodetic g = ecef2geodetic_c(e)
     return [g.lat, g.lon, g.alt]
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def geodetic2ecef_array(const double[:, ::1] geodetic):
+    cdef Py_ssize_t i
+    out = np.empty((geodetic.shape[0], 3))
+    cdef double[:, ::1] o = out
+    for i in range(geodetic.shape[0]):
+        ecef2row(geodetic2ecef_c(row2geodetic(geodetic, i)), o, i)
+    return out
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def ecef2geodetic_array(const double[:, ::1] ecef):
+    cdef Py_ssize_t i
+    out = np.empty((ecef.shape[0], 3))
+    cdef double[:, ::1] o = out
+    for i in range(ecef.shape[0]):
+        geodetic2row(ecef2geodetic_c(row2ecef(ecef, i)), o, i)
+    return out
+
 
 cdef class LocalCoord:
     cdef LocalCoord_c * lc
@@ -170,5 +337,49 @@ cdef class LocalCoord:
         cdef Geodetic g = self.lc.ned2geodetic(n)
         return [g.lat, g.lon, g.alt]
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def ecef2ned_array(self, const double[:, ::1] ecef):
+        assert self.lc
+        cdef Py_ssize_t i
+        out = np.empty((ecef.shape[0], 3))
+        cdef double[:, ::1] o = out
+        for i in range(ecef.shape[0]):
+            ned2row(self.lc.ecef2ned(row2ecef(ecef, i)), o, i)
+        return out
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def ned2ecef_array(self, const double[:, ::1] ned):
+        assert self.lc
+        cdef Py_ssize_t i
+        out = np.empty((ned.shape[0], 3))
+        cdef double[:, ::1] o = out
+        for i in range(ned.shape[0]):
+            ecef2row(self.lc.ned2ecef(row2ned(ned, i)), o, i)
+        return out
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def geodetic2ned_array(self, const double[:, ::1] geodetic):
+        assert self.lc
+        cdef Py_ssize_t i
+        out = np.empty((geodetic.shape[0], 3))
+        cdef double[:, ::1] o = out
+        for i in range(geodetic.shape[0]):
+            ned2row(self.lc.geodetic2ned(row2geodetic(geodetic, i)), o, i)
+        return out
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def ned2geodetic_array(self, const double[:, ::1] ned):
+        assert self.lc
+        cdef Py_ssize_t i
+        out = np.empty((ned.shape[0], 3))
+        cdef double[:, ::1] o = out
+        for i in range(ned.shape[0]):
+            geodetic2row(self.lc.ned2geodetic(row2ned(ned, i)), o, i)
+        return out
+
     def __dealloc__(self):
         del self.lc
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+'''
+Batch evaluation of the longitudinal MPC over grids of initial conditions.
+Every worker of a process pool loads its own copy of libmpc once and solves
+chunks of scenarios, the results come back as arrays ready for plotting.
+  $ ./mpc_scenarios.py --v-ego 0 40 41 --v-lead 0 40 41 --x-lead 5 100 20 --TR 0.9 1.2 1.8 2.7 --steps 100 -o sweep.npz
+
+  from misc_scripts.mpc_scenarios import make_grid, run_scenarios
+  res = run_scenarios(make_grid(v_ego=np.linspace(0, 40, 41), TR=[0.9, 1.8, 2.7]), steps=100)
+  plt.plot(res['sim_gap'][0])
+'''
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from common.realtime import DT_MDL
+
+SCENARIO_KEYS = ['v_ego', 'v_lead', 'a_lead', 'x_lead', 'TR']
+DEFAULTS = {'v_ego': 20., 'v_lead': 20., 'a_lead': 0., 'x_lead': 40., 'TR': 1.8}
+
+N = 20  # intervals of the solver horizon
+# log_t of longitudinal_mpc.c, lets a solution be copied out in one go
+LOG_DTYPE = np.dtype([('x_ego', np.float64, N + 1), ('v_ego', np.float64, N + 1), ('a_ego', np.float64, N + 1),
+                      ('j_ego', np.float64, N), ('x_l', np.float64, N + 1), ('v_l', np.float64, N + 1),
+                      ('a_l', np.float64, N + 1), ('t', np.float64, N + 1), ('cost', np.float64)])
+
+_solver = None
+
+
+def make_grid(**ranges):
+  """All combinations of the given values, (n, 5) in SCENARIO_KEYS order.
+  Variables that aren't given are held at their DEFAULTS."""
+  unknown = set(ranges) - set(SCENARIO_KEYS)
+  if unknown:
+    raise ValueError(f"unknown scenario variables: {sorted(unknown)}")
+  axes = [np.atleast_1d(np.asarray(ranges.get(k, DEFAULTS[k]), dtype=np.float64)) for k in SCENARIO_KEYS]
+  return np.stack([a.ravel() for a in np.meshgrid(*axes, indexing='ij')], axis=1)
+
+
+class ScenarioSolver():
+  """One libmpc instance, reinitialized for every scenario"""
+  def __init__(self, mpc_id=1):
+    # imported here, every worker process loads its own copy of the solver
+    from selfdrive.controls.lib.dynamic_follow import distance_cost
+    from selfdrive.controls.lib.drive_helpers import MPC_COST_LONG
+    from selfdrive.controls.lib.longitudinal_mpc import libmpc_py
+    from selfdrive.controls.lib.radar_helpers import _LEAD_ACCEL_TAU
+
+    self.distance_cost = distance_cost
+    self.costs = MPC_COST_LONG
+    self.a_lead_tau = _LEAD_ACCEL_TAU
+    self.ffi, self.libmpc = libmpc_py.get_libmpc(mpc_id)
+    self.cur_state = self.ffi.new("state_t *")
+    self.solution = self.ffi.new("log_t *")
+    self.log = np.frombuffer(self.ffi.buffer(self.solution), dtype=LOG_DTYPE)
+
+  def run(self, scenarios, steps=1, dt=DT_MDL):
+    """Solves every scenario from its initial conditions, then follows the plan
+    for `steps` steps of dt, solving again every step like the planner does"""
+    n = len(scenarios)
+    plans = np.empty(n, dtype=LOG_DTYPE)
+    sim = {k: np.empty((n, steps)) for k in ['sim_gap', 'sim_v_ego', 'sim_a_ego', 'sim_v_lead', 'sim_cost']}
+    sim['sim_n_its'] = np.empty((n, steps), dtype=np.int32)
+
+    for i, (v_ego, v_lead, a_lead_0, x_lead, TR) in enumerate(scenarios):
+      self.libmpc.init(self.costs.TTC, self.distance_cost(TR), self.costs.ACCELERATION, self.costs.JERK)
+      self.libmpc.init_with_simulation(v_ego, x_lead, v_lead, a_lead_0, self.a_lead_tau)
+      a_ego = 0.
+
+      for k in range(steps):
+        a_lead = a_lead_0 * np.exp(-self.a_lead_tau * (k * dt) ** 2 / 2)
+        self.cur_state[0].x_ego = 0.
+        self.cur_state[0].v_ego = v_ego
+        self.cur_state[0].a_ego = a_ego
+        self.cur_state[0].x_l = x_lead
+        self.cur_state[0].v_l = v_lead
+        n_its = self.libmpc.run_mpc(self.cur_state, self.solution, self.a_lead_tau, a_lead, TR)
+
+        sol = self.log[0]
+        if k == 0:
+          plans[i] = sol
+        sim['sim_gap'][i, k] = x_lead
+        sim['sim_v_ego'][i, k] = v_ego
+        sim['sim_a_ego'][i, k] = a_ego
+        sim['sim_v_lead'][i, k] = v_lead
+        sim['sim_cost'][i, k] = sol['cost']
+        sim['sim_n_its'][i, k] = n_its
+
+        # follow the plan for one step
+        v_ego_next = max(0., np.interp(dt, sol['t'], sol['v_ego']))
+        a_ego = np.interp(dt, sol['t'], sol['a_ego'])
+        v_lead_next = max(0., v_lead + a_lead * dt)
+        x_lead += (v_lead + v_lead_next - v_ego - v_ego_next) / 2. * dt
+        v_ego, v_lead = v_ego_next, v_lead_next
+
+    out = {k: plans[k] for k in LOG_DTYPE.names}
+    out.update(sim)
+    return out
+
+
+def _init_worker(mpc_id):
+  global _solver
+  _solver = ScenarioSolver(mpc_id)
+
+
+def _run_chunk(args):
+  scenarios, steps, dt = args
+  return _solver.run(scenarios, steps, dt)
+
+
+def run_scenarios(scenarios, steps=1, dt=DT_MDL, jobs=None, chunk_size=64, mpc_id=1):
+  """Returns a dict of arrays with the first dimension over scenarios:
+  the plan of the first solve (x_ego, v_ego, a_ego, j_ego, x_l, v_l, a_l, t, cost)
+  and per step of the closed loop rollout sim_gap, sim_v_ego, sim_a_ego, sim_v_lead,
+  sim_cost and sim_n_its"""
+  scenarios = np.asarray(scenarios, dtype=np.float64).reshape(-1, len(SCENARIO_KEYS))
+  chunks = [(scenarios[i:i + chunk_size], steps, dt) for i in range(0, len(scenarios), chunk_size)]
+  jobs = os.cpu_count() if jobs is None else jobs
+
+  if jobs == 1:
+    _init_worker(mpc_id)
+    results = [_run_chunk(c) for c in chunks]
+  else:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(jobs, initializer=_init_worker, initargs=(mpc_id,)) as pool:
+      results = pool.map(_run_chunk, chunks)
+
+  if not results:
+    return {}
+  out = {k: np.concatenate([r[k] for r in results]) for k in results[0]}
+  out['scenarios'] = scenarios
+  return out
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Evaluate the longitudinal MPC over a grid of scenarios")
+  for k in SCENARIO_KEYS[:4]:
+    parser.add_argument(f"--{k.replace('_', '-')}", type=float, nargs=3, metavar=("START", "STOP", "NUM"),
+                        help=f"linspace of {k}, default {DEFAULTS[k]}")
+  parser.add_argument("--TR", type=float, nargs="+", default=[DEFAULTS['TR']], help="following distances")
+  parser.add_argument("--steps", type=int, default=1, help="closed loop steps per scenario")
+  parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="parallel workers")
+  parser.add_argument("-o", "--out", help="npz file to write the results to")
+  args = parser.parse_args()
+
+  ranges = {'TR': args.TR}
+  for k in SCENARIO_KEYS[:4]:
+    lin = getattr(args, k)
+    if lin is not None:
+      ranges[k] = np.linspace(lin[0], lin[1], int(lin[2]))
+  grid = make_grid(**ranges)
+
+  t = time.monotonic()
+  res = run_scenarios(grid, steps=args.steps, jobs=args.jobs)
+  elapsed = time.monotonic() - t
+  solves = len(grid) * args.steps
+  print(f"{len(grid)} scenarios, {solves} solves in {elapsed:.1f} s ({solves / elapsed:.0f} solves/s, {args.jobs} workers)")
+  print(f"mean qp iterations {np.mean(res['sim_n_its']):.2f}, min gap {np.min(res['sim_gap']):.2f} m")
+
+  if args.out is not None:
+    np.savez_compressed(args.out, **res)
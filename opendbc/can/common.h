@@ -28,6 +28,7 @@ public:
 
   std::vector<Signal> parse_sigs;
   std::vector<double> vals;
+  uint32_t index;
 
   uint16_t ts;
   uint64_t seen;
@@ -50,6 +51,7 @@ private:
 public:
   bool can_valid = false;
   uint64_t last_sec = 0;
+  uint32_t num_signals = 0;
 
   CANParser(int abus, const std::string& dbc_name,
             const std::vector<MessageParseOptions> &options,
@@ -58,6 +60,7 @@ public:
   void UpdateValid(uint64_t sec);
   void update_string(const std::string &data, bool sendcan);
   std::vector<SignalValue> query_latest();
+  std::vector<SignalValue> query_latest(uint64_t since);
 };
 
 class CANPacker {
@@ -66,7 +69,10 @@ private:
   std::map<std::pair<uint32_t, std::string>, Signal> signal_lookup;
   std::map<uint32_t, Msg> message_lookup;
 
+  uint64_t set_counter_and_checksum(uint32_t address, uint64_t ret, int counter);
+
 public:
   CANPacker(const std::string& dbc_name);
   uint64_t pack(uint32_t address, const std::vector<SignalPackValue> &signals, int counter);
+  uint64_t pack(uint32_t address, const std::vector<Signal> &signals, const double *values, int counter);
 };
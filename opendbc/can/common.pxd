@@ -64,6 +64,7 @@ cdef extern from "common_dbc.h":
     uint16_t ts
     const char* name
     double value
+    uint32_t index
 
   cdef struct SignalPackValue:
     const char * name
@@ -75,10 +76,14 @@ cdef extern from "common.h":
 
   cdef cppclass CANParser:
     bool can_valid
+    uint64_t last_sec
+    uint32_t num_signals
     CANParser(int, string, vector[MessageParseOptions], vector[SignalParseOptions])
     void update_string(string, bool)
     vector[SignalValue] query_latest()
+    vector[SignalValue] query_latest(uint64_t)
 
   cdef cppclass CANPacker:
    CANPacker(string)
    uint64_t pack(uint32_t, vector[SignalPackValue], int counter)
+   uint64_t pack(uint32_t, vector[Signal], const double *, int counter)
@@ -27,6 +27,7 @@ struct SignalValue {
   uint16_t ts;
   const char* name;
   double value;
+  uint32_t index;  // position of the signal among all signals of the parser
 };
 
 enum SignalType {
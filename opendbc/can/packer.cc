@@ -48,6 +48,14 @@ CANPacker::CANPacker(const std::string& dbc_name) {
   init_crc_lookup_tables();
 }
 
+int64_t to_ival(const Signal &sig, double value) {
+  int64_t ival = (int64_t)(round((value - sig.offset) / sig.factor));
+  if (ival < 0) {
+    ival = (1ULL << sig.b2) + ival;
+  }
+  return ival;
+}
+
 uint64_t CANPacker::pack(uint32_t address, const std::vector<SignalPackValue> &signals, int counter) {
   uint64_t ret = 0;
   for (const auto& sigval : signals) {
@@ -59,16 +67,23 @@ uint64_t CANPacker::pack(uint32_t address, const std::vector<SignalPackValue> &s
       WARN("undefined signal %s - %d\n", name.c_str(), address);
       continue;
     }
-    auto sig = sig_it->second;
+    ret = set_value(ret, sig_it->second, to_ival(sig_it->second, value));
+  }
 
-    int64_t ival = (int64_t)(round((value - sig.offset) / sig.factor));
-    if (ival < 0) {
-      ival = (1ULL << sig.b2) + ival;
-    }
+  return set_counter_and_checksum(address, ret, counter);
+}
 
-    ret = set_value(ret, sig, ival);
+// signals resolved ahead of time, values in the same order
+uint64_t CANPacker::pack(uint32_t address, const std::vector<Signal> &signals, const double *values, int counter) {
+  uint64_t ret = 0;
+  for (int i = 0; i < signals.size(); i++) {
+    ret = set_value(ret, signals[i], to_ival(signals[i], values[i]));
   }
 
+  return set_counter_and_checksum(address, ret, counter);
+}
+
+uint64_t CANPacker::set_counter_and_checksum(uint32_t address, uint64_t ret, int counter) {
   if (counter >= 0){
     auto sig_it = signal_lookup.find(std::make_pair(address, "COUNTER"));
     if (sig_it == signal_lookup.end()) {
@@ -6,10 +6,50 @@ from libcpp.vector cimport vector
 from libcpp.map cimport map
 from libcpp.string cimport string
 from libcpp cimport bool
+from cython.operator cimport dereference as deref
 from posix.dlfcn cimport dlopen, dlsym, RTLD_LAZY
 
 from .common cimport CANPacker as cpp_CANPacker
-from .common cimport dbc_lookup, SignalPackValue, DBC
+from .common cimport dbc_lookup, SignalPackValue, DBC, Signal
+
+
+cdef inline uint64_t ReverseBytes(uint64_t x):
+  return (((x & 0xff00000000000000ull) >> 56) |
+         ((x & 0x00ff000000000000ull) >> 40) |
+         ((x & 0x0000ff0000000000ull) >> 24) |
+         ((x & 0x000000ff00000000ull) >> 8) |
+         ((x & 0x00000000ff000000ull) << 8) |
+         ((x & 0x0000000000ff0000ull) << 24) |
+         ((x & 0x000000000000ff00ull) << 40) |
+         ((x & 0x00000000000000ffull) << 56))
+
+
+cdef class MessageTemplate:
+  """A message with a fixed list of signals, resolved once. Values are passed
+  positionally in the same order, as a tuple, list or array."""
+  cdef:
+    cpp_CANPacker *packer
+    vector[Signal] signals
+    vector[double] values
+
+  cdef readonly:
+    int address
+    int size
+    tuple signal_names
+
+  cdef bytes pack(self, values, int counter):
+    cdef size_t i
+    if len(values) != self.values.size():
+      raise ValueError(f"expected {self.values.size()} values for {self.signal_names}, got {len(values)}")
+    for i in range(self.values.size()):
+      self.values[i] = values[i]
+
+    cdef uint64_t val = self.packer.pack(self.address, self.signals, self.values.data(), counter)
+    val = ReverseBytes(val)
+    return (<char *>&val)[:self.size]
+
+  cpdef make_can_msg(self, bus, values, counter=-1):
+    return [self.address, 0, self.pack(values, counter), bus]
 
 
 cdef class CANPacker:
@@ -18,6 +58,7 @@ cdef class CANPacker:
     const DBC *dbc
     map[string, (int, int)] name_to_address_and_size
     map[int, int] address_to_size
+    dict templates
 
   def __init__(self, dbc_name):
     self.dbc = dbc_lookup(dbc_name)
@@ -30,6 +71,7 @@ cdef class CANPacker:
       msg = self.dbc[0].msgs[i]
       self.name_to_address_and_size[string(msg.name)] = (msg.address, msg.size)
       self.address_to_size[msg.address] = msg.size
+    self.templates = {}
 
   cdef uint64_t pack(self, addr, values, counter):
     cdef vector[SignalPackValue] values_thing
@@ -47,16 +89,6 @@ cdef class CANPacker:
 
     return self.packer.pack(addr, values_thing, counter)
 
-  cdef inline uint64_t ReverseBytes(self, uint64_t x):
-    return (((x & 0xff00000000000000ull) >> 56) |
-           ((x & 0x00ff000000000000ull) >> 40) |
-           ((x & 0x0000ff0000000000ull) >> 24) |
-           ((x & 0x000000ff00000000ull) >> 8) |
-           ((x & 0x00000000ff000000ull) << 8) |
-           ((x & 0x0000000000ff0000ull) << 24) |
-           ((x & 0x000000000000ff00ull) << 40) |
-           ((x & 0x00000000000000ffull) << 56))
-
   cpdef make_can_msg(self, name_or_addr, bus, values, counter=-1):
     cdef int addr, size
     if type(name_or_addr) == int:
@@ -65,5 +97,55 @@ cdef class CANPacker:
     else:
       addr, size = self.name_to_address_and_size[name_or_addr.encode('utf8')]
     cdef uint64_t val = self.pack(addr, values, counter)
-    val = self.ReverseBytes(val)
+    val = ReverseBytes(val)
     return [addr, 0, (<char *>&val)[:size], bus]
+
+  cpdef MessageTemplate template(self, name_or_addr, tuple signal_names):
+    """Compiles a message template once, later calls return the cached one"""
+    key = (name_or_addr, signal_names)
+    t = self.templates.get(key)
+    if t is not None:
+      return t
+
+    cdef MessageTemplate tmpl = MessageTemplate()
+    tmpl.packer = self.packer
+    tmpl.signal_names = signal_names
+    # operator[] would add an empty entry for an unknown message
+    cdef map[int, int].iterator addr_it
+    cdef map[string, (int, int)].iterator name_it
+    if type(name_or_addr) == int:
+      addr_it = self.address_to_size.find(name_or_addr)
+      if addr_it == self.address_to_size.end():
+        raise KeyError(f"undefined message {name_or_addr}")
+      tmpl.address, tmpl.size = name_or_addr, deref(addr_it).second
+    else:
+      name_it = self.name_to_address_and_size.find(name_or_addr.encode('utf8'))
+      if name_it == self.name_to_address_and_size.end():
+        raise KeyError(f"undefined message {name_or_addr}")
+      tmpl.address, tmpl.size = deref(name_it).second
+
+    cdef int i, j
+    for i in range(self.dbc[0].num_msgs):
+      if self.dbc[0].msgs[i].address != tmpl.address:
+        continue
+      msg = self.dbc[0].msgs[i]
+      for name in signal_names:
+        n = name.encode('utf8')
+        for j in range(msg.num_sigs):
+          if msg.sigs[j].name == n:
+            tmpl.signals.push_back(msg.sigs[j])
+            break
+        else:
+          raise KeyError(f"undefined signal {name} in {name_or_addr}")
+    tmpl.values.resize(tmpl.signals.size())
+
+    self.templates[key] = tmpl
+    return tmpl
+
+  def make_can_msgs(self, msgs):
+    """Packs all (template, bus, values, counter) of a frame in one call"""
+    cdef MessageTemplate tmpl
+    ret = []
+    for tmpl, bus, values, counter in msgs:
+      ret.append(tmpl.make_can_msg(bus, values, counter))
+    return ret
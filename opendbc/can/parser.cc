@@ -165,6 +165,8 @@ CANParser::CANParser(int abus, const std::string& dbc_name,
 
     }
 
+    state.index = num_signals;
+    num_signals += state.parse_sigs.size();
     message_states[state.address] = state;
   }
 }
@@ -227,11 +229,17 @@ void CANParser::update_string(const std::string &data, bool sendcan) {
 
 
 std::vector<SignalValue> CANParser::query_latest() {
+  return query_latest(last_sec);
+}
+
+// latest values of all messages seen between since and the last update,
+// so a batch of updates only has to be queried once
+std::vector<SignalValue> CANParser::query_latest(uint64_t since) {
   std::vector<SignalValue> ret;
 
   for (const auto& kv : message_states) {
     const auto& state = kv.second;
-    if (last_sec != 0 && state.seen != last_sec) continue;
+    if (last_sec != 0 && (state.seen < since || state.seen > last_sec)) continue;
 
     for (int i=0; i<state.parse_sigs.size(); i++) {
       const Signal &sig = state.parse_sigs[i];
@@ -240,6 +248,7 @@ std::vector<SignalValue> CANParser::query_latest() {
         .ts = state.ts,
         .name = sig.name,
         .value = state.vals[i],
+        .index = state.index + i,
       });
     }
   }
@@ -12,7 +12,9 @@ from .common cimport CANParser as cpp_CANParser
 from .common cimport SignalParseOptions, MessageParseOptions, dbc_lookup, SignalValue, DBC
 
 import os
+import sys
 import numbers
+import numpy as np
 from collections import defaultdict
 
 cdef int CAN_INVALID_CNT = 5
@@ -25,6 +27,10 @@ cdef class CANParser:
     map[uint32_t, string] address_to_msg_name
     vector[SignalValue] can_values
     bool test_mode_enabled
+    list sig_names
+    list sig_vl
+    list sig_ts
+    double[::1] values_view
 
   cdef readonly:
     string dbc_name
@@ -32,8 +38,10 @@ cdef class CANParser:
     dict ts
     bool can_valid
     int can_invalid_cnt
+    object values
+    list signal_keys
 
-  def __init__(self, dbc_name, signals, checks=None, bus=0):
+  def __init__(self, dbc_name, signals, checks=None, bus=0, use_array=False):
     if checks is None:
       checks = []
     self.can_valid = True
@@ -54,10 +62,13 @@ cdef class CANParser:
 
       self.msg_name_to_address[name] = msg.address
       self.address_to_msg_name[msg.address] = name
-      self.vl[msg.address] = {}
-      self.vl[name] = {}
-      self.ts[msg.address] = {}
-      self.ts[name] = {}
+
+      # lookups by address and by name share the same dicts
+      vl, ts = {}, {}
+      self.vl[msg.address] = vl
+      self.vl[name] = vl
+      self.ts[msg.address] = ts
+      self.ts[name] = ts
 
     # Convert message names into addresses
     for i in range(len(signals)):
@@ -93,32 +104,48 @@ cdef class CANParser:
       message_options_v.push_back(mpo)
 
     self.can = new cpp_CANParser(bus, dbc_name, message_options_v, signal_options_v)
-    self.update_vl()
-
-  cdef unordered_set[uint32_t] update_vl(self):
-    cdef string sig_name
-    cdef unordered_set[uint32_t] updated_val
-
-    can_values = self.can.query_latest()
-    valid = self.can.can_valid
 
+    # Resolve the dicts and the interned name of every tracked signal once,
+    # so updates don't have to convert or look up anything per value
+    cdef uint32_t num_signals = self.can.num_signals
+    self.sig_names = [None] * num_signals
+    self.sig_vl = [None] * num_signals
+    self.sig_ts = [None] * num_signals
+    self.signal_keys = [None] * num_signals
+    for cv in self.can.query_latest():
+      cv_name = sys.intern(<unicode>cv.name)
+      self.sig_names[cv.index] = cv_name
+      self.sig_vl[cv.index] = self.vl[cv.address]
+      self.sig_ts[cv.index] = self.ts[cv.address]
+      self.signal_keys[cv.index] = (cv.address, cv_name)
+
+    # optional flat array of all signals, in the order of signal_keys
+    self.values = None
+    if use_array:
+      self.values = np.zeros(num_signals, dtype=np.float64)
+      self.values_view = self.values
+
+    self.update_valid()
+    self.update_vl(0)
+
+  cdef void update_valid(self):
     # Update invalid flag
     self.can_invalid_cnt += 1
-    if valid:
-        self.can_invalid_cnt = 0
+    if self.can.can_valid:
+      self.can_invalid_cnt = 0
     self.can_valid = self.can_invalid_cnt < CAN_INVALID_CNT
 
+  cdef unordered_set[uint32_t] update_vl(self, uint64_t since):
+    cdef unordered_set[uint32_t] updated_val
+    cdef bool use_array = self.values is not None
 
-    for cv in can_values:
-      # Cast char * directly to unicode
-      name = <unicode>self.address_to_msg_name[cv.address].c_str()
-      cv_name = <unicode>cv.name
-
-      self.vl[cv.address][cv_name] = cv.value
-      self.ts[cv.address][cv_name] = cv.ts
-
-      self.vl[name][cv_name] = cv.value
-      self.ts[name][cv_name] = cv.ts
+    self.can_values = self.can.query_latest(since)
+    for cv in self.can_values:
+      cv_name = self.sig_names[cv.index]
+      (<dict>self.sig_vl[cv.index])[cv_name] = cv.value
+      (<dict>self.sig_ts[cv.index])[cv_name] = cv.ts
+      if use_array:
+        self.values_view[cv.index] = cv.value
 
       updated_val.insert(cv.address)
 
@@ -126,16 +153,24 @@ cdef class CANParser:
 
   def update_string(self, dat, sendcan=False):
     self.can.update_string(dat, sendcan)
-    return self.update_vl()
+    self.update_valid()
+    return self.update_vl(self.can.last_sec)
 
   def update_strings(self, strings, sendcan=False):
-    updated_vals = set()
+    # Parse all strings first, the dicts only need the latest value of every signal
+    cdef uint64_t since = 0
+    cdef bool updated = False
 
     for s in strings:
-      updated_val = self.update_string(s, sendcan)
-      updated_vals.update(updated_val)
-
-    return updated_vals
+      self.can.update_string(s, sendcan)
+      self.update_valid()
+      if not updated or self.can.last_sec < since:
+        since = self.can.last_sec
+      updated = True
+
+    if not updated:
+      return set()
+    return self.update_vl(since)
 
 cdef class CANDefine():
   cdef:
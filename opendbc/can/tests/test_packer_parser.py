@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import unittest
+
+from cereal import log
+from opendbc.can.packer import CANPacker
+from opendbc.can.parser import CANParser
+
+DBC = "honda_civic_touring_2016_can_generated"
+SIGNALS = [
+  ("STEER_TORQUE", "STEERING_CONTROL", 0),
+  ("STEER_TORQUE_REQUEST", "STEERING_CONTROL", 0),
+  ("COUNTER", "STEERING_CONTROL", 0),
+]
+
+
+def can_string(msgs, t):
+  dat = log.Event.new_message()
+  dat.logMonoTime = t
+  dat.init('can', len(msgs))
+  for i, (addr, _, d, src) in enumerate(msgs):
+    dat.can[i].address = addr
+    dat.can[i].dat = d
+    dat.can[i].src = src
+  return dat.to_bytes()
+
+
+class TestCanParser(unittest.TestCase):
+  def _strings(self, torques):
+    packer = CANPacker(DBC)
+    strings = []
+    for i, torque in enumerate(torques):
+      msg = packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": torque, "STEER_TORQUE_REQUEST": 1}, i % 4)
+      strings.append(can_string([msg], int((i + 1) * 1e7)))
+    return strings
+
+  def test_update_strings(self):
+    parser = CANParser(DBC, list(SIGNALS), [("STEERING_CONTROL", 0)], 0, use_array=True)
+    self.assertEqual(parser.vl["STEERING_CONTROL"]["STEER_TORQUE"], 0)
+
+    updated = parser.update_strings(self._strings([100, -200, 300]))
+    self.assertEqual(updated, {228})
+    self.assertIs(parser.vl[228], parser.vl["STEERING_CONTROL"])
+    self.assertEqual(parser.vl["STEERING_CONTROL"]["STEER_TORQUE"], 300)
+    self.assertEqual(parser.vl["STEERING_CONTROL"]["STEER_TORQUE_REQUEST"], 1)
+    self.assertEqual(parser.vl["STEERING_CONTROL"]["COUNTER"], 2)
+
+    # the flat array follows signal_keys
+    for (addr, name), value in zip(parser.signal_keys, parser.values):
+      self.assertEqual(parser.vl[addr][name], value)
+
+    self.assertEqual(parser.update_strings([]), set())
+
+  def test_batched_matches_single(self):
+    strings = self._strings(range(-400, 400, 50))
+    single = CANParser(DBC, list(SIGNALS), [("STEERING_CONTROL", 0)], 0)
+    batched = CANParser(DBC, list(SIGNALS), [("STEERING_CONTROL", 0)], 0)
+    for s in strings:
+      single.update_string(s)
+    for i in range(0, len(strings), 5):
+      batched.update_strings(strings[i:i + 5])
+    self.assertEqual(single.vl, batched.vl)
+    self.assertEqual(single.can_valid, batched.can_valid)
+
+
+class TestCanPacker(unittest.TestCase):
+  def test_templates(self):
+    messages = [
+      ("honda_civic_touring_2016_can_generated", "STEERING_CONTROL", {"STEER_TORQUE": -1234, "STEER_TORQUE_REQUEST": 1}),
+      ("honda_civic_touring_2016_can_generated", "BRAKE_COMMAND", {"COMPUTER_BRAKE": 300, "BRAKE_PUMP_REQUEST": 1,
+                                                                   "SET_ME_1": 1, "CHIME": 3, "AEB_REQ_2": 5}),
+      ("toyota_rav4_hybrid_2017_pt_generated", "STEERING_LKA", {"STEER_REQUEST": 1, "STEER_TORQUE_CMD": -500, "SET_ME_1": 1}),
+      ("toyota_rav4_hybrid_2017_pt_generated", "ACC_CONTROL", {"ACCEL_CMD": -1.5, "SET_ME_X01": 1, "PERMIT_BRAKING": 1}),
+    ]
+    for dbc, name, values in messages:
+      packer = CANPacker(dbc)
+      tmpl = packer.template(name, tuple(values))
+      self.assertIs(packer.template(name, tuple(values)), tmpl)
+      for counter in range(4):
+        expected = [packer.make_can_msg(name, bus, values, counter) for bus in range(3)]
+        msgs = packer.make_can_msgs([(tmpl, bus, list(values.values()), counter) for bus in range(3)])
+        self.assertEqual(msgs, expected)
+
+  def test_template_undefined(self):
+    packer = CANPacker(DBC)
+    with self.assertRaisesRegex(KeyError, "NOT_A_MESSAGE"):
+      packer.template("NOT_A_MESSAGE", ("STEER_TORQUE",))
+    with self.assertRaises(KeyError):
+      packer.template(0x7ff, ("STEER_TORQUE",))
+    with self.assertRaises(KeyError):
+      packer.template("STEERING_CONTROL", ("NOT_A_SIGNAL",))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -5,6 +5,7 @@ import hashlib
 import socket
 import usb1
 import os
+import numpy as np
 import time
 import traceback
 import subprocess
@@ -30,22 +31,71 @@ def build_st(target, mkfile="Makefile", clean=True):
   cmd = 'cd %s && %s && make -f %s %s' % (os.path.join(BASEDIR, "board"), clean_cmd, mkfile, target)
   _ = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=True)
 
+# USB CAN packet: RIR (address, extended and transmit flags), data length | bus << 4 | bus time << 16, data
+CAN_PACKET = struct.Struct("II8s")
+CAN_PACKET_DTYPE = np.dtype([('rir', '<u4'), ('len_bus_time', '<u4'), ('dat', 'u1', (8,))])
+# parsed messages, dat is only valid up to len
+CAN_MSG_DTYPE = np.dtype([('address', '<u4'), ('busTime', '<u2'), ('dat', 'u1', (8,)), ('src', 'u1'), ('len', 'u1')])
+
+def parse_can_buffer_array(dat):
+  """Parses a bulk read into a CAN_MSG_DTYPE array, without a Python loop"""
+  packets = np.frombuffer(dat, CAN_PACKET_DTYPE, count=len(dat) // CAN_PACKET.size)
+  rir, len_bus_time = packets['rir'], packets['len_bus_time']
+
+  ret = np.empty(len(packets), CAN_MSG_DTYPE)
+  extended = 4
+  ret['address'] = np.where(rir & extended, rir >> 3, rir >> 21)
+  ret['busTime'] = len_bus_time >> 16
+  ret['dat'] = packets['dat']
+  ret['src'] = (len_bus_time >> 4) & 0xFF
+  ret['len'] = len_bus_time & 0xF
+  return ret
+
 def parse_can_buffer(dat):
-  ret = []
-  for j in range(0, len(dat), 0x10):
-    ddat = dat[j:j + 0x10]
-    f1, f2 = struct.unpack("II", ddat[0:8])
-    extended = 4
-    if f1 & extended:
-      address = f1 >> 3
-    else:
-      address = f1 >> 21
-    dddat = ddat[8:8 + (f2 & 0xF)]
-    if DEBUG:
+  msgs = parse_can_buffer_array(dat)
+  ret = [(address, bus_time, dat[j:j + length], src) for address, bus_time, j, length, src in
+         zip(msgs['address'].tolist(), msgs['busTime'].tolist(), range(8, len(dat), CAN_PACKET.size),
+             msgs['len'].tolist(), msgs['src'].tolist())]
+  if DEBUG:
+    for address, _, dddat, _ in ret:
       print(f"  R 0x{address:x}: 0x{dddat.hex()}")
-    ret.append((address, f2 >> 16, dddat, (f2 >> 4) & 0xFF))
   return ret
 
+def can_array_to_list(msgs):
+  """CAN_MSG_DTYPE array as the (address, busTime, dat, src) tuples of parse_can_buffer"""
+  dat = msgs['dat'].tobytes()
+  return [(address, bus_time, dat[j:j + length], src) for address, bus_time, j, length, src in
+          zip(msgs['address'].tolist(), msgs['busTime'].tolist(), range(0, len(dat), 8),
+              msgs['len'].tolist(), msgs['src'].tolist())]
+
+def pack_can_buffer(arr, buf):
+  """Packs (addr, _, dat, bus) messages into USB CAN packets in buf, which has to
+  fit them all, returns the part of buf that was used"""
+  transmit = 1
+  extended = 4
+  for i, (addr, _, dat, bus) in enumerate(arr):
+    assert len(dat) <= 8
+    if DEBUG:
+      print(f"  W 0x{addr:x}: 0x{dat.hex()}")
+    if addr >= 0x800:
+      rir = (addr << 3) | transmit | extended
+    else:
+      rir = (addr << 21) | transmit
+    CAN_PACKET.pack_into(buf, i * CAN_PACKET.size, rir, len(dat) | (bus << 4), dat)
+  return memoryview(buf)[:len(arr) * CAN_PACKET.size]
+
+def pack_can_buffer_array(msgs):
+  """Packs a CAN_MSG_DTYPE array into USB CAN packets, sent on bus src, without a Python loop"""
+  transmit = 1
+  extended = 4
+  address = msgs['address'].astype(np.uint32)
+  packets = np.zeros(len(msgs), CAN_PACKET_DTYPE)
+  packets['rir'] = np.where(address >= 0x800, (address << 3) | transmit | extended, (address << 21) | transmit)
+  packets['len_bus_time'] = msgs['len'] | (msgs['src'].astype(np.uint32) << 4)
+  # zero the bytes after len, like the padding of pack_can_buffer
+  packets['dat'] = np.where(np.arange(8) < msgs['len'][:, None], msgs['dat'], 0)
+  return packets.tobytes()
+
 class PandaWifiStreaming(object):
   def __init__(self, ip="192.168.0.10", port=1338):
     self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -154,9 +204,12 @@ class Panda(object):
   def __init__(self, serial=None, claim=True):
     self._serial = serial
     self._handle = None
+    self._can_reader = None
+    self._can_rx = None
     self.connect(claim)
 
   def close(self):
+    self.stop_can_reader()
     self._handle.close()
     self._handle = None
 
@@ -485,28 +538,21 @@ class Panda(object):
   CAN_SEND_TIMEOUT_MS = 10
 
   def can_send_many(self, arr, timeout=CAN_SEND_TIMEOUT_MS):
-    snds = []
-    transmit = 1
-    extended = 4
-    for addr, _, dat, bus in arr:
-      assert len(dat) <= 8
-      if DEBUG:
-        print(f"  W 0x{addr:x}: 0x{dat.hex()}")
-      if addr >= 0x800:
-        rir = (addr << 3) | transmit | extended
-      else:
-        rir = (addr << 21) | transmit
-      snd = struct.pack("II", rir, len(dat) | (bus << 4)) + dat
-      snd = snd.ljust(0x10, b'\x00')
-      snds.append(snd)
+    # a buffer per call, sends can come from several threads
+    self._can_send_packets(pack_can_buffer(arr, bytearray(len(arr) * CAN_PACKET.size)), timeout)
+
+  def can_send_array(self, msgs, timeout=CAN_SEND_TIMEOUT_MS):
+    """Sends a CAN_MSG_DTYPE array, every message on its src bus"""
+    self._can_send_packets(pack_can_buffer_array(msgs), timeout)
 
+  def _can_send_packets(self, snds, timeout):
     while True:
       try:
         if self.wifi:
-          for s in snds:
-            self._handle.bulkWrite(3, s)
+          for i in range(0, len(snds), CAN_PACKET.size):
+            self._handle.bulkWrite(3, bytes(snds[i:i + CAN_PACKET.size]))
         else:
-          self._handle.bulkWrite(3, b''.join(snds), timeout=timeout)
+          self._handle.bulkWrite(3, bytes(snds), timeout=timeout)
         break
       except (usb1.USBErrorIO, usb1.USBErrorOverflow):
         print("CAN: BAD SEND MANY, RETRYING")
@@ -514,7 +560,7 @@ class Panda(object):
   def can_send(self, addr, dat, bus, timeout=CAN_SEND_TIMEOUT_MS):
     self.can_send_many([[addr, None, dat, bus]], timeout=timeout)
 
-  def can_recv(self):
+  def _can_read(self):
     dat = bytearray()
     while True:
       try:
@@ -523,7 +569,39 @@ class Panda(object):
       except (usb1.USBErrorIO, usb1.USBErrorOverflow):
         print("CAN: BAD RECV, RETRYING")
         time.sleep(0.1)
-    return parse_can_buffer(dat)
+    return dat
+
+  def can_recv(self):
+    if self._can_reader is not None:
+      return self._can_rx.can_recv()
+    return parse_can_buffer(self._can_read())
+
+  def can_recv_array(self):
+    """can_recv as a CAN_MSG_DTYPE array, for high message rates"""
+    if self._can_reader is not None:
+      return self._can_rx.can_recv_array()
+    return parse_can_buffer_array(self._can_read())
+
+  def start_can_reader(self, max_frames=None):
+    """Keeps reading from the panda in a background thread, so no frames are lost
+    when the caller is busy. can_recv then returns the frames received since the
+    last call, up to max_frames, and can_subscribe gives filtered buffers."""
+    from .can_reader import CanReader, MAX_FRAMES  # pylint: disable=import-outside-toplevel
+    if self._can_reader is None:
+      self._can_reader = CanReader(self._can_read)
+      self._can_rx = self._can_reader.subscribe(max_frames=max_frames or MAX_FRAMES)
+      self._can_reader.start()
+
+  def stop_can_reader(self):
+    if self._can_reader is not None:
+      self._can_reader.stop()
+      self._can_reader = None
+      self._can_rx = None
+
+  def can_subscribe(self, addrs=None, bus=None, **kwargs):
+    """Buffer of the frames of addrs on bus received from now on, see CanSubscription"""
+    assert self._can_reader is not None, "start_can_reader first"
+    return self._can_reader.subscribe(addrs, bus, **kwargs)
 
   def can_clear(self, bus):
     """Clears all messages from the specified internal CAN ringbuffer as
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+import numpy as np
+
+from . import CAN_MSG_DTYPE, can_array_to_list, parse_can_buffer_array
+
+# frames buffered per subscription before the oldest are dropped, >1 s of all buses at full load
+MAX_FRAMES = 32768
+# reads that return less than a full buffer drained the panda, wait this long before the next one
+POLL_INTERVAL = 0.001
+USB_PACKETS = 256
+
+
+class CanSubscription():
+  """Bounded buffer of the received batches, optionally only of some addresses and bus.
+  When it's full the oldest frames are dropped and counted in overflows."""
+  def __init__(self, addrs=None, bus: int = None, max_frames: int = MAX_FRAMES):
+    self.addrs = None if addrs is None else np.array(sorted(addrs), dtype=np.uint32)
+    self.bus = bus
+    self.max_frames = max_frames
+
+    self.frames = 0
+    self.overflows = 0
+    self.closed = False
+    self._batches: Deque[Tuple[float, np.ndarray]] = deque()
+    self._buffered = 0
+    self._lock = threading.Lock()
+    self._cond = threading.Condition(self._lock)
+    self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+  def _push(self, t: float, msgs) -> None:
+    if self.addrs is not None:
+      msgs = msgs[np.isin(msgs['address'], self.addrs)]
+    if self.bus is not None:
+      msgs = msgs[msgs['src'] == self.bus]
+    if not len(msgs):
+      return
+
+    with self._lock:
+      self._batches.append((t, msgs))
+      self._buffered += len(msgs)
+      self.frames += len(msgs)
+      while self._buffered > self.max_frames:
+        _, dropped = self._batches.popleft()
+        self._buffered -= len(dropped)
+        self.overflows += len(dropped)
+      self._notify()
+
+  def _close(self) -> None:
+    with self._lock:
+      self.closed = True
+      self._notify()
+
+  def _notify(self) -> None:
+    self._cond.notify_all()
+    for loop, fut in self._waiters:
+      loop.call_soon_threadsafe(lambda f: f.done() or f.set_result(None), fut)
+    self._waiters = []
+
+  def recv_batches(self, timeout: float = 0.) -> List[Tuple[float, np.ndarray]]:
+    """All buffered (time received, CAN_MSG_DTYPE array) batches, waits up to timeout for one"""
+    with self._lock:
+      if not self._batches and timeout > 0 and not self.closed:
+        self._cond.wait(timeout)
+      batches = list(self._batches)
+      self._batches.clear()
+      self._buffered = 0
+    return batches
+
+  def can_recv_array(self, timeout: float = 0.):
+    batches = self.recv_batches(timeout)
+    if len(batches) == 1:
+      return batches[0][1]
+    return np.concatenate([msgs for _, msgs in batches]) if batches else np.empty(0, CAN_MSG_DTYPE)
+
+  def can_recv(self, timeout: float = 0.) -> List[Tuple[int, int, bytes, int]]:
+    """Same as Panda.can_recv, without blocking unless there's a timeout"""
+    return can_array_to_list(self.can_recv_array(timeout))
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self) -> Tuple[float, np.ndarray]:
+    """Yields the (time received, CAN_MSG_DTYPE array) batches as they come in"""
+    while True:
+      with self._lock:
+        if self._batches:
+          t, msgs = self._batches.popleft()
+          self._buffered -= len(msgs)
+          return t, msgs
+        if self.closed:
+          raise StopAsyncIteration
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiters.append((loop, fut))
+      await fut
+
+
+class CanReader():
+  """Reads from the panda in a background thread, so its buffer doesn't overflow
+  when the caller is busy, and hands the batches to the subscriptions"""
+  def __init__(self, read: Callable[[], bytes], poll_interval: float = POLL_INTERVAL):
+    self.read = read
+    self.poll_interval = poll_interval
+
+    self.batches = 0
+    self.frames = 0
+    self.error: Optional[BaseException] = None
+    self._subscriptions: List[CanSubscription] = []
+    self._lock = threading.Lock()
+    self._exit = threading.Event()
+    self._thread: Optional[threading.Thread] = None
+
+  def subscribe(self, addrs=None, bus: int = None, max_frames: int = MAX_FRAMES) -> CanSubscription:
+    """Buffer of the frames received from now on, of addrs on bus when they're given"""
+    sub = CanSubscription(addrs, bus, max_frames)
+    with self._lock:
+      self._subscriptions.append(sub)
+    return sub
+
+  def unsubscribe(self, sub: CanSubscription) -> None:
+    with self._lock:
+      self._subscriptions.remove(sub)
+    sub._close()
+
+  def start(self) -> None:
+    self._exit.clear()
+    self._thread = threading.Thread(target=self._reader_thread, daemon=True)
+    self._thread.start()
+
+  def stop(self) -> None:
+    self._exit.set()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  def _reader_thread(self) -> None:
+    try:
+      while not self._exit.is_set():
+        dat = self.read()
+        t = time.monotonic()
+        if len(dat):
+          msgs = parse_can_buffer_array(dat)
+          self.batches += 1
+          self.frames += len(msgs)
+          with self._lock:
+            subscriptions = list(self._subscriptions)
+          for sub in subscriptions:
+            sub._push(t, msgs)
+
+        # a full read means there's more waiting
+        if len(dat) < USB_PACKETS * 16:
+          time.sleep(self.poll_interval)
+    except Exception as e:
+      self.error = e
+    finally:
+      with self._lock:
+        subscriptions = list(self._subscriptions)
+      for sub in subscriptions:
+        sub._close()
+
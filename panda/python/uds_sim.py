@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+import heapq
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from .uds import FUNCTIONAL_ADDRS, get_rx_addr_for_tx_addr
+
+# time on the bus per frame, ~0.25 ms at 500 kbps
+FRAME_TIME = 0.00025
+
+
+class SimulatedEcu():
+  """An ECU answering UDS/KWP requests over ISO-TP.
+
+  responses maps a request to its full response payload. Requests not in
+  responses are answered with the negative response code nrc, or not at all when
+  it's None. Requests in pending_delays are first answered with response pending
+  (0x78), and after that many seconds with the response. Requests and responses
+  of any length are sent as multi frame ISO-TP messages when they need to be.
+  """
+  def __init__(self, addr: int, responses: Dict[bytes, bytes], sub_addr: int = None, bus: int = 0, rx_addr: int = None,
+               response_delay: float = 0.002, pending_delays: Dict[bytes, float] = None, nrc: int = None,
+               functional: bool = True):
+    self.addr = addr
+    self.rx_addr = rx_addr if rx_addr is not None else get_rx_addr_for_tx_addr(addr)
+    self.sub_addr = sub_addr
+    self.bus = bus
+    self.responses = responses
+    self.response_delay = response_delay
+    self.pending_delays = pending_delays or {}
+    self.nrc = nrc
+    self.functional = functional
+    self.max_len = 8 if sub_addr is None else 7
+
+    self.requests = 0
+    self._rx_dat = b""
+    self._rx_len = 0
+    self._tx_frames: Deque[bytes] = deque()
+
+  def listens(self, addr: int, dat: bytes) -> bool:
+    if self.sub_addr is not None:
+      return addr == self.addr and len(dat) > 0 and dat[0] == self.sub_addr
+    if addr == self.addr:
+      return True
+    # functional requests are answered by the ECUs on the standard OBD addresses
+    if self.functional and addr in FUNCTIONAL_ADDRS:
+      return (addr == 0x7DF and 0x7E0 <= self.addr <= 0x7E7) or (addr == 0x18DB33F1 and self.addr & 0xFFFF00FF == 0x18DA00F1)
+    return False
+
+  def rx(self, addr: int, dat: bytes) -> List[Tuple[float, bytes]]:
+    """Handles a received frame, returns the frames to send as (delay, dat)"""
+    if self.sub_addr is not None:
+      dat = dat[1:]
+    functional = addr != self.addr
+
+    frame_type = dat[0] >> 4
+    if frame_type == 0x0:
+      return self._request(dat[1:1 + (dat[0] & 0xF)], functional)
+
+    if frame_type == 0x1:
+      self._rx_len = ((dat[0] & 0x0F) << 8) + dat[1]
+      self._rx_dat = dat[2:]
+      # flow control, send all frames without delay
+      return self._frames([b"\x30\x00\x00".ljust(self.max_len, b"\x00")], FRAME_TIME)
+
+    if frame_type == 0x2 and self._rx_len:
+      self._rx_dat += dat[1:]
+      if len(self._rx_dat) >= self._rx_len:
+        request, self._rx_len = self._rx_dat[:self._rx_len], 0
+        return self._request(request, functional)
+      return []
+
+    if frame_type == 0x3 and dat[0] == 0x30 and self._tx_frames:
+      count = dat[1] if dat[1] > 0 else len(self._tx_frames)
+      st_min = dat[2] / 1000. if dat[2] <= 0x7F else (dat[2] & 0xF) / 10000.
+      frames = [self._tx_frames.popleft() for _ in range(min(count, len(self._tx_frames)))]
+      return self._frames(frames, FRAME_TIME, max(st_min, FRAME_TIME))
+
+    return []
+
+  def _request(self, request: bytes, functional: bool) -> List[Tuple[float, bytes]]:
+    self.requests += 1
+    response = self.responses.get(request)
+    if response is None:
+      # negative responses to functional requests are suppressed
+      if self.nrc is None or functional or not len(request):
+        return []
+      return self._response(bytes([0x7F, request[0], self.nrc]), self.response_delay)
+
+    pending_delay = self.pending_delays.get(request)
+    if pending_delay is None:
+      return self._response(response, self.response_delay)
+    return self._response(bytes([0x7F, request[0], 0x78]), self.response_delay) + \
+      self._response(response, self.response_delay + pending_delay)
+
+  def _response(self, dat: bytes, delay: float) -> List[Tuple[float, bytes]]:
+    if len(dat) < self.max_len:
+      return self._frames([(bytes([len(dat)]) + dat).ljust(self.max_len, b"\x00")], delay)
+
+    # first frame now, the consecutive frames after flow control
+    n = self.max_len - 1
+    first = self.max_len - 2
+    self._tx_frames = deque((bytes([0x20 | (i + 1) & 0xF]) + dat[first + i * n:first + (i + 1) * n]).ljust(self.max_len, b"\x00")
+                            for i in range((len(dat) - first + n - 1) // n))
+    return self._frames([bytes([0x10 | len(dat) >> 8, len(dat) & 0xFF]) + dat[:first]], delay)
+
+  def _frames(self, frames: List[bytes], delay: float, interval: float = FRAME_TIME) -> List[Tuple[float, bytes]]:
+    if self.sub_addr is not None:
+      frames = [bytes([self.sub_addr]) + f for f in frames]
+    return [(delay + i * interval, f) for i, f in enumerate(frames)]
+
+
+class VirtualCanBus():
+  """In-process CAN bus with simulated ECUs, with the can_send/can_recv interface
+  of Panda, so it can be used in place of one or for the callables of CanClient.
+  Frames are received by the ECUs when they're sent, and the responses show up in
+  can_recv once their time has come."""
+  def __init__(self, ecus: Iterable[SimulatedEcu] = ()):
+    self.ecus = list(ecus)
+    self.tx_frames = 0
+    self.rx_frames = 0
+    self._queue: List[Tuple[float, int, int, bytes, int]] = []
+    self._seq = 0
+
+  def add_ecu(self, ecu: SimulatedEcu) -> None:
+    self.ecus.append(ecu)
+
+  def can_send(self, addr: int, dat: bytes, bus: int, timeout: int = 0) -> None:
+    self.tx_frames += 1
+    t = time.monotonic()
+    dat = bytes(dat)
+    for ecu in self.ecus:
+      if ecu.bus == bus and ecu.listens(addr, dat):
+        for delay, frame in ecu.rx(addr, dat):
+          self._seq += 1
+          heapq.heappush(self._queue, (t + delay, self._seq, ecu.rx_addr, frame, bus))
+
+  def can_send_many(self, arr, timeout: int = 0) -> None:
+    for addr, _, dat, bus in arr:
+      self.can_send(addr, dat, bus)
+
+  def can_recv(self) -> List[Tuple[int, int, bytes, int]]:
+    ret = []
+    t = time.monotonic()
+    while self._queue and self._queue[0][0] <= t:
+      frame_t, _, addr, dat, bus = heapq.heappop(self._queue)
+      ret.append((addr, int(frame_t * 1e6) & 0xFFFF, dat, bus))
+    self.rx_frames += len(ret)
+    return ret
+
+  def next_frame_time(self) -> Optional[float]:
+    """Time of the next frame that can_recv will return, None if there's none"""
+    return self._queue[0][0] if self._queue else None
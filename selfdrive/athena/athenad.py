@@ -6,13 +6,16 @@ import json
 import os
 import queue
 import random
+import secrets
 import select
 import socket
+import struct
 import threading
 import time
 from collections import namedtuple
+from itertools import count
 from functools import partial
-from typing import Any
+from typing import Any, Dict
 
 import requests
 from jsonrpc import JSONRPCResponseManager, dispatcher
@@ -39,16 +42,28 @@ upload_queue: Any = queue.Queue()
 cancelled_uploads: Any = set()
 UploadItem = namedtuple('UploadItem', ['path', 'url', 'headers', 'created_at', 'id'])
 
+# binary subscription frames: header, then per message its length and the raw Event bytes
+SUBSCRIPTION_FRAME_HEADER = struct.Struct('<8sI')  # subscription id, message count
+SUBSCRIPTION_MSG_HEADER = struct.Struct('<I')
+SUBSCRIPTION_MAX_BATCH_MS = 5000
+subscriptions: Dict[str, 'Subscription'] = {}
+subscriptions_lock = threading.Lock()
+connection_ids = count()
+# id of the connection the jsonrpc handler in this thread belongs to
+handler_connection = threading.local()
+
 
 def handle_long_poll(ws):
   end_event = threading.Event()
+  conn_id = next(connection_ids)
 
   threads = [
     threading.Thread(target=ws_recv, args=(ws, end_event)),
     threading.Thread(target=ws_send, args=(ws, end_event)),
-    threading.Thread(target=upload_handler, args=(end_event,))
+    threading.Thread(target=upload_handler, args=(end_event,)),
+    threading.Thread(target=subscription_handler, args=(ws, end_event, conn_id))
   ] + [
-    threading.Thread(target=jsonrpc_handler, args=(end_event,))
+    threading.Thread(target=jsonrpc_handler, args=(end_event, conn_id))
     for x in range(HANDLER_THREADS)
   ]
 
@@ -65,7 +80,8 @@ def handle_long_poll(ws):
       thread.join()
 
 
-def jsonrpc_handler(end_event):
+def jsonrpc_handler(end_event, conn_id=None):
+  handler_connection.id = conn_id
   dispatcher["startLocalProxy"] = partial(startLocalProxy, end_event)
   while not end_event.is_set():
     try:
@@ -93,6 +109,97 @@ def upload_handler(end_event):
       cloudlog.exception("athena.upload_handler.exception")
 
 
+class Subscription():
+  """Downsamples the messages of a set of services and batches them into binary frames"""
+  def __init__(self, sub_id, services, rate=None, batch_interval=0.1, connection=None):
+    self.id = sub_id
+    self.connection = connection
+    self.services = set(services)
+    self.interval = 1. / rate if rate else 0.
+    self.batch_interval = batch_interval
+    self.next_send = {s: 0. for s in self.services}
+    self.next_flush = 0.
+    self.batch = []
+
+  def add(self, service, dat, t):
+    if t < self.next_send[service]:
+      return
+    # keep the requested rate on average without bursting after gaps
+    self.next_send[service] = max(self.next_send[service] + self.interval, t - self.interval)
+    self.batch.append(dat)
+
+  def flush(self, t):
+    if t < self.next_flush:
+      return None
+    self.next_flush = t + self.batch_interval
+    if not len(self.batch):
+      return None
+
+    frame = [SUBSCRIPTION_FRAME_HEADER.pack(self.id.encode(), len(self.batch))]
+    for dat in self.batch:
+      frame += [SUBSCRIPTION_MSG_HEADER.pack(len(dat)), dat]
+    self.batch = []
+    return b''.join(frame)
+
+
+def parse_subscription_frame(frame):
+  """Returns the subscription id and the raw Event bytes of a frame"""
+  sub_id, count = SUBSCRIPTION_FRAME_HEADER.unpack_from(frame)
+  offset = SUBSCRIPTION_FRAME_HEADER.size
+  msgs = []
+  for _ in range(count):
+    size, = SUBSCRIPTION_MSG_HEADER.unpack_from(frame, offset)
+    offset += SUBSCRIPTION_MSG_HEADER.size
+    msgs.append(frame[offset:offset + size])
+    offset += size
+  return sub_id.decode(), msgs
+
+
+def subscription_handler(ws, end_event, conn_id=None):
+  poller, socks = None, {}
+  try:
+    while not end_event.is_set():
+      with subscriptions_lock:
+        # made through a previous connection, by a request handled after it was torn down
+        for sub_id in [sub_id for sub_id, sub in subscriptions.items() if sub.connection != conn_id]:
+          del subscriptions[sub_id]
+        subs = list(subscriptions.values())
+      services = set().union(*[sub.services for sub in subs])
+
+      if not services:
+        poller, socks = None, {}
+        time.sleep(0.1)
+        continue
+
+      # pollers can't unregister sockets, start over when the set of services changes
+      if services != set(socks.values()):
+        poller = messaging.Poller()
+        socks = {messaging.sub_sock(s, poller=poller): s for s in services}
+
+      timeout = int(min(sub.batch_interval for sub in subs) * 1000)
+      for sock in poller.poll(max(1, timeout)):
+        service = socks[sock]
+        t = sec_since_boot()
+        for dat in messaging.drain_sock_raw(sock):
+          for sub in subs:
+            if service in sub.services:
+              sub.add(service, dat, t)
+
+      t = sec_since_boot()
+      for sub in subs:
+        frame = sub.flush(t)
+        if frame is not None:
+          ws.send(frame, ABNF.OPCODE_BINARY)
+  except Exception:
+    cloudlog.exception("athenad.subscription_handler.exception")
+    end_event.set()
+  finally:
+    # subscriptions don't outlive the connection
+    with subscriptions_lock:
+      for sub_id in [sub_id for sub_id, sub in subscriptions.items() if sub.connection == conn_id]:
+        del subscriptions[sub_id]
+
+
 def _do_upload(upload_item):
   with open(upload_item.path, "rb") as f:
     size = os.fstat(f.fileno()).st_size
@@ -117,6 +224,31 @@ def getMessage(service=None, timeout=1000):
   return ret.to_dict()
 
 
+@dispatcher.add_method
+def subscribe(services, rate=None, batch_ms=100):
+  """Streams messages of services as binary frames until unsubscribed or disconnected.
+  rate limits each service to that many messages per second."""
+  if not isinstance(services, list) or not len(services) or any(s not in service_list for s in services):
+    raise Exception("invalid service")
+  if rate is not None and rate <= 0:
+    raise Exception("invalid rate")
+  if not 0 < batch_ms <= SUBSCRIPTION_MAX_BATCH_MS:
+    raise Exception("invalid batch_ms")
+
+  sub = Subscription(secrets.token_hex(4), services, rate, batch_ms / 1000., getattr(handler_connection, 'id', None))
+  with subscriptions_lock:
+    subscriptions[sub.id] = sub
+  return {"id": sub.id}
+
+
+@dispatcher.add_method
+def unsubscribe(sub_id):
+  with subscriptions_lock:
+    if subscriptions.pop(sub_id, None) is None:
+      return 404
+  return {"success": 1}
+
+
 @dispatcher.add_method
 def listDataDirectory():
   files = [os.path.relpath(os.path.join(dp, f), ROOT) for dp, dn, fn in os.walk(ROOT) for f in fn]
@@ -0,0 +1,20 @@
+import queue
+import threading
+
+
+class MockWebsocket():
+  """Stands in for a websocket connection, records everything sent to it"""
+  def __init__(self, recv_queue=None):
+    self.recv_queue = recv_queue if recv_queue is not None else queue.Queue()
+    self.sent = queue.Queue()
+    self.lock = threading.Lock()
+
+  def recv_data(self, control_frame=False):
+    data = self.recv_queue.get()
+    if isinstance(data, Exception):
+      raise data
+    return data
+
+  def send(self, data, opcode=None):
+    with self.lock:
+      self.sent.put((data, opcode))
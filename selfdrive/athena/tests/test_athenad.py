@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import threading
+import time
+import unittest
+
+import cereal.messaging as messaging
+from cereal import log
+from websocket import ABNF
+
+from selfdrive.athena import athenad
+from selfdrive.athena.tests.helpers import MockWebsocket
+
+
+class TestAthenadSubscriptions(unittest.TestCase):
+  def tearDown(self):
+    athenad.subscriptions.clear()
+
+  def test_subscribe_invalid(self):
+    with self.assertRaises(Exception):
+      athenad.subscribe(['notAService'])
+    with self.assertRaises(Exception):
+      athenad.subscribe(['carState'], rate=0)
+    with self.assertRaises(Exception):
+      athenad.subscribe(['carState'], batch_ms=0)
+
+  def test_unsubscribe(self):
+    sub_id = athenad.subscribe(['carState'])['id']
+    self.assertIn(sub_id, athenad.subscriptions)
+    self.assertEqual(athenad.unsubscribe(sub_id), {"success": 1})
+    self.assertEqual(athenad.unsubscribe(sub_id), 404)
+
+  def test_downsample_and_batch(self):
+    sub = athenad.Subscription('abcd1234', ['carState'], rate=10, batch_interval=1.)
+    # 100 Hz for one second
+    for i in range(100):
+      sub.add('carState', b'%d' % i, i * 0.01)
+    self.assertEqual(len(sub.batch), 10)
+
+    frame = sub.flush(1.)
+    sub_id, msgs = athenad.parse_subscription_frame(frame)
+    self.assertEqual(sub_id, 'abcd1234')
+    self.assertEqual(msgs[:2], [b'0', b'10'])
+    self.assertIsNone(sub.flush(1.5))
+
+  def test_stream(self):
+    ws = MockWebsocket()
+    end_event = threading.Event()
+    sub_id = athenad.subscribe(['deviceState'], batch_ms=50)['id']
+
+    thread = threading.Thread(target=athenad.subscription_handler, args=(ws, end_event))
+    thread.start()
+    try:
+      pm = messaging.PubMaster(['deviceState'])
+      time.sleep(0.5)  # subscriber setup
+      for _ in range(5):
+        msg = messaging.new_message('deviceState')
+        pm.send('deviceState', msg)
+        time.sleep(0.01)
+
+      frame, opcode = ws.sent.get(timeout=2)
+      self.assertEqual(opcode, ABNF.OPCODE_BINARY)
+      frame_sub_id, msgs = athenad.parse_subscription_frame(frame)
+      self.assertEqual(frame_sub_id, sub_id)
+      self.assertGreater(len(msgs), 0)
+      with log.Event.from_bytes(msgs[0]) as evt:
+        self.assertEqual(evt.which(), 'deviceState')
+    finally:
+      end_event.set()
+      thread.join()
+
+    # subscriptions are cancelled on disconnect
+    self.assertEqual(len(athenad.subscriptions), 0)
+
+  def test_stale_connection(self):
+    # subscribe handled by the jsonrpc thread of a connection that's already gone
+    athenad.handler_connection.id = 1
+    try:
+      athenad.subscribe(['deviceState'])
+    finally:
+      del athenad.handler_connection.id
+
+    ws = MockWebsocket()
+    end_event = threading.Event()
+    thread = threading.Thread(target=athenad.subscription_handler, args=(ws, end_event, 2))
+    thread.start()
+    time.sleep(0.3)
+    self.assertEqual(len(athenad.subscriptions), 0)
+    end_event.set()
+    thread.join()
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import random
+import unittest
+
+from panda.python import CAN_PACKET, can_array_to_list, pack_can_buffer, pack_can_buffer_array, parse_can_buffer, parse_can_buffer_array
+
+
+class TestCanBuffer(unittest.TestCase):
+  def setUp(self):
+    random.seed(0)
+    self.msgs = []
+    for i in range(256):
+      # standard and extended addresses, all data lengths
+      addr = random.randrange(0x800) if i % 2 else 0x18DA00F1 + (random.randrange(256) << 8)
+      self.msgs.append((addr, 0, bytes(random.randrange(256) for _ in range(i % 9)), random.randrange(3)))
+
+  def test_pack_parse(self):
+    buf = bytearray(len(self.msgs) * CAN_PACKET.size)
+    dat = pack_can_buffer(self.msgs, buf)
+    self.assertEqual(len(dat), len(self.msgs) * CAN_PACKET.size)
+    self.assertEqual(parse_can_buffer(bytes(dat)), self.msgs)
+
+    msgs = parse_can_buffer_array(bytes(dat))
+    self.assertEqual(can_array_to_list(msgs), self.msgs)
+    self.assertEqual(pack_can_buffer_array(msgs), bytes(dat))
+
+  def test_buffer_reuse(self):
+    # a shorter batch only uses the start of a larger buffer
+    buf = bytearray(len(self.msgs) * CAN_PACKET.size)
+    pack_can_buffer(self.msgs, buf)
+    dat = pack_can_buffer(self.msgs[:3], buf)
+    self.assertEqual(parse_can_buffer(bytes(dat)), self.msgs[:3])
+
+  def test_max_length(self):
+    # USB packets carry classic CAN frames, longer data can't be sent
+    with self.assertRaises(AssertionError):
+      pack_can_buffer([(0x123, 0, bytes(64), 0)], bytearray(CAN_PACKET.size))
+
+
+if __name__ == "__main__":
+  unittest.main()
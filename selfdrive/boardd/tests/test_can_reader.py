@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import asyncio
+import struct
+import threading
+import time
+import unittest
+from collections import deque
+
+from panda.python import pack_can_buffer, parse_can_buffer
+from panda.python.can_reader import CanReader
+
+PANDA_RX_QUEUE = 4096  # frames the panda buffers
+
+
+class FakeCanHandle:
+  """USB handle of a panda receiving rate frames/s, numbered in their data, which
+  drops the newest frames when its queue is full like the panda does"""
+  def __init__(self, rate):
+    self.rate = rate
+    self.start = time.monotonic()
+    self.generated = 0
+    self.overflows = 0
+    self.queue = deque()
+    self.buf = bytearray(0x10 * 256)
+    self.lock = threading.Lock()
+
+  def bulkRead(self, endpoint, length, timeout=0):
+    with self.lock:
+      n = int((time.monotonic() - self.start) * self.rate)
+      for i in range(self.generated, n):
+        if len(self.queue) < PANDA_RX_QUEUE:
+          self.queue.append([0x100 + i % 8, None, struct.pack("<I", i), i % 3])
+        else:
+          self.overflows += 1
+      self.generated = n
+
+      msgs = [self.queue.popleft() for _ in range(min(len(self.queue), length // 0x10))]
+      return bytearray(pack_can_buffer(msgs, self.buf))
+
+
+def counters(msgs):
+  return [struct.unpack("<I", dat)[0] for _, _, dat, _ in msgs]
+
+
+class TestCanReader(unittest.TestCase):
+  def test_slow_caller(self):
+    # reading once after a while loses frames
+    handle = FakeCanHandle(rate=20000)
+    time.sleep(0.3)
+    parse_can_buffer(handle.bulkRead(1, 0x10 * 256))
+    self.assertGreater(handle.overflows, 0)
+
+    handle = FakeCanHandle(rate=20000)
+    reader = CanReader(lambda: handle.bulkRead(1, 0x10 * 256))
+    sub = reader.subscribe()
+    reader.start()
+    time.sleep(0.3)
+    msgs = sub.can_recv()
+    reader.stop()
+
+    self.assertEqual(handle.overflows, 0)
+    self.assertEqual(sub.overflows, 0)
+    self.assertGreater(len(msgs), 4000)
+    self.assertEqual(counters(msgs), list(range(len(msgs))))
+
+  def test_filter_and_overflow(self):
+    handle = FakeCanHandle(rate=20000)
+    reader = CanReader(lambda: handle.bulkRead(1, 0x10 * 256))
+    sub = reader.subscribe(addrs=[0x101, 0x104], bus=1)
+    small = reader.subscribe(max_frames=100)
+    reader.start()
+    time.sleep(0.1)
+    reader.stop()
+
+    msgs = sub.can_recv()
+    self.assertGreater(len(msgs), 0)
+    self.assertTrue(all(addr in (0x101, 0x104) and bus == 1 for addr, _, _, bus in msgs))
+    self.assertTrue(all(i % 8 in (1, 4) and i % 3 == 1 for i in counters(msgs)))
+
+    self.assertLessEqual(len(small.can_recv()), 100)
+    self.assertGreater(small.overflows, 0)
+    self.assertEqual(small.frames, reader.frames)
+
+  def test_async_iterator(self):
+    handle = FakeCanHandle(rate=5000)
+    reader = CanReader(lambda: handle.bulkRead(1, 0x10 * 256))
+    sub = reader.subscribe(bus=0)
+    reader.start()
+
+    async def collect():
+      batches = []
+      async for t, msgs in sub:
+        batches.append((t, msgs))
+        if len(batches) == 10:
+          break
+      return batches
+
+    batches = asyncio.run(asyncio.wait_for(collect(), 5.))
+    reader.stop()
+    times = [t for t, _ in batches]
+    self.assertEqual(times, sorted(times))
+    self.assertTrue(all((msgs['src'] == 0).all() for _, msgs in batches))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -4,7 +4,7 @@ from common.basedir import BASEDIR
 from selfdrive.version import comma_remote, tested_branch #, smiskol_remote
 from selfdrive.car.fingerprints import eliminate_incompatible_cars, all_known_cars
 from selfdrive.car.vin import get_vin, VIN_UNKNOWN
-from selfdrive.car.fw_versions import get_fw_versions, match_fw_to_car
+from selfdrive.car.fw_versions import get_fw_versions, match_fw_to_car, verify_fw_versions
 from selfdrive.hardware import EON
 from selfdrive.swaglog import cloudlog
 import cereal.messaging as messaging
@@ -92,20 +92,21 @@ def fingerprint(logcan, sendcan, has_relay):
     # Vin query only reliably works thorugh OBDII
     bus = 1
 
+    _, vin = get_vin(logcan, sendcan, bus)
+
+    # FW versions are cached with the VIN, spot check a few ECUs to make sure they are still the same
+    car_fw = None
     cached_params = Params().get("CarParamsCache")
-    if cached_params is not None:
+    if cached_params is not None and vin != VIN_UNKNOWN:
       cached_params = car.CarParams.from_bytes(cached_params)
-      if cached_params.carName == "mock":
-        cached_params = None
-
-    if cached_params is not None and len(cached_params.carFw) > 0 and cached_params.carVin is not VIN_UNKNOWN:
-      cloudlog.warning("Using cached CarParams")
-      vin = cached_params.carVin
-      car_fw = list(cached_params.carFw)
-    else:
-      cloudlog.warning("Getting VIN & FW versions")
-      _, vin = get_vin(logcan, sendcan, bus)
-      car_fw = get_fw_versions(logcan, sendcan, bus)
+      if cached_params.carName != "mock" and cached_params.carVin == vin and len(cached_params.carFw) > 0 and \
+         verify_fw_versions(logcan, sendcan, bus, cached_params.carFw):
+        cloudlog.warning("Using cached FW versions")
+        car_fw = list(cached_params.carFw)
+
+    if car_fw is None:
+      cloudlog.warning("Getting FW versions")
+      car_fw = get_fw_versions(logcan, sendcan, bus, early_stop=True)
 
     fw_candidates = match_fw_to_car(car_fw)
   else:
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import time
+
+import cereal.messaging as messaging
+from cereal import log
+from panda.python.uds_sim import SimulatedEcu, VirtualCanBus
+from selfdrive.car.fingerprints import FW_VERSIONS, get_attr_from_cars
+from selfdrive.car.fw_versions import REQUESTS, TOYOTA_VERSION_REQUEST, UDS_VERSION_REQUEST, HYUNDAI_VERSION_REQUEST_LONG
+from selfdrive.car.vin import VIN_REQUEST, VIN_RESPONSE
+
+SIM_VIN = "5YFBURHE0KP000001"
+
+# the FW version request the ECUs of a brand answer, the versions in the fingerprints have its format
+BRAND_FW_REQUEST = {
+  'toyota': TOYOTA_VERSION_REQUEST,
+  'honda': UDS_VERSION_REQUEST,
+  'hyundai': HYUNDAI_VERSION_REQUEST_LONG,
+}
+
+# interval of the other traffic on the bus, that wakes up blocking receives
+BUS_TICK = 0.01
+
+
+class SimCanSocket():
+  """can socket receiving the frames of a VirtualCanBus"""
+  def __init__(self, can_bus):
+    self.can_bus = can_bus
+
+  def receive(self, non_blocking=False):
+    if not non_blocking:
+      next_t = self.can_bus.next_frame_time()
+      time.sleep(BUS_TICK if next_t is None else min(max(next_t - time.monotonic(), 0.), BUS_TICK))
+
+    frames = self.can_bus.can_recv()
+    if non_blocking and not frames:
+      return None
+
+    msg = messaging.new_message('can', len(frames))
+    for i, (addr, bus_time, dat, src) in enumerate(frames):
+      msg.can[i] = {'address': addr, 'busTime': bus_time, 'dat': dat, 'src': src}
+    return msg.to_bytes()
+
+
+class SimSendcanSocket():
+  """sendcan socket sending to a VirtualCanBus"""
+  def __init__(self, can_bus):
+    self.can_bus = can_bus
+
+  def send(self, dat):
+    for msg in log.Event.from_bytes(dat).sendcan:
+      self.can_bus.can_send(msg.address, msg.dat, msg.src)
+
+
+def sim_sockets(can_bus):
+  """logcan and sendcan sockets for a VirtualCanBus, to use with the FW and VIN queries"""
+  return SimCanSocket(can_bus), SimSendcanSocket(can_bus)
+
+
+def car_ecus(candidate, version_idx=0, vin=SIM_VIN, bus=1, pending_delay=None, **kwargs):
+  """ECUs with the FW versions of candidate in the fingerprints, answering the FW
+  query of its brand, and the engine ECU the VIN query. version_idx picks the
+  version of every ECU, the last one when it has less. With pending_delay the FW
+  version request is answered with response pending first. kwargs go to SimulatedEcu."""
+  brand = next(brand for brand, cars in get_attr_from_cars('FW_VERSIONS', combine_brands=False).items() if candidate in cars)
+  fw_versions = FW_VERSIONS[candidate]
+
+  fw_responses = {}
+  if brand in BRAND_FW_REQUEST:
+    request, response = next((request, response) for b, request, response in REQUESTS
+                             if b == brand and request[-1] == BRAND_FW_REQUEST[brand])
+    fw_responses = dict(zip(request, response))
+
+  ecus = {}
+  for (_, addr, sub_addr), versions in fw_versions.items():
+    responses = dict(fw_responses)
+    if len(responses) and len(versions):
+      responses[request[-1]] = response[-1] + versions[min(version_idx, len(versions) - 1)]
+    ecus[(addr, sub_addr)] = responses
+
+  ecus.setdefault((0x7E0, None), {})[VIN_REQUEST] = VIN_RESPONSE + vin.encode()
+  if pending_delay is not None and brand in BRAND_FW_REQUEST:
+    kwargs['pending_delays'] = {BRAND_FW_REQUEST[brand]: pending_delay}
+  return [SimulatedEcu(addr, responses, sub_addr=sub_addr, bus=bus, **kwargs) for (addr, sub_addr), responses in ecus.items()]
+
+
+def car_can_bus(candidate, **kwargs):
+  """VirtualCanBus with the ECUs of candidate, see car_ecus"""
+  return VirtualCanBus(car_ecus(candidate, **kwargs))
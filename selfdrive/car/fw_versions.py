@@ -8,7 +8,7 @@ from tqdm import tqdm
 import panda.python.uds as uds
 from cereal import car
 from selfdrive.car.fingerprints import FW_VERSIONS, get_attr_from_cars
-from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
+from selfdrive.car.isotp_parallel_query import IsoTpPipelinedQuery
 from selfdrive.car.toyota.values import CAR as TOYOTA
 from selfdrive.swaglog import cloudlog
 
@@ -103,27 +103,36 @@ REQUESTS = [
 ]
 
 
-def chunks(l, n=128):
-  for i in range(0, len(l), n):
-    yield l[i:i + n]
+ESSENTIAL_ECUS = [Ecu.engine, Ecu.eps, Ecu.esp, Ecu.fwdRadar, Ecu.fwdCamera, Ecu.vsa, Ecu.electricBrakeBooster]
 
+# number of cached ECUs that are queried again to check the cached FW versions
+SPOT_CHECK_ECUS = 2
 
-def match_fw_to_car(fw_versions):
-  candidates = FW_VERSIONS
-  invalid = []
 
+def match_fw_to_car(fw_versions):
   fw_versions_dict = {}
   for fw in fw_versions:
     addr = fw.address
     sub_addr = fw.subAddress if fw.subAddress != 0 else None
     fw_versions_dict[(addr, sub_addr)] = fw.fwVersion
 
+  return match_fw_versions(fw_versions_dict)
+
+
+def match_fw_versions(fw_versions_dict, pending=()):
+  """Candidates matching the FW versions by (addr, sub_addr), the ECUs in
+  pending are still being queried and are taken to match any candidate"""
+  candidates = FW_VERSIONS
+  invalid = []
+
   for candidate, fws in candidates.items():
     for ecu, expected_versions in fws.items():
       ecu_type = ecu[0]
       addr = ecu[1:]
+      if addr in pending:
+        continue
+
       found_version = fw_versions_dict.get(addr, None)
-      ESSENTIAL_ECUS = [Ecu.engine, Ecu.eps, Ecu.esp, Ecu.fwdRadar, Ecu.fwdCamera, Ecu.vsa, Ecu.electricBrakeBooster]
       if ecu_type == Ecu.esp and candidate in [TOYOTA.RAV4, TOYOTA.COROLLA, TOYOTA.HIGHLANDER] and found_version is None:
         continue
 
@@ -142,13 +151,18 @@ def match_fw_to_car(fw_versions):
   return set(candidates.keys()) - set(invalid)
 
 
-def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False):
-  ecu_types = {}
+def unique_match(fw_versions_dict, pending):
+  """True when the ECUs that are done match exactly one candidate,
+  whatever the pending ECUs return"""
+  done = {addr: version for addr, version in fw_versions_dict.items() if addr not in pending}
+  candidates = match_fw_versions(done)
+  return len(candidates) == 1 and match_fw_versions(done, pending) == candidates
 
-  # Extract ECU adresses to query from fingerprints
-  # ECUs using a subadress need be queried one by one, the rest can be done in parallel
-  addrs = []
-  parallel_addrs = []
+
+def get_fw_queries(extra=None, timeout=0.1):
+  """ECU types and queries for IsoTpPipelinedQuery of all ECUs in the fingerprints"""
+  ecu_types = {}
+  ecu_brands = {}
 
   versions = get_attr_from_cars('FW_VERSIONS', combine_brands=False)
   if extra is not None:
@@ -157,32 +171,35 @@ def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False,
   for brand, brand_versions in versions.items():
     for c in brand_versions.values():
       for ecu_type, addr, sub_addr in c.keys():
-        a = (brand, addr, sub_addr)
-        if a not in ecu_types:
-          ecu_types[(addr, sub_addr)] = ecu_type
+        ecu_types[(addr, sub_addr)] = ecu_type
+        ecu_brands.setdefault((addr, sub_addr), set()).add(brand)
+
+  # ECUs using a subaddress can only be queried one by one, start with the rest
+  queries = {}
+  for addr in sorted(ecu_brands, key=lambda a: a[1] is not None):
+    t = timeout if addr[1] is not None else 2 * timeout
+    queries[addr] = [(request, response, t) for brand, request, response in REQUESTS
+                     if brand in ecu_brands[addr] or 'any' in ecu_brands[addr]]
+
+  return ecu_types, queries
+
+
+def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False, early_stop=False):
+  ecu_types, queries = get_fw_queries(extra, timeout)
 
-        if sub_addr is None:
-          if a not in parallel_addrs:
-            parallel_addrs.append(a)
-        else:
-          if [a] not in addrs:
-            addrs.append([a])
+  pbar = tqdm(total=len(queries), disable=not progress)
 
-  addrs.insert(0, parallel_addrs)
+  def update(results, pending):
+    pbar.update(len(queries) - len(pending) - pbar.n)
+    return early_stop and unique_match(results, pending)
 
   fw_versions = {}
-  for i, addr in enumerate(tqdm(addrs, disable=not progress)):
-    for addr_chunk in chunks(addr):
-      for brand, request, response in REQUESTS:
-        try:
-          addrs = [(a, s) for (b, a, s) in addr_chunk if b in (brand, 'any')]
-
-          if addrs:
-            query = IsoTpParallelQuery(sendcan, logcan, bus, addrs, request, response, debug=debug)
-            t = 2 * timeout if i == 0 else timeout
-            fw_versions.update(query.get_data(t))
-        except Exception:
-          cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+  try:
+    query = IsoTpPipelinedQuery(sendcan, logcan, bus, queries, debug=debug)
+    fw_versions = query.get_data(update)
+  except Exception:
+    cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+  pbar.close()
 
   # Build capnp list to put into CarParams
   car_fw = []
@@ -201,6 +218,29 @@ def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False,
   return car_fw
 
 
+def verify_fw_versions(logcan, sendcan, bus, car_fw, timeout=0.1, debug=False):
+  """Queries a few ECUs of cached FW versions again, True if they all still match"""
+  cached = {(fw.address, fw.subAddress if fw.subAddress != 0 else None): fw.fwVersion for fw in car_fw}
+  essential = {(fw.address, fw.subAddress if fw.subAddress != 0 else None) for fw in car_fw if fw.ecu in ESSENTIAL_ECUS}
+
+  _, queries = get_fw_queries(timeout=timeout)
+  # prefer essential ECUs without a subaddress, which can be queried in parallel
+  spot_check = sorted((addr for addr in cached if addr in queries), key=lambda a: (a[1] is not None, a not in essential))
+  queries = {addr: queries[addr] for addr in spot_check[:SPOT_CHECK_ECUS]}
+  if not queries:
+    return False
+
+  def matches(results, pending=()):
+    return all(results.get(addr) == cached[addr] for addr in queries)
+
+  try:
+    query = IsoTpPipelinedQuery(sendcan, logcan, bus, queries, debug=debug)
+    return matches(query.get_data(matches))
+  except Exception:
+    cloudlog.warning(f"FW spot check exception: {traceback.format_exc()}")
+    return False
+
+
 if __name__ == "__main__":
   import time
   import argparse
@@ -12,6 +12,23 @@ from selfdrive.car.honda.values import HONDA_BOSCH
 # 1 = ACC-CAN - camera side
 # 2 = ACC-CAN - radar side
 
+# Signal order of the message templates, values are packed positionally
+BRAKE_COMMAND = ("COMPUTER_BRAKE", "BRAKE_PUMP_REQUEST", "CRUISE_OVERRIDE", "CRUISE_FAULT_CMD", "CRUISE_CANCEL_CMD",
+                 "COMPUTER_BRAKE_REQUEST", "SET_ME_1", "BRAKE_LIGHTS", "CHIME", "FCW", "AEB_REQ_1", "AEB_REQ_2",
+                 "AEB_STATUS")
+ACC_CONTROL = ("CONTROL_ON", "GAS_COMMAND", "ACCEL_COMMAND", "BRAKE_LIGHTS", "BRAKE_REQUEST", "STANDSTILL",
+               "STANDSTILL_RELEASE")
+ACC_CONTROL_ON = ("SET_TO_3", "CONTROL_ON", "SET_TO_FF", "SET_TO_75", "SET_TO_30")
+STEERING_CONTROL = ("STEER_TORQUE", "STEER_TORQUE_REQUEST")
+BOSCH_SUPPLEMENTAL_1 = ("SET_ME_X04", "SET_ME_X80", "SET_ME_X10")
+ACC_HUD_BOSCH = ("CRUISE_SPEED", "ENABLE_MINI_CAR", "SET_TO_1", "HUD_LEAD", "HUD_DISTANCE", "ACC_ON", "SET_TO_X1",
+                 "IMPERIAL_UNIT")
+ACC_HUD = ("PCM_SPEED", "PCM_GAS", "CRUISE_SPEED", "ENABLE_MINI_CAR", "HUD_LEAD", "HUD_DISTANCE", "IMPERIAL_UNIT",
+           "SET_ME_X01_2", "SET_ME_X01", "FCM_OFF", "FCM_OFF_2", "FCM_PROBLEM", "ICONS")
+LKAS_HUD = ("SET_ME_X41", "SET_ME_X48", "STEERING_REQUIRED", "SOLID_LANES", "BEEP")
+RADAR_HUD = ("SET_TO_1",)
+SCM_BUTTONS = ("CRUISE_BUTTONS", "CRUISE_SETTING")
+
 def get_pt_bus(car_fingerprint, has_relay):
   return 1 if car_fingerprint in HONDA_BOSCH and has_relay else 0
 
@@ -30,27 +47,26 @@ def create_brake_command(packer, apply_brake, pump_on, pcm_override, pcm_cancel_
   brake_rq = apply_brake > 0
   pcm_fault_cmd = False
 
-  values = {
-    "COMPUTER_BRAKE": apply_brake,
-    "BRAKE_PUMP_REQUEST": pump_on,
-    "CRUISE_OVERRIDE": pcm_override,
-    "CRUISE_FAULT_CMD": pcm_fault_cmd,
-    "CRUISE_CANCEL_CMD": pcm_cancel_cmd,
-    "COMPUTER_BRAKE_REQUEST": brake_rq,
-    "SET_ME_1": 1,
-    "BRAKE_LIGHTS": brakelights,
-    "CHIME": stock_brake["CHIME"] if fcw else 0,  # send the chime for stock fcw
-    "FCW": fcw << 1,  # TODO: Why are there two bits for fcw?
-    "AEB_REQ_1": 0,
-    "AEB_REQ_2": 0,
-    "AEB_STATUS": 0,
-  }
+  values = (
+    apply_brake,
+    pump_on,
+    pcm_override,
+    pcm_fault_cmd,
+    pcm_cancel_cmd,
+    brake_rq,
+    1,  # SET_ME_1
+    brakelights,
+    stock_brake["CHIME"] if fcw else 0,  # send the chime for stock fcw
+    fcw << 1,  # TODO: Why are there two bits for fcw?
+    0,  # AEB_REQ_1
+    0,  # AEB_REQ_2
+    0,  # AEB_STATUS
+  )
   bus = get_pt_bus(car_fingerprint, has_relay)
-  return packer.make_can_msg("BRAKE_COMMAND", bus, values, idx)
+  return packer.template("BRAKE_COMMAND", BRAKE_COMMAND).make_can_msg(bus, values, idx)
 
 
 def create_acc_commands(packer, enabled, accel, gas, idx, stopping, starting, car_fingerprint, has_relay):
-  commands = []
   bus = get_pt_bus(car_fingerprint, has_relay)
 
   control_on = 5 if enabled else 0
@@ -61,107 +77,84 @@ def create_acc_commands(packer, enabled, accel, gas, idx, stopping, starting, ca
   standstill = 1 if enabled and stopping else 0
   standstill_release = 1 if enabled and starting else 0
 
-  acc_control_values = {
+  acc_control_values = (
     # setting CONTROL_ON causes car to set POWERTRAIN_DATA->ACC_STATUS = 1
-    "CONTROL_ON": control_on,
-    "GAS_COMMAND": gas_command, # used for gas
-    "ACCEL_COMMAND": accel_command, # used for brakes
-    "BRAKE_LIGHTS": braking,
-    "BRAKE_REQUEST": braking,
-    "STANDSTILL": standstill,
-    "STANDSTILL_RELEASE": standstill_release,
-  }
-  commands.append(packer.make_can_msg("ACC_CONTROL", bus, acc_control_values, idx))
-
-  acc_control_on_values = {
-    "SET_TO_3": 0x03,
-    "CONTROL_ON": enabled,
-    "SET_TO_FF": 0xff,
-    "SET_TO_75": 0x75,
-    "SET_TO_30": 0x30,
-  }
-  commands.append(packer.make_can_msg("ACC_CONTROL_ON", bus, acc_control_on_values, idx))
-
-  return commands
+    control_on,
+    gas_command, # used for gas
+    accel_command, # used for brakes
+    braking,
+    braking,
+    standstill,
+    standstill_release,
+  )
+  acc_control_on_values = (0x03, enabled, 0xff, 0x75, 0x30)
+
+  return packer.make_can_msgs([
+    (packer.template("ACC_CONTROL", ACC_CONTROL), bus, acc_control_values, idx),
+    (packer.template("ACC_CONTROL_ON", ACC_CONTROL_ON), bus, acc_control_on_values, idx),
+  ])
 
 def create_steering_control(packer, apply_steer, lkas_active, car_fingerprint, idx, has_relay, radar_disabled):
-  values = {
-    "STEER_TORQUE": apply_steer if lkas_active else 0,
-    "STEER_TORQUE_REQUEST": lkas_active,
-  }
+  values = (apply_steer if lkas_active else 0, lkas_active)
   bus = get_lkas_cmd_bus(car_fingerprint, has_relay, radar_disabled)
-  return packer.make_can_msg("STEERING_CONTROL", bus, values, idx)
+  return packer.template("STEERING_CONTROL", STEERING_CONTROL).make_can_msg(bus, values, idx)
 
 
 def create_bosch_supplemental_1(packer, car_fingerprint, idx, has_relay):
   # non-active params
-  values = {
-    "SET_ME_X04": 0x04,
-    "SET_ME_X80": 0x80,
-    "SET_ME_X10": 0x10,
-  }
+  values = (0x04, 0x80, 0x10)
   bus = get_lkas_cmd_bus(car_fingerprint, has_relay)
-  return packer.make_can_msg("BOSCH_SUPPLEMENTAL_1", bus, values, idx)
+  return packer.template("BOSCH_SUPPLEMENTAL_1", BOSCH_SUPPLEMENTAL_1).make_can_msg(bus, values, idx)
 
 
 def create_ui_commands(packer, pcm_speed, hud, car_fingerprint, is_metric, idx, has_relay, openpilot_longitudinal_control, stock_hud):
-  commands = []
+  commands = []  # (template, bus, values, counter)
   bus_pt = get_pt_bus(car_fingerprint, has_relay)
   radar_disabled = car_fingerprint in HONDA_BOSCH and openpilot_longitudinal_control
   bus_lkas = get_lkas_cmd_bus(car_fingerprint, has_relay, radar_disabled)
 
   if openpilot_longitudinal_control:
     if car_fingerprint in HONDA_BOSCH:
-      acc_hud_values = {
-        'CRUISE_SPEED': hud.v_cruise,
-        'ENABLE_MINI_CAR': 1,
-        'SET_TO_1': 1,
-        'HUD_LEAD': hud.car,
-        'HUD_DISTANCE': 3,
-        'ACC_ON': hud.car != 0,
-        'SET_TO_X1': 1,
-        'IMPERIAL_UNIT': int(not is_metric),
-      }
+      acc_hud = packer.template("ACC_HUD", ACC_HUD_BOSCH)
+      acc_hud_values = (
+        hud.v_cruise,
+        1,  # ENABLE_MINI_CAR
+        1,  # SET_TO_1
+        hud.car,
+        3,  # HUD_DISTANCE
+        hud.car != 0,
+        1,  # SET_TO_X1
+        int(not is_metric),
+      )
     else:
-      acc_hud_values = {
-        'PCM_SPEED': pcm_speed * CV.MS_TO_KPH,
-        'PCM_GAS': hud.pcm_accel,
-        'CRUISE_SPEED': hud.v_cruise,
-        'ENABLE_MINI_CAR': 1,
-        'HUD_LEAD': hud.car,
-        'HUD_DISTANCE': 3,    # max distance setting on display
-        'IMPERIAL_UNIT': int(not is_metric),
-        'SET_ME_X01_2': 1,
-        'SET_ME_X01': 1,
-        "FCM_OFF": stock_hud["FCM_OFF"],
-        "FCM_OFF_2": stock_hud["FCM_OFF_2"],
-        "FCM_PROBLEM": stock_hud["FCM_PROBLEM"],
-        "ICONS": stock_hud["ICONS"],
-      }
-    commands.append(packer.make_can_msg("ACC_HUD", bus_pt, acc_hud_values, idx))
-
-  lkas_hud_values = {
-    'SET_ME_X41': 0x41,
-    'SET_ME_X48': 0x48,
-    'STEERING_REQUIRED': hud.steer_required,
-    'SOLID_LANES': hud.lanes,
-    'BEEP': 0,
-  }
-  commands.append(packer.make_can_msg('LKAS_HUD', bus_lkas, lkas_hud_values, idx))
+      acc_hud = packer.template("ACC_HUD", ACC_HUD)
+      acc_hud_values = (
+        pcm_speed * CV.MS_TO_KPH,
+        hud.pcm_accel,
+        hud.v_cruise,
+        1,  # ENABLE_MINI_CAR
+        hud.car,
+        3,    # max distance setting on display
+        int(not is_metric),
+        1,  # SET_ME_X01_2
+        1,  # SET_ME_X01
+        stock_hud["FCM_OFF"],
+        stock_hud["FCM_OFF_2"],
+        stock_hud["FCM_PROBLEM"],
+        stock_hud["ICONS"],
+      )
+    commands.append((acc_hud, bus_pt, acc_hud_values, idx))
+
+  lkas_hud_values = (0x41, 0x48, hud.steer_required, hud.lanes, 0)
+  commands.append((packer.template('LKAS_HUD', LKAS_HUD), bus_lkas, lkas_hud_values, idx))
 
   if radar_disabled and car_fingerprint in HONDA_BOSCH:
-    radar_hud_values = {
-      'SET_TO_1' : 0x01,
-    }
-    commands.append(packer.make_can_msg('RADAR_HUD', bus_pt, radar_hud_values, idx))
+    commands.append((packer.template('RADAR_HUD', RADAR_HUD), bus_pt, (0x01,), idx))
 
-  return commands
+  return packer.make_can_msgs(commands)
 
 
 def spam_buttons_command(packer, button_val, idx, car_fingerprint, has_relay):
-  values = {
-    'CRUISE_BUTTONS': button_val,
-    'CRUISE_SETTING': 0,
-  }
+  values = (button_val, 0)
   bus = get_pt_bus(car_fingerprint, has_relay)
-  return packer.make_can_msg("SCM_BUTTONS", bus, values, idx)
+  return packer.template("SCM_BUTTONS", SCM_BUTTONS).make_can_msg(bus, values, idx)
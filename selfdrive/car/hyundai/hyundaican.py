@@ -3,6 +3,15 @@ from selfdrive.car.hyundai.values import CAR, CHECKSUM
 
 hyundai_checksum = crcmod.mkCrcFun(0x11D, initCrc=0xFD, rev=False, xorOut=0xdf)
 
+# Signal order of the message templates, values are packed positionally
+LFAHDA_MFC = ("LFA_Icon_State", "HDA_Active", "HDA_Icon_State", "HDA_VSetReq")
+SCC11 = ("MainMode_ACC", "TauGapSet", "VSetDis", "AliveCounterACC")
+SCC12 = ("ACCMode", "StopReq", "aReqRaw", "aReqValue", "CR_VSM_Alive")
+SCC12_CHECKSUM = SCC12 + ("CR_VSM_ChkSum",)
+SCC14 = ("ComfortBandUpper", "ComfortBandLower", "JerkUpperLimit", "JerkLowerLimit", "ACCMode", "ObjGap")
+FCA11 = ("CR_FCA_Alive", "Supplemental_Counter")
+FCA11_CHECKSUM = FCA11 + ("CR_FCA_ChkSum",)
+
 
 def create_lkas11(packer, frame, car_fingerprint, apply_steer, steer_req,
                   lkas11, sys_warning, sys_state, enabled,
@@ -68,59 +77,57 @@ def create_clu11(packer, frame, clu11, button):
 
 
 def create_lfahda_mfc(packer, enabled, hda_set_speed=0):
-  values = {
-    "LFA_Icon_State": 2 if enabled else 0,
-    "HDA_Active": 1 if hda_set_speed else 0,
-    "HDA_Icon_State": 2 if hda_set_speed else 0,
-    "HDA_VSetReq": hda_set_speed,
-  }
-  return packer.make_can_msg("LFAHDA_MFC", 0, values)
+  values = (
+    2 if enabled else 0,
+    1 if hda_set_speed else 0,
+    2 if hda_set_speed else 0,
+    hda_set_speed,
+  )
+  return packer.template("LFAHDA_MFC", LFAHDA_MFC).make_can_msg(0, values)
 
 def create_acc_commands(packer, enabled, accel, idx, lead_visible, set_speed, stopping):
-  commands = []
-
-  scc11_values = {
-    "MainMode_ACC": 1,
-    "TauGapSet": 4,
-    "VSetDis": set_speed if enabled else 0,
-    "AliveCounterACC": idx % 0x10,
-  }
-  commands.append(packer.make_can_msg("SCC11", 0, scc11_values))
-
-  scc12_values = {
-    "ACCMode": 1 if enabled else 0,
-    "StopReq": 1 if stopping else 0,
-    "aReqRaw": accel,
-    "aReqValue": accel, # stock ramps up at 1.0/s and down at 0.5/s until it reaches aReqRaw
-    "CR_VSM_Alive": idx % 0xF,
-  }
-  scc12_dat = packer.make_can_msg("SCC12", 0, scc12_values)[2]
-  scc12_values["CR_VSM_ChkSum"] = 0x10 - sum([sum(divmod(i, 16)) for i in scc12_dat]) % 0x10
-
-  commands.append(packer.make_can_msg("SCC12", 0, scc12_values))
-
-  scc14_values = {
-    "ComfortBandUpper": 0.0, # stock usually is 0 but sometimes uses higher values
-    "ComfortBandLower": 0.0, # stock usually is 0 but sometimes uses higher values
-    "JerkUpperLimit": 1.0 if enabled else 0, # stock usually is 1.0 but sometimes uses higher values
-    "JerkLowerLimit": 0.5 if enabled else 0, # stock usually is 0.5 but sometimes uses higher values
-    "ACCMode": 1 if enabled else 4, # stock will always be 4 instead of 0 after first disengage
-    "ObjGap": 3 if lead_visible else 0, # TODO: 1-5 based on distance to lead vehicle
-  }
-  commands.append(packer.make_can_msg("SCC14", 0, scc14_values))
-
-  fca11_values = {
+  scc11_values = (
+    1,  # MainMode_ACC
+    4,  # TauGapSet
+    set_speed if enabled else 0,
+    idx % 0x10,
+  )
+
+  scc12_values = (
+    1 if enabled else 0,
+    1 if stopping else 0,
+    accel,
+    accel, # stock ramps up at 1.0/s and down at 0.5/s until it reaches aReqRaw
+    idx % 0xF,
+  )
+  scc12_dat = packer.template("SCC12", SCC12).make_can_msg(0, scc12_values)[2]
+  scc12_values += (0x10 - sum([sum(divmod(i, 16)) for i in scc12_dat]) % 0x10,)
+
+  scc14_values = (
+    0.0, # ComfortBandUpper, stock usually is 0 but sometimes uses higher values
+    0.0, # ComfortBandLower, stock usually is 0 but sometimes uses higher values
+    1.0 if enabled else 0, # JerkUpperLimit, stock usually is 1.0 but sometimes uses higher values
+    0.5 if enabled else 0, # JerkLowerLimit, stock usually is 0.5 but sometimes uses higher values
+    1 if enabled else 4, # ACCMode, stock will always be 4 instead of 0 after first disengage
+    3 if lead_visible else 0, # ObjGap, TODO: 1-5 based on distance to lead vehicle
+  )
+
+  fca11_values = (
     # seems to count 2,1,0,3,2,1,0,3,2,1,0,3,2,1,0,repeat...
     # (where first value is aligned to Supplemental_Counter == 0)
     # test: [(idx % 0xF, -((idx % 0xF) + 2) % 4) for idx in range(0x14)]
-    "CR_FCA_Alive": ((-((idx % 0xF) + 2) % 4) << 2) + 1,
-    "Supplemental_Counter": idx % 0xF,
-  }
-  fca11_dat = packer.make_can_msg("FCA11", 0, fca11_values)[2]
-  fca11_values["CR_FCA_ChkSum"] = 0x10 - sum([sum(divmod(i, 16)) for i in fca11_dat]) % 0x10
-  commands.append(packer.make_can_msg("FCA11", 0, fca11_values))
-
-  return commands
+    ((-((idx % 0xF) + 2) % 4) << 2) + 1,
+    idx % 0xF,
+  )
+  fca11_dat = packer.template("FCA11", FCA11).make_can_msg(0, fca11_values)[2]
+  fca11_values += (0x10 - sum([sum(divmod(i, 16)) for i in fca11_dat]) % 0x10,)
+
+  return packer.make_can_msgs([
+    (packer.template("SCC11", SCC11), 0, scc11_values, -1),
+    (packer.template("SCC12", SCC12_CHECKSUM), 0, scc12_values, -1),
+    (packer.template("SCC14", SCC14), 0, scc14_values, -1),
+    (packer.template("FCA11", FCA11_CHECKSUM), 0, fca11_values, -1),
+  ])
 
 def create_acc_opt(packer):
   commands = []
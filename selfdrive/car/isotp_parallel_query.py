@@ -1,5 +1,6 @@
 import time
-from collections import defaultdict
+import traceback
+from collections import defaultdict, deque
 from functools import partial
 
 import cereal.messaging as messaging
@@ -70,6 +71,18 @@ class IsoTpParallelQuery():
     messaging.drain_sock(self.logcan)
     self.msg_buffer = defaultdict(list)
 
+  def _create_isotp_msg(self, tx_addr, rx_addr):
+    # rx_addr not set when using functional tx addr
+    id_addr = rx_addr or tx_addr[0]
+    sub_addr = tx_addr[1]
+
+    can_client = CanClient(self._can_tx, partial(self._can_rx, id_addr, sub_addr=sub_addr), tx_addr[0], rx_addr,
+                           self.bus, sub_addr=sub_addr, debug=self.debug)
+
+    max_len = 8 if sub_addr is None else 7
+
+    return IsoTpMessage(can_client, timeout=0, max_len=max_len, debug=self.debug)
+
   def get_data(self, timeout):
     self._drain_rx()
 
@@ -78,16 +91,7 @@ class IsoTpParallelQuery():
     request_counter = {}
     request_done = {}
     for tx_addr, rx_addr in self.msg_addrs.items():
-      # rx_addr not set when using functional tx addr
-      id_addr = rx_addr or tx_addr[0]
-      sub_addr = tx_addr[1]
-
-      can_client = CanClient(self._can_tx, partial(self._can_rx, id_addr, sub_addr=sub_addr), tx_addr[0], rx_addr,
-                             self.bus, sub_addr=sub_addr, debug=self.debug)
-
-      max_len = 8 if sub_addr is None else 7
-
-      msg = IsoTpMessage(can_client, timeout=0, max_len=max_len, debug=self.debug)
+      msg = self._create_isotp_msg(tx_addr, rx_addr)
       msg.send(self.request[0])
 
       msgs[tx_addr] = msg
@@ -127,3 +131,91 @@ class IsoTpParallelQuery():
         break
 
     return results
+
+
+class IsoTpPipelinedQuery(IsoTpParallelQuery):
+  """Runs a sequence of queries per address, all addresses at the same time.
+
+  queries maps (addr, sub_addr) to a list of (request, response, timeout), which
+  are sent in order. The result of an address is the data of the last query that
+  got a valid response. As soon as a query is done the next one for that address
+  is sent, but only one query is outstanding per tx address, so ECUs behind the
+  same address using sub addressing still take turns, and at most max_in_flight
+  queries are outstanding on the bus.
+  """
+  def __init__(self, sendcan, logcan, bus, queries, max_in_flight=128, debug=False):
+    super().__init__(sendcan, logcan, bus, list(queries.keys()), None, None, debug=debug)
+    self.queries = queries
+    self.max_in_flight = max_in_flight
+
+  def get_data(self, callback=None):
+    """Returns the results when all queries are done. callback(results, pending) is
+    called every time a query finishes, with the addresses that still have queries
+    left in pending, and stops all queries when it returns True."""
+    self._drain_rx()
+
+    queued = {addr: deque(queries) for addr, queries in self.queries.items() if len(queries)}
+    pending = set(queued)
+    in_flight = {}
+    busy = set()
+
+    results = {}
+    while True:
+      # start the next query for all addresses that are free
+      for addr in list(queued):
+        if len(in_flight) >= self.max_in_flight:
+          break
+        if addr[0] in busy:
+          continue
+
+        request, response, timeout = queued[addr].popleft()
+        if not queued[addr]:
+          del queued[addr]
+
+        # frames left over from the previous query of the address would be taken for this one's reply
+        self._can_rx(self.msg_addrs[addr], addr[1])
+        msg = self._create_isotp_msg(addr, self.msg_addrs[addr])
+        msg.send(request[0])
+        in_flight[addr] = [msg, request, response, 0, time.monotonic() + timeout]
+        busy.add(addr[0])
+
+      if not in_flight:
+        break
+
+      self.rx()
+
+      done = []
+      for addr, query in in_flight.items():
+        msg, request, response, counter, deadline = query
+        try:
+          dat = msg.recv()
+        except Exception:
+          cloudlog.warning(f"iso-tp query exception: {traceback.format_exc()}")
+          done.append(addr)
+          continue
+
+        if dat:
+          expected_response = response[counter]
+          if dat[:len(expected_response)] != expected_response:
+            cloudlog.warning(f"iso-tp query bad response: 0x{bytes.hex(dat)}")
+            done.append(addr)
+          elif counter + 1 < len(request):
+            msg.send(request[counter + 1])
+            query[3] += 1
+          else:
+            results[addr] = dat[len(expected_response):]
+            done.append(addr)
+        elif time.monotonic() > deadline:
+          done.append(addr)
+
+      if done:
+        for addr in done:
+          del in_flight[addr]
+          busy.discard(addr[0])
+          if addr not in queued:
+            pending.discard(addr)
+
+        if callback is not None and callback(results, pending):
+          break
+
+    return results
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import unittest
+
+from panda.python.uds import CanClient, DATA_IDENTIFIER_TYPE, IsoTpMessage, NegativeResponseError, UdsClient
+from panda.python.uds_sim import SimulatedEcu, VirtualCanBus
+from selfdrive.car.ecu_sim import SIM_VIN, car_can_bus, sim_sockets
+from selfdrive.car.hyundai.values import CAR as HYUNDAI
+from selfdrive.car.vin import get_vin
+
+VIN_REQUEST = b'\x22\xf1\x90'
+VIN_RESPONSE = b'\x62\xf1\x90' + SIM_VIN.encode()
+
+
+class TestEcuSim(unittest.TestCase):
+  def test_uds_client(self):
+    long_request = b'\x2e\xf1\x90' + SIM_VIN.encode()
+    ecu = SimulatedEcu(0x7e0, {VIN_REQUEST: VIN_RESPONSE, long_request: b'\x6e\xf1\x90'},
+                       pending_delays={VIN_REQUEST: 0.05}, nrc=0x31)
+    uds_client = UdsClient(VirtualCanBus([ecu]), 0x7e0, timeout=0.5)
+
+    # multi frame response after response pending
+    self.assertEqual(uds_client.read_data_by_identifier(DATA_IDENTIFIER_TYPE.VIN), SIM_VIN.encode())
+    # multi frame request
+    uds_client.write_data_by_identifier(DATA_IDENTIFIER_TYPE.VIN, SIM_VIN.encode())
+    self.assertEqual(ecu.requests, 2)
+    with self.assertRaises(NegativeResponseError):
+      uds_client.read_data_by_identifier(DATA_IDENTIFIER_TYPE.ECU_SERIAL_NUMBER)
+
+  def test_sub_addr(self):
+    ecus = [SimulatedEcu(0x750, {VIN_REQUEST: VIN_RESPONSE[:4] + bytes([sub_addr])}, sub_addr=sub_addr) for sub_addr in (0xf, 0x6d)]
+    can_bus = VirtualCanBus(ecus)
+    for sub_addr in (0xf, 0x6d):
+      can_client = CanClient(can_bus.can_send, can_bus.can_recv, 0x750, 0x758, 0, sub_addr=sub_addr)
+      msg = IsoTpMessage(can_client, timeout=0.5, max_len=7)
+      msg.send(VIN_REQUEST)
+      self.assertEqual(msg.recv(), VIN_RESPONSE[:4] + bytes([sub_addr]))
+
+  def test_vin_query(self):
+    logcan, sendcan = sim_sockets(car_can_bus(HYUNDAI.SONATA))
+    self.assertEqual(get_vin(logcan, sendcan, 1)[1], SIM_VIN)
+
+
+if __name__ == "__main__":
+  unittest.main()
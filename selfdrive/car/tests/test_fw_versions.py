@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import time
+import unittest
+
+from cereal import car
+from panda.python.uds_sim import SimulatedEcu, VirtualCanBus
+from selfdrive.car.ecu_sim import car_can_bus, sim_sockets
+from selfdrive.car.fingerprints import FW_VERSIONS
+from selfdrive.car.fw_versions import get_fw_versions, match_fw_to_car, verify_fw_versions
+from selfdrive.car.isotp_parallel_query import IsoTpPipelinedQuery
+from selfdrive.car.toyota.values import CAR as TOYOTA
+
+BUS = 1
+
+
+class TestFwVersions(unittest.TestCase):
+  def test_fw_query(self):
+    candidate = TOYOTA.RAV4H_TSS2
+    expected = {(addr, sub_addr): versions[0] for (_, addr, sub_addr), versions in FW_VERSIONS[candidate].items()}
+
+    for early_stop in (False, True):
+      logcan, sendcan = sim_sockets(car_can_bus(candidate))
+      t = time.monotonic()
+      car_fw = get_fw_versions(logcan, sendcan, BUS, early_stop=early_stop)
+      dt = time.monotonic() - t
+
+      self.assertEqual(match_fw_to_car(car_fw), {candidate})
+      self.assertEqual({(fw.address, fw.subAddress or None): fw.fwVersion for fw in car_fw}, expected)
+      # ECUs time out on every request they don't answer, that took 2 s when sent one request at a time
+      if early_stop:
+        self.assertLess(dt, 1.)
+
+  def test_spot_check(self):
+    candidate = TOYOTA.RAV4H_TSS2
+    car_fw = get_fw_versions(*sim_sockets(car_can_bus(candidate)), BUS, early_stop=True)
+
+    can_bus = car_can_bus(candidate)
+    self.assertTrue(verify_fw_versions(*sim_sockets(can_bus), BUS, car_fw))
+    # only a few ECUs are queried again
+    self.assertLess(sum(ecu.requests for ecu in can_bus.ecus), 10)
+
+    self.assertFalse(verify_fw_versions(*sim_sockets(car_can_bus(candidate, version_idx=1)), BUS, car_fw))
+    self.assertFalse(verify_fw_versions(*sim_sockets(car_can_bus(candidate)), BUS, [car.CarParams.CarFw.new_message(address=0x123)]))
+
+  def test_stale_reply(self):
+    # the first request is answered with response pending and the response at once, which is still
+    # buffered when the query is dropped and the next one to the ECU starts
+    requests = [b'\x22\xf1\x90', b'\x22\xf1\x81']
+    ecu = SimulatedEcu(0x7e0, {r: b'\x62' + r[1:] + bytes([i]) for i, r in enumerate(requests)}, bus=BUS,
+                       pending_delays={requests[0]: 0.})
+    logcan, sendcan = sim_sockets(VirtualCanBus([ecu]))
+    queries = {(0x7e0, None): [([r], [b'\x62' + r[1:]], 0.1) for r in requests]}
+    results = IsoTpPipelinedQuery(sendcan, logcan, BUS, queries).get_data()
+    self.assertEqual(results, {(0x7e0, None): b'\x01'})
+
+
+if __name__ == "__main__":
+  unittest.main()
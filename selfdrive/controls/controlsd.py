@@ -6,7 +6,7 @@ import threading
 from cereal import car, log
 from common.numpy_fast import clip
 from common.realtime import sec_since_boot, config_realtime_process, Priority, Ratekeeper, DT_CTRL
-from common.profiler import Profiler
+from common.profiler import LoopProfiler
 from common.params import Params, put_nonblocking
 import cereal.messaging as messaging
 from selfdrive.config import Conversions as CV
@@ -148,6 +148,9 @@ class Controls:
     self.distance_traveled = 0
     self.last_functional_fan_frame = 0
     self.events_prev = []
+    self.car_events_msg = messaging.new_message('carEvents', 0)
+    self.car_params_msg = messaging.new_message('carParams')
+    self.car_params_msg.carParams = self.CP
     self.current_alert_types = [ET.PERMANENT]
     self.logged_comm_issue = False
 
@@ -168,7 +171,7 @@ class Controls:
 
     # controlsd is driven by can recv, expected at 100Hz
     self.rk = Ratekeeper(100, print_delay_threshold=None)
-    self.prof = Profiler(False)  # off by default
+    self.prof = LoopProfiler('controlsd', budget=DT_CTRL)  # off unless LOOP_PROFILE is set
 
     self.lead_rel_speed = 255
     self.lead_long_dist = 255
@@ -342,6 +345,7 @@ class Controls:
 
     # Update carState from CAN
     can_strs = messaging.drain_sock_raw(self.can_sock, wait_for_one=True)
+    self.prof.checkpoint("CAN wait", ignore=True)
     CS = self.CI.update(self.CC, can_strs)
 
     self.sm.update(0)
@@ -498,7 +502,9 @@ class Controls:
   def publish_logs(self, CS, start_time, actuators, v_acc, a_acc, lac_log):
     """Send actuators and hud commands to the car, send controlsstate and MPC logging"""
 
-    CC = car.CarControl.new_message()
+    # CarControl is built in place in the message that is sent
+    cc_send = messaging.new_message('carControl')
+    CC = cc_send.carControl
     CC.enabled = self.enabled
     CC.actuators = actuators
 
@@ -611,22 +617,23 @@ class Controls:
     self.pm.send('carState', cs_send)
 
     # carEvents - logged every second or on change
-    if (self.sm.frame % int(1. / DT_CTRL) == 0) or (self.events.names != self.events_prev):
-      ce_send = messaging.new_message('carEvents', len(self.events))
-      ce_send.carEvents = car_events
-      self.pm.send('carEvents', ce_send)
-    self.events_prev = self.events.names.copy()
+    # messages that didn't change are resent with a new timestamp only
+    events_changed = self.events.names != self.events_prev
+    if events_changed:
+      self.car_events_msg = messaging.new_message('carEvents', len(self.events))
+      self.car_events_msg.carEvents = car_events
+      self.events_prev = self.events.names.copy()
+    if events_changed or (self.sm.frame % int(1. / DT_CTRL) == 0):
+      self.car_events_msg.logMonoTime = int(sec_since_boot() * 1e9)
+      self.pm.send('carEvents', self.car_events_msg)
 
     # carParams - logged every 50 seconds (> 1 per segment)
     if (self.sm.frame % int(50. / DT_CTRL) == 0):
-      cp_send = messaging.new_message('carParams')
-      cp_send.carParams = self.CP
-      self.pm.send('carParams', cp_send)
+      self.car_params_msg.logMonoTime = int(sec_since_boot() * 1e9)
+      self.pm.send('carParams', self.car_params_msg)
 
     # carControl
-    cc_send = messaging.new_message('carControl')
     cc_send.valid = CS.canValid
-    cc_send.carControl = CC
     self.pm.send('carControl', cc_send)
 
     # copy CarControl to pass to CarInterface on the next iteration
@@ -634,13 +641,14 @@ class Controls:
 
   def step(self):
     start_time = sec_since_boot()
-    self.prof.checkpoint("Ratekeeper", ignore=True)
+    self.prof.start()
 
     # Sample data from sockets and get a carState
     CS = self.data_sample()
     self.prof.checkpoint("Sample")
 
     self.update_events(CS)
+    self.prof.checkpoint("Events")
 
     if not self.read_only:
       # Update control state
@@ -660,7 +668,7 @@ class Controls:
     while True:
       self.step()
       self.rk.monitor_time()
-      self.prof.display()
+      self.prof.end(self.rk.remaining)
 
 def main(sm=None, pm=None, logcan=None):
   controls = Controls(sm, pm, logcan)
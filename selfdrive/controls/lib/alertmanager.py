@@ -1,7 +1,9 @@
 import os
 import copy
+import heapq
 import json
-from typing import List, Optional
+from collections import Counter
+from typing import List, Optional, Tuple
 from selfdrive.controls.lib.events import EVENTS, ET
 
 from cereal import car, log
@@ -27,10 +29,20 @@ def set_offroad_alert(alert: str, show_alert: bool, extra_text: Optional[str] =
     Params().delete(alert)
 
 
+# heap entries are ordered by priority first, then by start_time, then by insertion
+AlertEntry = Tuple[int, float, int, Alert]
+
+MIN_COMPACT_SIZE = 64
+
+
 class AlertManager:
 
   def __init__(self):
-    self.activealerts: List[Alert] = []
+    # max-heap of active alerts, expired ones are dropped once they reach the top
+    self.activealerts: List[AlertEntry] = []
+    self.event_type_counts: Counter = Counter()
+    self.alert_count = 0
+    self.compact_size = MIN_COMPACT_SIZE
     self.clear_current_alert()
 
   def clear_current_alert(self) -> None:
@@ -43,16 +55,26 @@ class AlertManager:
     self.audible_alert = car.CarControl.HUDControl.AudibleAlert.none
     self.alert_rate: float = 0.
 
+  def push(self, alert: Alert, enabled: bool) -> None:
+    # if new alert is higher priority, log it
+    if not len(self.activealerts) or alert.alert_priority > self.activealerts[0][3].alert_priority:
+      cloudlog.event('alert_add', alert_type=alert.alert_type, enabled=enabled)
+
+    self.alert_count += 1
+    heapq.heappush(self.activealerts, (-alert.alert_priority, -alert.start_time, self.alert_count, alert))
+    self.event_type_counts[alert.event_type] += 1
+
+  def filter(self, keep) -> None:
+    self.activealerts = [e for e in self.activealerts if keep(e[3])]
+    heapq.heapify(self.activealerts)
+    self.event_type_counts = Counter(e[3].event_type for e in self.activealerts)
+    self.compact_size = max(MIN_COMPACT_SIZE, 2 * len(self.activealerts))
+
   def add_many(self, frame: int, alerts: List[Alert], enabled: bool = True) -> None:
     for alert in alerts:
       added_alert = copy.copy(alert)
       added_alert.start_time = frame * DT_CTRL
-
-      # if new alert is higher priority, log it
-      if not len(self.activealerts) or added_alert.alert_priority > self.activealerts[0].alert_priority:
-        cloudlog.event('alert_add', alert_type=added_alert.alert_type, enabled=enabled)
-
-      self.activealerts.append(added_alert)
+      self.push(added_alert, enabled)
 
   def SA_set_frame(self, frame):
     self.SA_frame = frame
@@ -69,27 +91,29 @@ class AlertManager:
     added_alert.alert_type = f"{alert_name}/{ET.PERMANENT}"  # fixes alerts being silent
     added_alert.event_type = ET.PERMANENT
 
-    # if new alert is higher priority, log it
-    if not len(self.activealerts) or added_alert.alert_priority > self.activealerts[0].alert_priority:
-      cloudlog.event('alert_add', alert_type=added_alert.alert_type, enabled=self.SA_enabled)
-
-    self.activealerts.append(added_alert)
+    self.push(added_alert, self.SA_enabled)
 
   def process_alerts(self, frame: int, clear_event_type=None) -> None:
     cur_time = frame * DT_CTRL
 
-    # first get rid of all the expired alerts
-    self.activealerts = [a for a in self.activealerts if a.event_type != clear_event_type and
-                         a.start_time + max(a.duration_sound, a.duration_hud_alert, a.duration_text) > cur_time]
+    def active(a):
+      return a.start_time + max(a.duration_sound, a.duration_hud_alert, a.duration_text) > cur_time
+
+    # cleared alerts are removed right away, expired ones only once they would be shown.
+    # Alerts that expire below the top are dropped when the heap has grown enough
+    if self.event_type_counts[clear_event_type] > 0:
+      self.filter(lambda a: a.event_type != clear_event_type and active(a))
+    elif len(self.activealerts) > self.compact_size:
+      self.filter(active)
 
-    # sort by priority first and then by start_time
-    self.activealerts.sort(key=lambda k: (k.alert_priority, k.start_time), reverse=True)
+    while len(self.activealerts) and not active(self.activealerts[0][3]):
+      self.event_type_counts[heapq.heappop(self.activealerts)[3].event_type] -= 1
 
     # start with assuming no alerts
     self.clear_current_alert()
 
     if len(self.activealerts):
-      current_alert = self.activealerts[0]
+      current_alert = self.activealerts[0][3]
 
       self.alert_type = current_alert.alert_type
 
@@ -4,17 +4,28 @@ import cereal.messaging as messaging
 from common.realtime import sec_since_boot
 from selfdrive.controls.lib.drive_helpers import MPC_COST_LONG
 from common.op_params import opParams
-from common.numpy_fast import interp, clip, mean
+from common.numpy_fast import Interp, interp, clip, mean
 from selfdrive.config import Conversions as CV
-from cereal.messaging import SubMaster
 
 from selfdrive.controls.lib.dynamic_follow.auto_df import predict
 from selfdrive.controls.lib.dynamic_follow.df_manager import dfManager
-from selfdrive.controls.lib.dynamic_follow.support import LeadData, CarData, dfData, dfProfiles
-from common.data_collector import DataCollector
+from selfdrive.controls.lib.dynamic_follow.recorder import DFRecorder
+from selfdrive.controls.lib.dynamic_follow.support import LeadData, CarData, dfData, dfModel, dfProfiles
 travis = False
 
 
+_DISTANCE_COST_BP = [0.9, 1.8, 2.7]  # TR
+#_DISTANCE_COST_V = [1., 0.1, 0.01]     #Original values
+#_DISTANCE_COST_V = [1., 0.5, 0.1]      # Last values
+_DISTANCE_COST_V = [1., 0.75, 0.5]
+_DISTANCE_COST = Interp(_DISTANCE_COST_BP, _DISTANCE_COST_V)
+
+
+def distance_cost(TR):
+  """Distance cost of the longitudinal mpc for a following distance TR"""
+  return _DISTANCE_COST(TR)
+
+
 class DistanceModController:
   def __init__(self, k_i, k_d, x_clip, mods):
     self._rate = 1 / 20.
@@ -23,6 +34,7 @@ class DistanceModController:
     self._k_d = k_d
     self._to_clip = x_clip  # reaches this with v_rel=3.5 mph for 4 seconds
     self._mods = mods
+    self._mod_interp = Interp(x_clip, mods)
 
     self.i = 0  # never resets, even when new lead
     self.last_error = 0
@@ -40,7 +52,7 @@ class DistanceModController:
     self.i = clip(self.i, self._to_clip[0], self._to_clip[-1])  # clip to reasonable range
     self._slow_reset()  # slowly reset from max to 0
 
-    fact = interp(self.i, self._to_clip, self._mods)
+    fact = self._mod_interp(self.i)
     self.last_error = float(error)
 
     # print("I: {}, FACT: {}".format(round(self.i, 4), round(fact, 3)))
@@ -68,11 +80,10 @@ class DynamicFollow:
       self.pm = None
 
     # Model variables
-    mpc_rate = 1 / 20.
-    self.model_scales = {'v_ego': [-0.06112159043550491, 37.96522521972656], 'a_lead': [-3.109330892562866, 3.3612186908721924], 'v_lead': [0.0, 35.27671432495117], 'x_lead': [2.4600000381469727, 141.44000244140625]}
+    self.model_scales = dfModel.scales
     self.predict_rate = 1 / 4.
-    self.skip_every = round(0.25 / mpc_rate)
-    self.model_input_len = round(45 / mpc_rate)
+    self.skip_every = dfModel.skip_every
+    self.model_input_len = dfModel.input_len
 
     # Dynamic follow variables
     self.default_TR = 1.8
@@ -92,11 +103,11 @@ class DynamicFollow:
     self._setup_changing_variables()
 
   def _setup_collector(self):
-    self.sm_collector = SubMaster(['liveTracks', 'laneSpeed'])
     self.log_auto_df = self.op_params.get('log_auto_df')
     if not isinstance(self.log_auto_df, bool):
       self.log_auto_df = False
-    self.data_collector = DataCollector(file_path='/data/df_data', keys=['v_ego', 'a_ego', 'a_lead', 'v_lead', 'x_lead', 'left_lane_speeds', 'middle_lane_speeds', 'right_lane_speeds', 'left_lane_distances', 'middle_lane_distances', 'right_lane_distances', 'profile', 'time'], log_data=self.log_auto_df)
+    # only the first mpc records, see update
+    self.recorder = DFRecorder() if self.log_auto_df and self.mpc_id == 1 and not travis else None
 
   def _setup_changing_variables(self):
     self.TR = self.default_TR
@@ -121,7 +132,7 @@ class DynamicFollow:
     self._update_car(CS)
     self._get_profiles()
 
-    if self.mpc_id == 1 and self.log_auto_df:
+    if self.recorder is not None:
       self._gather_data()
 
     if not self.lead_data.status:
@@ -144,23 +155,8 @@ class DynamicFollow:
       self._get_pred()  # sets self.model_profile, all other checks are inside function
 
   def _gather_data(self):
-    self.sm_collector.update(0)
-    # live_tracks = [[i.dRel, i.vRel, i.aRel, i.yRel] for i in self.sm_collector['liveTracks']]
     if self.car_data.cruise_enabled:
-      self.data_collector.update([self.car_data.v_ego,
-                                  self.car_data.a_ego,
-                                  self.lead_data.a_lead,
-                                  self.lead_data.v_lead,
-                                  self.lead_data.x_lead,
-                                  list(self.sm_collector['laneSpeed'].leftLaneSpeeds),
-                                  list(self.sm_collector['laneSpeed'].middleLaneSpeeds),
-                                  list(self.sm_collector['laneSpeed'].rightLaneSpeeds),
-
-                                  list(self.sm_collector['laneSpeed'].leftLaneDistances),
-                                  list(self.sm_collector['laneSpeed'].middleLaneDistances),
-                                  list(self.sm_collector['laneSpeed'].rightLaneDistances),
-                                  self.user_profile,
-                                  sec_since_boot()])
+      self.recorder.update(sec_since_boot(), self.car_data, self.lead_data, self.user_profile)
 
   def _norm(self, x, name):
     self.x = x
@@ -174,11 +170,7 @@ class DynamicFollow:
       self.pm.send('dynamicFollowData', dat)
 
   def _change_cost(self, libmpc):
-    TRs = [0.9, 1.8, 2.7]
-    #costs = [1., 0.1, 0.01]     #Original values
-    #costs = [1., 0.5, 0.1]      # Last values
-    costs = [1., 0.75, 0.5]
-    cost = interp(self.TR, TRs, costs)
+    cost = distance_cost(self.TR)
 
     # change_time = sec_since_boot() - self.profile_change_time
     # change_time_x = [0, 0.5, 4]  # for three seconds after effective profile has changed
@@ -0,0 +1,177 @@
+"""
+Records the dynamic follow training data in a compact binary format, one file
+per SEGMENT_LENGTH seconds like the route segments of loggerd, and loads it
+back as auto-df model input windows.
+
+A segment file starts with MAGIC, followed by frames of a FRAME header
+  t [s since boot] f8, v_ego, a_ego, a_lead, v_lead, x_lead f4 (nan without a lead),
+  user profile u1, lengths of the LANE_KEYS arrays u1 each
+followed by the lane arrays as f4, in LANE_KEYS order.
+"""
+import os
+import queue
+import struct
+import threading
+import time
+from itertools import groupby
+
+import numpy as np
+
+import cereal.messaging as messaging
+from selfdrive.controls.lib.dynamic_follow.support import dfModel
+from selfdrive.loggerd.config import SEGMENT_LENGTH
+
+DF_DATA_DIR = '/data/df_data'
+MAGIC = b'DFR1'
+EXT = '.dfr'
+LANE_KEYS = ['leftLaneSpeeds', 'middleLaneSpeeds', 'rightLaneSpeeds',
+             'leftLaneDistances', 'middleLaneDistances', 'rightLaneDistances']
+MAX_LANE_LEN = 255
+
+FRAME = struct.Struct('<d5fB%dB' % len(LANE_KEYS))
+FRAME_DTYPE = np.dtype([('t', '<f8'), ('v_ego', '<f4'), ('a_ego', '<f4'), ('a_lead', '<f4'), ('v_lead', '<f4'),
+                        ('x_lead', '<f4'), ('profile', 'u1'), ('lane_lens', 'u1', (len(LANE_KEYS),))])
+assert FRAME_DTYPE.itemsize == FRAME.size
+
+FLUSH_INTERVAL = 5.  # s, frames are handed to the writer thread this often
+MAX_GAP = 3 * dfModel.rate  # s, longer gaps between frames split the model windows
+
+
+class DFRecorder:
+  """Appends a frame per mpc update, the files are written by a background thread"""
+  def __init__(self, data_dir=DF_DATA_DIR, segment_length=SEGMENT_LENGTH):
+    self.data_dir = data_dir
+    self.segment_length = segment_length
+    self.sm = messaging.SubMaster(['laneSpeed'])
+    self.route = time.strftime("%Y-%m-%d--%H-%M-%S")  # named like the routes of loggerd
+
+    self.start_t = None
+    self.segment = None
+    self.last_flush_t = 0.
+    self.buf = bytearray()
+
+    self.write_queue = queue.Queue()
+    self.writer = threading.Thread(target=self._writer_thread, daemon=True)
+    self.writer.start()
+
+  def segment_path(self, segment):
+    return os.path.join(self.data_dir, f"{self.route}--{segment}{EXT}")
+
+  def update(self, t, car_data, lead_data, profile):
+    self.sm.update(0)
+    if self.start_t is None:
+      self.start_t = t
+    segment = int((t - self.start_t) // self.segment_length)
+    if segment != self.segment:
+      self.flush()
+      self.segment = segment
+      self.buf += MAGIC
+
+    if lead_data.status:
+      lead = (lead_data.a_lead, lead_data.v_lead, lead_data.x_lead)
+    else:
+      lead = (np.nan, np.nan, np.nan)
+    lane_speed = self.sm['laneSpeed']
+    lanes = [list(getattr(lane_speed, k))[:MAX_LANE_LEN] for k in LANE_KEYS]
+
+    self.buf += FRAME.pack(t, car_data.v_ego, car_data.a_ego, *lead, profile, *map(len, lanes))
+    for lane in lanes:
+      self.buf += struct.pack('<%df' % len(lane), *lane)
+
+    if t - self.last_flush_t > FLUSH_INTERVAL:
+      self.last_flush_t = t
+      self.flush()
+
+  def flush(self):
+    if len(self.buf):
+      self.write_queue.put((self.segment_path(self.segment), bytes(self.buf)))
+      self.buf.clear()
+
+  def close(self):
+    """Writes out the remaining frames and stops the writer thread"""
+    self.flush()
+    self.write_queue.put(None)
+    self.writer.join()
+
+  def _writer_thread(self):
+    os.makedirs(self.data_dir, exist_ok=True)
+    while (item := self.write_queue.get()) is not None:
+      path, dat = item
+      with open(path, 'ab') as f:
+        f.write(dat)
+
+
+def load_segment(path):
+  """Returns the frames of a segment file as a FRAME_DTYPE array,
+  and for every frame the list of its LANE_KEYS arrays"""
+  with open(path, 'rb') as f:
+    dat = f.read()
+  if not dat.startswith(MAGIC):
+    raise ValueError(f"{path} is not a dynamic follow segment")
+
+  frames, lanes = [], []
+  offset = len(MAGIC)
+  while offset + FRAME.size <= len(dat):
+    frame = np.frombuffer(dat, FRAME_DTYPE, count=1, offset=offset)[0]
+    lane_lens = frame['lane_lens']
+    n = int(lane_lens.sum())
+    if offset + FRAME.size + 4 * n > len(dat):
+      break  # last frame cut off
+    values = np.frombuffer(dat, '<f4', count=n, offset=offset + FRAME.size)
+    offset += FRAME.size + 4 * n
+
+    frames.append(frame)
+    lanes.append(np.split(values, np.cumsum(lane_lens)[:-1]))
+  return np.array(frames, dtype=FRAME_DTYPE), lanes
+
+
+def segment_paths(data_dir=DF_DATA_DIR):
+  """Segment files in data_dir, in route and segment order"""
+  def key(fn):
+    route, segment = fn[:-len(EXT)].rsplit('--', 1)
+    return route, int(segment)
+  return [os.path.join(data_dir, fn) for fn in sorted((fn for fn in os.listdir(data_dir) if fn.endswith(EXT)), key=key)]
+
+
+def _route_name(path):
+  return os.path.basename(path).rsplit('--', 1)[0]
+
+
+def split_runs(frames, max_gap=MAX_GAP):
+  """Splits frames into runs of consecutive frames with a lead"""
+  has_lead = ~np.isnan(frames['x_lead'])
+  dt = np.diff(frames['t'])
+  new_run = np.ones(len(frames), dtype=bool)
+  new_run[1:] = (dt <= 0) | (dt > max_gap) | ~has_lead[1:] | ~has_lead[:-1]
+  starts = np.flatnonzero(new_run)
+  for start, end in zip(starts, np.append(starts[1:], len(frames))):
+    if has_lead[start]:
+      yield frames[start:end]
+
+
+def normalize(frames):
+  """Model inputs of frames, (len(frames), len(dfModel.keys)) scaled like DynamicFollow._norm"""
+  return np.stack([np.interp(frames[k], dfModel.scales[k], [0, 1]) for k in dfModel.keys], axis=1).astype(np.float32)
+
+
+def iter_windows(paths, stride=dfModel.skip_every):
+  """Yields (x, profile) for every window of dfModel.input_len consecutive frames
+  with a lead, every stride frames. x is the flattened input of auto_df.predict,
+  profile the user profile at the end of the window. Consecutive segments of a
+  route are joined, paths should be in the order of segment_paths."""
+  for _, route_paths in groupby(paths, key=_route_name):
+    frames = np.concatenate([load_segment(p)[0] for p in route_paths])
+    for run in split_runs(frames):
+      x = normalize(run)
+      for end in range(dfModel.input_len, len(run) + 1, stride):
+        yield x[end - dfModel.input_len:end:dfModel.skip_every].flatten(), int(run['profile'][end - 1])
+
+
+def load_windows(paths, stride=dfModel.skip_every):
+  """All windows of iter_windows as an (n, input size) float32 array and an (n,) array of profiles"""
+  windows = list(iter_windows(paths, stride))
+  if not windows:
+    input_size = len(range(0, dfModel.input_len, dfModel.skip_every)) * len(dfModel.keys)
+    return np.empty((0, input_size), dtype=np.float32), np.empty(0, dtype=np.uint8)
+  x, y = zip(*windows)
+  return np.stack(x), np.array(y, dtype=np.uint8)
@@ -29,3 +29,12 @@ class dfProfiles:
   to_idx = {v: k for k, v in to_profile.items()}
 
   default = relaxed
+
+
+class dfModel:
+  """Input of the auto-df model: the last 45 s of the 20 Hz mpc updates, every 0.25 s"""
+  rate = 1 / 20.
+  keys = ['v_ego', 'v_lead', 'a_lead', 'x_lead']  # in input order
+  scales = {'v_ego': [-0.06112159043550491, 37.96522521972656], 'a_lead': [-3.109330892562866, 3.3612186908721924], 'v_lead': [0.0, 35.27671432495117], 'x_lead': [2.4600000381469727, 141.44000244140625]}
+  skip_every = round(0.25 / rate)
+  input_len = round(45 / rate)
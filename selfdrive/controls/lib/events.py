@@ -41,7 +41,15 @@ class Events:
   def __init__(self):
     self.events = []
     self.static_events = []
-    self.events_prev = dict.fromkeys(EVENTS.keys(), 0)
+    # frames each event has been present for, indexed by event id
+    self.events_prev = [0] * len(EVENT_IDS)
+    self.present = set()
+    self.counted = set()
+    self.mask = 0
+    self.static_present = set()
+    self.static_mask = 0
+    self.msg_names = None
+    self.msg = []
 
   @property
   def names(self):
@@ -51,34 +59,55 @@ class Events:
     return len(self.events)
 
   def add(self, event_name, static=False):
+    event_id = EVENT_IDS[event_name]
     if static:
       self.static_events.append(event_name)
+      self.static_present.add(event_id)
+      self.static_mask |= EVENT_MASKS[event_id]
     self.events.append(event_name)
+    self.present.add(event_id)
+    self.mask |= EVENT_MASKS[event_id]
 
   def clear(self):
-    self.events_prev = {k: (v+1 if k in self.events else 0) for k, v in self.events_prev.items()}
+    # only counters of events present in this or the previous frame change
+    for event_id in self.counted - self.present:
+      self.events_prev[event_id] = 0
+    for event_id in self.present:
+      self.events_prev[event_id] += 1
+    self.counted = self.present
+
     self.events = self.static_events.copy()
+    self.present = self.static_present.copy()
+    self.mask = self.static_mask
 
   def any(self, event_type):
-    for e in self.events:
-      if event_type in EVENTS.get(e, {}).keys():
-        return True
-    return False
+    return bool(self.mask & ET_BITS[event_type])
 
   def create_alerts(self, event_types, callback_args=None):
     if callback_args is None:
       callback_args = []
 
+    types_mask = 0
+    for et in event_types:
+      types_mask |= ET_BITS[et]
+
     ret = []
+    if not self.mask & types_mask:
+      return ret
+
     for e in self.events:
-      types = EVENTS[e].keys()
+      event_id = EVENT_IDS[e]
+      if not EVENT_MASKS[event_id] & types_mask:
+        continue
+
+      alerts = EVENTS[e]
       for et in event_types:
-        if et in types:
-          alert = EVENTS[e][et]
+        if et in alerts:
+          alert = alerts[et]
           if not isinstance(alert, Alert):
             alert = alert(*callback_args)
 
-          if DT_CTRL * (self.events_prev[e] + 1) >= alert.creation_delay:
+          if DT_CTRL * (self.events_prev[event_id] + 1) >= alert.creation_delay:
             alert.alert_type = f"{EVENT_NAME[e]}/{et}"
             alert.event_type = et
             ret.append(alert)
@@ -86,17 +115,28 @@ class Events:
 
   def add_from_msg(self, events):
     for e in events:
-      self.events.append(e.name.raw)
+      self.add(e.name.raw)
 
   def to_msg(self):
-    ret = []
-    for event_name in self.events:
-      event = car.CarEvent.new_message()
-      event.name = event_name
-      for event_type in EVENTS.get(event_name, {}).keys():
-        setattr(event, event_type , True)
-      ret.append(event)
-    return ret
+    # the events rarely change between frames, reuse the last list then
+    if self.events != self.msg_names:
+      self.msg_names = self.events.copy()
+      self.msg = [event_msg(event_name) for event_name in self.events]
+    return self.msg
+
+
+EVENT_MSGS: Dict[Any, car.CarEvent] = {}
+
+def event_msg(event_name):
+  """CarEvent of an event name, built once and shared"""
+  event = EVENT_MSGS.get(event_name)
+  if event is None:
+    event = car.CarEvent.new_message()
+    event.name = event_name
+    for event_type in EVENTS.get(event_name, {}).keys():
+      setattr(event, event_type , True)
+    EVENT_MSGS[event_name] = event
+  return event
 
 class Alert:
   def __init__(self,
@@ -815,3 +855,14 @@ EVENTS: Dict[int, Dict[str, Union[Alert, Callable[[Any, messaging.SubMaster, boo
   },
 
 }
+
+# ********** event lookup tables **********
+
+# every event type is a bit, every event a fixed id with the mask of the event types it has alerts for
+ET_BITS = {et: 1 << i for i, et in enumerate([ET.ENABLE, ET.PRE_ENABLE, ET.NO_ENTRY, ET.WARNING, ET.USER_DISABLE,
+                                                ET.SOFT_DISABLE, ET.IMMEDIATE_DISABLE, ET.PERMANENT])}
+EVENT_IDS = {name: i for i, name in enumerate(list(EVENT_NAME) + [e for e in EVENTS if e not in EVENT_NAME])}
+EVENT_MASKS = [0] * len(EVENT_IDS)
+for _name, _alerts in EVENTS.items():
+  for _et in _alerts:
+    EVENT_MASKS[EVENT_IDS[_name]] |= ET_BITS[_et]
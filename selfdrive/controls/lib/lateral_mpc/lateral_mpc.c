@@ -2,6 +2,7 @@
 #include "acado_auxiliary_functions.h"
 #include "common/modeldata.h"
 #include <stdio.h>
+#include <string.h>
 
 #define NX          ACADO_NX  /* Number of differential state variables.  */
 #define NXA         ACADO_NXA /* Number of algebraic variables. */
@@ -107,3 +108,30 @@ int run_mpc(state_t * x0, log_t * solution, double v_ego,
 
   return acado_getNWSR();
 }
+
+void shift_solution(double dt){
+  // Warm start: move the previous solution dt forward along T_IDXS, holding
+  // the end of the horizon. Only the time is shifted, the path is not
+  // transformed into the new car frame.
+  int i, j, k = 0;
+  double x_prev[NX * (N + 1)];
+  double u_prev[NU * N];
+  memcpy(x_prev, acadoVariables.x, sizeof(x_prev));
+  memcpy(u_prev, acadoVariables.u, sizeof(u_prev));
+
+  for (i = 0; i <= N; i++){
+    double t = T_IDXS[i] + dt;
+    while (k < N - 1 && T_IDXS[k+1] <= t) k++;
+    double a = (t - T_IDXS[k]) / (T_IDXS[k+1] - T_IDXS[k]);
+    if (a > 1.0) a = 1.0;
+
+    for (j = 0; j < NX; j++){
+      acadoVariables.x[i*NX + j] = (1.0 - a) * x_prev[k*NX + j] + a * x_prev[(k+1)*NX + j];
+    }
+    if (i < N){
+      for (j = 0; j < NU; j++){
+        acadoVariables.u[i*NU + j] = u_prev[k*NU + j];
+      }
+    }
+  }
+}
@@ -24,6 +24,7 @@ typedef struct {
 
 void init();
 void set_weights(double pathCost, double headingCost, double steerRateCost);
+void shift_solution(double dt);
 int run_mpc(state_t * x0, log_t * solution,
              double v_ego, double rotation_radius,
              double target_y[N+1], double target_psi[N+1]);
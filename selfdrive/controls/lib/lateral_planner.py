@@ -5,6 +5,7 @@ from common.realtime import sec_since_boot, DT_MDL
 from common.numpy_fast import interp
 from selfdrive.swaglog import cloudlog
 from selfdrive.controls.lib.lateral_mpc import libmpc_py
+from selfdrive.controls.lib.mpc_solver import MpcSolver
 from selfdrive.controls.lib.drive_helpers import MPC_COST_LAT, MPC_N, CAR_ROTATION_RADIUS
 from selfdrive.controls.lib.lane_planner import LanePlanner, TRAJECTORY_SIZE
 from selfdrive.config import Conversions as CV
@@ -72,6 +73,7 @@ class LateralPlanner():
   def setup_mpc(self):
     self.libmpc = libmpc_py.libmpc
     self.libmpc.init()
+    self.solver = MpcSolver('mpc_lat', self.libmpc)
 
     self.mpc_solution = libmpc_py.ffi.new("log_t *")
     self.cur_state = libmpc_py.ffi.new("state_t *")
@@ -189,11 +191,11 @@ class LateralPlanner():
 
     assert len(y_pts) == MPC_N + 1
     assert len(heading_pts) == MPC_N + 1
-    self.libmpc.run_mpc(self.cur_state, self.mpc_solution,
-                        float(v_ego),
-                        CAR_ROTATION_RADIUS,
-                        list(y_pts),
-                        list(heading_pts))
+    self.solver.solve(self.cur_state, self.mpc_solution,
+                      float(v_ego),
+                      CAR_ROTATION_RADIUS,
+                      list(y_pts),
+                      list(heading_pts))
     # init state for next
     self.cur_state.x = 0.0
     self.cur_state.y = 0.0
@@ -229,6 +231,7 @@ class LateralPlanner():
     t = sec_since_boot()
     if mpc_nans:
       self.libmpc.init()
+      self.solver.reset()
       self.cur_state.curvature = measured_curvature
 
       if t > self.last_cloudlog_t + 5.0:
@@ -263,11 +266,13 @@ class LateralPlanner():
 
     pm.send('lateralPlan', plan_send)
 
-    if LOG_MPC:
+    if LOG_MPC and self.solver.should_log():
       dat = messaging.new_message('liveMpc')
       dat.liveMpc.x = list(self.mpc_solution[0].x)
       dat.liveMpc.y = list(self.mpc_solution[0].y)
       dat.liveMpc.psi = list(self.mpc_solution[0].psi)
-      dat.liveMpc.tire_angle = list(self.mpc_solution[0].tire_angle)
+      dat.liveMpc.delta = list(self.mpc_solution[0].curvature)
       dat.liveMpc.cost = self.mpc_solution[0].cost
+      dat.liveMpc.qpIterations = max(0, self.solver.n_its)
+      dat.liveMpc.calculationTime = self.solver.duration
       pm.send('liveMpc', dat)
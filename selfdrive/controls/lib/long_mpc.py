@@ -8,6 +8,7 @@ from selfdrive.controls.lib.radar_helpers import _LEAD_ACCEL_TAU
 from selfdrive.controls.lib.longitudinal_mpc import libmpc_py
 from selfdrive.controls.lib.drive_helpers import MPC_COST_LONG
 from selfdrive.controls.lib.dynamic_follow import DynamicFollow
+from selfdrive.controls.lib.mpc_solver import MpcSolver
 
 #LOG_MPC = os.environ.get('LOG_MPC', False)
 LOG_MPC = True
@@ -28,12 +29,10 @@ class LongitudinalMpc():
     self.new_lead = False
 
     self.last_cloudlog_t = 0.0
-    self.n_its = 0
-    self.duration = 0
 
   def publish(self, pm):
-    if LOG_MPC:
-      qp_iterations = max(0, self.n_its)
+    if LOG_MPC and self.solver.should_log():
+      qp_iterations = max(0, self.solver.n_its)
       dat = messaging.new_message('liveLongitudinalMpc')
       dat.liveLongitudinalMpc.xEgo = list(self.mpc_solution[0].x_ego)
       dat.liveLongitudinalMpc.vEgo = list(self.mpc_solution[0].v_ego)
@@ -44,13 +43,14 @@ class LongitudinalMpc():
       dat.liveLongitudinalMpc.aLeadTau = self.a_lead_tau
       dat.liveLongitudinalMpc.qpIterations = qp_iterations
       dat.liveLongitudinalMpc.mpcId = self.mpc_id
-      dat.liveLongitudinalMpc.calculationTime = self.duration
+      dat.liveLongitudinalMpc.calculationTime = self.solver.duration
       pm.send('liveLongitudinalMpc', dat)
 
   def setup_mpc(self):
     ffi, self.libmpc = libmpc_py.get_libmpc(self.mpc_id)
     self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
                      MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
+    self.solver = MpcSolver('mpc_long%d' % self.mpc_id, self.libmpc)
 
     self.mpc_solution = ffi.new("log_t *")
     self.cur_state = ffi.new("state_t *")
@@ -81,6 +81,7 @@ class LongitudinalMpc():
       self.new_lead = False
       if not self.prev_lead_status or abs(x_lead - self.prev_lead_x) > 2.5:
         self.libmpc.init_with_simulation(self.v_mpc, x_lead, v_lead, a_lead, self.a_lead_tau)
+        self.solver.reset()
         self.new_lead = True
 
       self.dynamic_follow.update_lead(v_lead, a_lead, x_lead, lead.status, self.new_lead)
@@ -100,9 +101,7 @@ class LongitudinalMpc():
     TR = self.dynamic_follow.update(CS, self.libmpc)  # update dynamic follow
 
     # Calculate mpc
-    t = sec_since_boot()
-    self.n_its = self.libmpc.run_mpc(self.cur_state, self.mpc_solution, self.a_lead_tau, a_lead, TR)
-    self.duration = int((sec_since_boot() - t) * 1e9)
+    self.solver.solve(self.cur_state, self.mpc_solution, self.a_lead_tau, a_lead, TR)
 
     # Get solution. MPC timestep is 0.2 s, so interpolation to 0.05 s is needed
     self.v_mpc = self.mpc_solution[0].v_ego[1]
@@ -115,6 +114,7 @@ class LongitudinalMpc():
     backwards = min(self.mpc_solution[0].v_ego) < -0.01
 
     if ((backwards or crashing) and self.prev_lead_status) or nans:
+      t = sec_since_boot()
       if t > self.last_cloudlog_t + 5.0:
         self.last_cloudlog_t = t
         cloudlog.warning("Longitudinal mpc %d reset - backwards: %s crashing: %s nan: %s" % (
@@ -122,6 +122,7 @@ class LongitudinalMpc():
 
       self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
                        MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
+      self.solver.reset()
       self.cur_state[0].v_ego = v_ego
       self.cur_state[0].a_ego = 0.0
       self.v_mpc = v_ego
@@ -1,5 +1,5 @@
 from cereal import log
-from common.numpy_fast import clip, interp
+from common.numpy_fast import Interp, clip, interp
 from selfdrive.controls.lib.pid import LongPIDController
 from selfdrive.controls.lib.dynamic_gas import DynamicGas
 from common.op_params import opParams
@@ -16,6 +16,7 @@ GdMAX_V = [7, 14, 22, 28, 35]
 #GdMAX_OUT = [0.002, 0.005, 0.01, 0.02, 0.05]
 GdMAX_OUT = [0.002, 0.002, 0.005, 0.01, 0.02]
 #GdMAX_OUT = [0.0005, 0.001, 0.003, 0.01, 0.02]
+_GdMAX = Interp(GdMAX_V, GdMAX_OUT)
 
 BRAKE_STOPPING_TARGET = 0.5  # apply at least this amount of brake to maintain the vehicle stationary
 
@@ -126,7 +127,7 @@ class LongControl():
 
       output_gb = self.pid.update(self.v_pid, v_ego_pid, speed=v_ego_pid, deadzone=deadzone, feedforward=a_target, freeze_integrator=prevent_overshoot, lead=lead_car)
 
-      gb_limit = interp(CS.vEgo, GdMAX_V, GdMAX_OUT)
+      gb_limit = _GdMAX(CS.vEgo)
       
       #if self.accel_limiter and not lead_car:
       if self.accel_limiter and output_gb > 0:   # Test if this is good for lead car also
@@ -30,6 +30,7 @@ def _get_libmpc(mpc_id):
     void init(double ttcCost, double distanceCost, double accelerationCost, double jerkCost);
     void init_with_simulation(double v_ego, double x_l, double v_l, double a_l, double l);
     void change_costs(double ttcCost, double distanceCost, double accelerationCost, double jerkCost);
+    void shift_solution(double dt);
     int run_mpc(state_t * x0, log_t * solution,
                 double l, double a_l_0, double TR);
     """)
@@ -2,6 +2,7 @@
 #include "acado_auxiliary_functions.h"
 
 #include <stdio.h>
+#include <string.h>
 #include <math.h>
 
 #define NX          ACADO_NX  /* Number of differential state variables.  */
@@ -190,3 +191,39 @@ int run_mpc(state_t * x0, log_t * solution, double l, double a_l_0, double TR){
 
   return acado_getNWSR();
 }
+
+static double node_time(int i){
+  // First 5 intervals are 0.2 s, the rest 0.6 s
+  return i <= 5 ? 0.2 * i : 1.0 + 0.6 * (i - 5);
+}
+
+void shift_solution(double dt){
+  // Warm start: move the previous solution dt forward along the time grid,
+  // holding the end of the horizon. Positions stay relative to the ego car.
+  int i, j, k = 0;
+  double x_prev[NX * (N + 1)];
+  double u_prev[NU * N];
+  memcpy(x_prev, acadoVariables.x, sizeof(x_prev));
+  memcpy(u_prev, acadoVariables.u, sizeof(u_prev));
+
+  for (i = 0; i <= N; i++){
+    double t = node_time(i) + dt;
+    while (k < N - 1 && node_time(k + 1) <= t) k++;
+    double a = (t - node_time(k)) / (node_time(k + 1) - node_time(k));
+    if (a > 1.0) a = 1.0;
+
+    for (j = 0; j < NX; j++){
+      acadoVariables.x[i*NX + j] = (1.0 - a) * x_prev[k*NX + j] + a * x_prev[(k+1)*NX + j];
+    }
+    if (i < N){
+      for (j = 0; j < NU; j++){
+        acadoVariables.u[i*NU + j] = u_prev[k*NU + j];
+      }
+    }
+  }
+
+  double x_ego_0 = acadoVariables.x[0];
+  for (i = 0; i <= N; i++){
+    acadoVariables.x[i*NX] -= x_ego_0;
+  }
+}
@@ -0,0 +1,89 @@
+import os
+import time
+from collections import Counter, deque
+
+from common.profiler import PROFILE_DIR, loop_profile_enabled, summarize, write_stats
+from common.realtime import DT_MDL
+
+# Warm starting moves the previous solution forward in time before every solve
+# instead of starting from it as is. Off by default, the solvers have always
+# been run from the unshifted solution.
+MPC_WARM_START = os.environ.get('MPC_WARM_START', '0') == '1'
+# Publish the full liveMpc/liveLongitudinalMpc trajectories every n-th solve
+MPC_LOG_DECIMATION = max(1, int(os.environ.get('MPC_LOG_DECIMATION', '1')))
+
+
+class MpcSolver():
+  """Runs the solves of an ACADO generated MPC.
+
+  Wraps run_mpc of a libmpc loaded through cffi, optionally warm starts it from
+  the previous solution shifted by dt, and keeps the solve time and QP iteration
+  count of the last `window` solves. With LOOP_PROFILE set for `name` the stats
+  are written to PROFILE_DIR next to the loop profiles of the daemons.
+  """
+  def __init__(self, name, libmpc, warm_start=None, log_decimation=None, dt=DT_MDL,
+               enabled=None, window=1000, export_interval=5.):
+    self.name = name
+    self.libmpc = libmpc
+    self.warm_start = MPC_WARM_START if warm_start is None else warm_start
+    self.log_decimation = MPC_LOG_DECIMATION if log_decimation is None else max(1, log_decimation)
+    self.dt = dt
+    self.enabled = loop_profile_enabled(name) if enabled is None else enabled
+    self.export_interval = export_interval
+    self.path = os.path.join(PROFILE_DIR, name)
+
+    self.solve_times = deque(maxlen=window)
+    self.iterations = Counter()
+    self.solves = 0
+    self.resets = 0
+    self.n_its = 0
+    self.duration = 0  # ns, as logged in calculationTime
+
+    self._has_solution = False
+    self._last_export = time.perf_counter()
+
+  def solve(self, *args):
+    """Calls run_mpc with args, returns the number of QP iterations"""
+    if self.warm_start and self._has_solution:
+      self.libmpc.shift_solution(self.dt)
+
+    t = time.perf_counter()
+    self.n_its = self.libmpc.run_mpc(*args)
+    duration = time.perf_counter() - t
+
+    self.duration = int(duration * 1e9)
+    self.solves += 1
+    self._has_solution = True
+    self.solve_times.append(duration)
+    self.iterations[self.n_its] += 1
+
+    if self.enabled and t - self._last_export > self.export_interval:
+      self._last_export = t
+      self.export()
+    return self.n_its
+
+  def reset(self):
+    """Call after the solver was (re)initialized, the next solve is not warm started"""
+    self._has_solution = False
+    self.resets += 1
+
+  def should_log(self):
+    """True on the solves whose full trajectories should be published"""
+    return self.solves % self.log_decimation == 0
+
+  def stats(self):
+    its = sum(n * c for n, c in self.iterations.items())
+    return {
+      "name": self.name,
+      "pid": os.getpid(),
+      "time": time.time(),
+      "solves": self.solves,
+      "resets": self.resets,
+      "warm_start": self.warm_start,
+      "solve": summarize(self.solve_times),
+      "iterations": {str(n): c for n, c in sorted(self.iterations.items())},
+      "mean_iterations": its / self.solves if self.solves else 0.,
+    }
+
+  def export(self):
+    write_stats(self.path, self.stats())
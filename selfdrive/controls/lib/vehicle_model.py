@@ -11,8 +11,11 @@ The system is defined by
 x_dot = A*x + B*u
 
 A depends on longitudinal speed, u [m/s], and vehicle parameters CP
+
+The *_batch functions evaluate whole arrays of speeds and steering angles at once,
+sa and u broadcast against each other.
 """
-from typing import Tuple
+from typing import Tuple, Union
 
 import numpy as np
 from numpy.linalg import solve
@@ -20,6 +23,8 @@ from numpy.linalg import solve
 from cereal import car
 from common.op_params import opParams
 
+FloatOrArray = Union[float, np.ndarray]
+
 class VehicleModel:
   def __init__(self, CP: car.CarParams):
     """
@@ -68,7 +73,24 @@ class VehicleModel:
     else:
       return kin_ss_sol(sa, u, self)
 
-  def calc_curvature(self, sa: float, u: float) -> float:
+  def steady_state_sol_batch(self, sa: FloatOrArray, u: FloatOrArray) -> np.ndarray:
+    """Returns the steady state solution for arrays of steering angles and speeds.
+    Uses the kinematic model where the speed is too small, like steady_state_sol.
+
+    Args:
+      sa: Steering wheel angle [rad]
+      u: Speed [m/s]
+
+    Returns:
+      Array of shape broadcast(sa, u) + (2,) with (lateral speed, rotational speed)
+    """
+    u = np.asarray(u, dtype=np.float64)
+    dyn = u > 0.1
+    # keep the dynamic model away from u = 0, those entries come from the kinematic model
+    dyn_sol = dyn_ss_sol_batch(sa, np.where(dyn, u, 1.), self)
+    return np.where(dyn[..., None], dyn_sol, kin_ss_sol_batch(sa, u, self))
+
+  def calc_curvature(self, sa: FloatOrArray, u: FloatOrArray) -> FloatOrArray:
     """Returns the curvature. Multiplied by the speed this will give the yaw rate.
 
     Args:
@@ -80,7 +102,7 @@ class VehicleModel:
     """
     return self.curvature_factor(u) * sa / self.sR
 
-  def curvature_factor(self, u: float) -> float:
+  def curvature_factor(self, u: FloatOrArray) -> FloatOrArray:
     """Returns the curvature factor.
     Multiplied by wheel angle (not steering wheel angle) this will give the curvature.
 
@@ -93,7 +115,7 @@ class VehicleModel:
     sf = calc_slip_factor(self)
     return (1. - self.chi) / (1. - sf * u**2) / self.l
 
-  def get_steer_from_curvature(self, curv: float, u: float) -> float:
+  def get_steer_from_curvature(self, curv: FloatOrArray, u: FloatOrArray) -> FloatOrArray:
     """Calculates the required steering wheel angle for a given curvature
 
     Args:
@@ -106,7 +128,7 @@ class VehicleModel:
 
     return curv * self.sR * 1.0 / self.curvature_factor(u)
 
-  def get_steer_from_yaw_rate(self, yaw_rate: float, u: float) -> float:
+  def get_steer_from_yaw_rate(self, yaw_rate: FloatOrArray, u: FloatOrArray) -> FloatOrArray:
     """Calculates the required steering wheel angle for a given yaw_rate
 
     Args:
@@ -119,7 +141,7 @@ class VehicleModel:
     curv = yaw_rate / u
     return self.get_steer_from_curvature(curv, u)
 
-  def yaw_rate(self, sa: float, u: float) -> float:
+  def yaw_rate(self, sa: FloatOrArray, u: FloatOrArray) -> FloatOrArray:
     """Calculate yaw rate
 
     Args:
@@ -198,6 +220,51 @@ def dyn_ss_sol(sa: float, u: float, VM: VehicleModel) -> np.ndarray:
   return -solve(A, B) * sa
 
 
+def kin_ss_sol_batch(sa: FloatOrArray, u: FloatOrArray, VM: VehicleModel) -> np.ndarray:
+  """kin_ss_sol for arrays of steering angles and speeds
+
+  Returns:
+    Array of shape broadcast(sa, u) + (2,) with steady state solutions
+  """
+  k = np.asarray(sa, dtype=np.float64) * np.asarray(u, dtype=np.float64) / VM.sR / VM.l
+  return np.stack([VM.aR * k, k], axis=-1)
+
+
+def create_dyn_state_matrices_batch(u: FloatOrArray, VM: VehicleModel) -> Tuple[np.ndarray, np.ndarray]:
+  """create_dyn_state_matrices for an array of speeds
+
+  Returns:
+    A tuple with the A matrices of shape u.shape + (2, 2), and the 2x1 B matrix,
+    which doesn't depend on the speed
+  """
+  u = np.asarray(u, dtype=np.float64)
+  A = np.empty(u.shape + (2, 2))
+  A[..., 0, 0] = - (VM.cF + VM.cR) / (VM.m * u)
+  A[..., 0, 1] = - (VM.cF * VM.aF - VM.cR * VM.aR) / (VM.m * u) - u
+  A[..., 1, 0] = - (VM.cF * VM.aF - VM.cR * VM.aR) / (VM.j * u)
+  A[..., 1, 1] = - (VM.cF * VM.aF**2 + VM.cR * VM.aR**2) / (VM.j * u)
+  B = np.array([[(VM.cF + VM.chi * VM.cR) / VM.m / VM.sR],
+                [(VM.cF * VM.aF - VM.chi * VM.cR * VM.aR) / VM.j / VM.sR]])
+  return A, B
+
+
+def dyn_ss_sol_batch(sa: FloatOrArray, u: FloatOrArray, VM: VehicleModel) -> np.ndarray:
+  """dyn_ss_sol for arrays of steering angles and speeds,
+  with the 2x2 system solved in closed form
+
+  Returns:
+    Array of shape broadcast(sa, u) + (2,) with steady state solutions
+  """
+  A, B = create_dyn_state_matrices_batch(u, VM)
+  a00, a01, a10, a11 = A[..., 0, 0], A[..., 0, 1], A[..., 1, 0], A[..., 1, 1]
+  det = a00 * a11 - a01 * a10
+  # x = -A^{-1} B sa
+  sa = np.asarray(sa, dtype=np.float64)
+  v = -(a11 * B[0, 0] - a01 * B[1, 0]) / det * sa
+  r = -(a00 * B[1, 0] - a10 * B[0, 0]) / det * sa
+  return np.stack([v, r], axis=-1)
+
+
 def calc_slip_factor(VM):
   """The slip factor is a measure of how the curvature changes with speed
   it's positive for Oversteering vehicle, negative (usual case) otherwise.
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from cereal import car
 from common.params import Params
+from common.profiler import LoopProfiler
 from common.realtime import Priority, config_realtime_process
 from selfdrive.swaglog import cloudlog
 from selfdrive.controls.lib.longitudinal_planner import Planner
@@ -34,15 +35,24 @@ def plannerd_thread(sm=None, pm=None):
   sm['liveParameters'].steerRatio = CP.steerRatio
   sm['liveParameters'].stiffnessFactor = 1.0
 
+  prof = LoopProfiler('plannerd')
+
   while True:
     sm.update()
+    prof.start()
 
     if sm.updated['modelV2']:
       PP.update(sm, CP, VM)
+      prof.checkpoint("Lateral update")
       PP.publish(sm, pm)
+      prof.checkpoint("Lateral publish")
     if sm.updated['radarState']:
       PL.update(sm, CP, VM, PP)
+      prof.checkpoint("Longitudinal update")
       PL.publish(sm, pm)
+      prof.checkpoint("Longitudinal publish")
+
+    prof.end()
 
 
 def main(sm=None, pm=None):
@@ -7,6 +7,7 @@ import cereal.messaging as messaging
 from cereal import car
 from common.numpy_fast import interp
 from common.params import Params
+from common.profiler import LoopProfiler
 from common.realtime import Ratekeeper, Priority, config_realtime_process
 from selfdrive.config import RADAR_TO_CAMERA
 from selfdrive.controls.lib.cluster.fastcluster_py import cluster_points_centroid
@@ -196,6 +197,7 @@ def radard_thread(sm=None, pm=None, can_sock=None):
 
   rk = Ratekeeper(1.0 / CP.radarTimeStep, print_delay_threshold=None)
   RD = RadarD(CP.radarTimeStep, RI.delay)
+  prof = LoopProfiler('radard', budget=CP.radarTimeStep)
 
   # TODO: always log leads once we can hide them conditionally
   enable_lead = CP.openpilotLongitudinalControl or not CP.radarOffCan
@@ -207,10 +209,12 @@ def radard_thread(sm=None, pm=None, can_sock=None):
     if rr is None:
       continue
 
+    prof.start()
     sm.update(0)
 
     dat = RD.update(sm, rr, enable_lead)
     dat.radarState.cumLagMs = -rk.remaining*1000.
+    prof.checkpoint("RadarD update")
 
     pm.send('radarState', dat)
 
@@ -226,8 +230,10 @@ def radard_thread(sm=None, pm=None, can_sock=None):
         "vRel": float(tracks[ids].vRel),
       }
     pm.send('liveTracks', dat)
+    prof.checkpoint("Publish")
 
     rk.monitor_time()
+    prof.end(rk.remaining)
 
 
 def main(sm=None, pm=None, can_sock=None):
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+from selfdrive.controls.lib.dynamic_follow import recorder
+from selfdrive.controls.lib.dynamic_follow.support import CarData, LeadData, dfModel
+
+LANES = SimpleNamespace(leftLaneSpeeds=[20., 21.], middleLaneSpeeds=[], rightLaneSpeeds=[25.],
+                        leftLaneDistances=[30., 50.], middleLaneDistances=[], rightLaneDistances=[10.])
+
+
+class FakeSubMaster(dict):
+  def __init__(self, services):
+    super().__init__({'laneSpeed': LANES})
+
+  def update(self, timeout=1000):
+    pass
+
+
+class TestDFRecorder(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    with mock.patch.object(recorder.messaging, 'SubMaster', FakeSubMaster):
+      self.rec = recorder.DFRecorder(self.tmpdir.name, segment_length=60)
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def record(self, t0, n, lead=True, profile=1):
+    car, lead_data = CarData(), LeadData()
+    lead_data.status = lead
+    for i in range(n):
+      car.v_ego = 20. + i * 0.01
+      lead_data.a_lead, lead_data.v_lead, lead_data.x_lead = 0.5, 21., 40. - i * 0.01
+      self.rec.update(t0 + i * dfModel.rate, car, lead_data, profile)
+
+  def finish(self):
+    self.rec.close()
+    return recorder.segment_paths(self.tmpdir.name)
+
+  def test_roundtrip(self):
+    self.record(100., 30)
+    self.record(100. + 30 * dfModel.rate, 5, lead=False)
+    paths = self.finish()
+    self.assertEqual(len(paths), 1)
+
+    frames, lanes = recorder.load_segment(paths[0])
+    self.assertEqual(len(frames), 35)
+    np.testing.assert_allclose(frames['v_ego'][:3], [20., 20.01, 20.02], rtol=1e-6)
+    self.assertTrue(np.all(np.isnan(frames['x_lead'][30:])))
+    self.assertEqual([list(lane) for lane in lanes[0]], [[20., 21.], [], [25.], [30., 50.], [], [10.]])
+
+  def test_segments_and_windows(self):
+    # 100 s with a lead, split over two segments, then a gap and a run too short for a window
+    self.record(1000., round(100 / dfModel.rate), profile=2)
+    self.record(1200., 100)
+    paths = self.finish()
+    self.assertEqual([os.path.basename(p).rsplit('--', 1)[1] for p in paths], ['0.dfr', '1.dfr', '3.dfr'])
+
+    x, y = recorder.load_windows(paths)
+    n_frames = round(100 / dfModel.rate)
+    self.assertEqual(len(x), (n_frames - dfModel.input_len) // dfModel.skip_every + 1)
+    self.assertEqual(x.shape[1], dfModel.input_len // dfModel.skip_every * len(dfModel.keys))
+    self.assertEqual(x.dtype, np.float32)
+    self.assertTrue(np.all(y == 2))
+    self.assertTrue(np.all((x >= 0) & (x <= 1)))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import unittest
+
+from selfdrive.controls.lib.alertmanager import AlertManager
+from selfdrive.controls.lib.events import Alert, AlertSize, AlertStatus, AudibleAlert, ET, EVENT_IDS, EventName, \
+                                          Events, Priority, VisualAlert
+
+
+def make_alert(text, priority, duration, event_type=ET.WARNING):
+  alert = Alert(text, "", AlertStatus.normal, AlertSize.mid, priority, VisualAlert.none, AudibleAlert.none,
+                0., 0., duration)
+  alert.alert_type = text
+  alert.event_type = event_type
+  return alert
+
+
+class TestEvents(unittest.TestCase):
+  def test_counters(self):
+    events = Events()
+    events.add(EventName.startup, static=True)
+    events.add(EventName.pcmEnable)
+    self.assertTrue(events.any(ET.ENABLE))
+    self.assertFalse(events.any(ET.SOFT_DISABLE))
+
+    events.clear()
+    events.add(EventName.pcmEnable)
+    events.clear()
+    self.assertEqual(events.events_prev[EVENT_IDS[EventName.startup]], 2)
+    self.assertEqual(events.events_prev[EVENT_IDS[EventName.pcmEnable]], 2)
+    self.assertEqual(events.names, [EventName.startup])
+    self.assertFalse(events.any(ET.ENABLE))
+
+    events.clear()
+    self.assertEqual(events.events_prev[EVENT_IDS[EventName.startup]], 3)
+    self.assertEqual(events.events_prev[EVENT_IDS[EventName.pcmEnable]], 0)
+
+  def test_create_alerts(self):
+    events = Events()
+    events.add(EventName.pcmEnable)
+    events.add(EventName.startup)
+    self.assertEqual(events.create_alerts([ET.SOFT_DISABLE]), [])
+    alerts = events.create_alerts([ET.ENABLE, ET.PERMANENT], [None, None, False])
+    self.assertEqual([a.alert_type for a in alerts], ["pcmEnable/enable", "startup/permanent"])
+
+
+class TestAlertManager(unittest.TestCase):
+  def test_priority_and_expiry(self):
+    AM = AlertManager()
+    AM.add_many(0, [make_alert("low", Priority.LOW, 1.), make_alert("high", Priority.HIGH, .5)])
+    AM.process_alerts(0)
+    self.assertEqual(AM.alert_type, "high")
+
+    # the high priority alert expired
+    AM.process_alerts(60)
+    self.assertEqual(AM.alert_type, "low")
+
+    # newer alerts of the same priority come first
+    AM.add_many(70, [make_alert("low2", Priority.LOW, 1.)])
+    AM.process_alerts(70)
+    self.assertEqual(AM.alert_type, "low2")
+
+    AM.process_alerts(80, clear_event_type=ET.WARNING)
+    self.assertEqual(AM.alert_type, "")
+    self.assertEqual(len(AM.activealerts), 0)
+
+  def test_compaction(self):
+    AM = AlertManager()
+    for frame in range(10000):
+      AM.add_many(frame, [make_alert("persistent", Priority.LOW, .2)])
+      AM.process_alerts(frame)
+    self.assertLess(len(AM.activealerts), 200)
+
+
+if __name__ == "__main__":
+  unittest.main()
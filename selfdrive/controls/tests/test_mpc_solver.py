@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import json
+import os
+import tempfile
+import unittest
+
+from selfdrive.controls.lib.mpc_solver import MpcSolver
+
+
+class FakeLibMpc():
+  def __init__(self, n_its=3):
+    self.n_its = n_its
+    self.calls = []
+
+  def shift_solution(self, dt):
+    self.calls.append(('shift', dt))
+
+  def run_mpc(self, *args):
+    self.calls.append(('run', args))
+    return self.n_its
+
+
+class TestMpcSolver(unittest.TestCase):
+  def test_warm_start(self):
+    lib = FakeLibMpc()
+    solver = MpcSolver('mpc_test', lib, warm_start=True, dt=0.05, enabled=False)
+    solver.solve(1, 2)
+    solver.solve(1, 2)
+    solver.reset()
+    solver.solve(1, 2)
+    # the first solve after an init isn't shifted
+    self.assertEqual(lib.calls, [('run', (1, 2)), ('shift', 0.05), ('run', (1, 2)), ('run', (1, 2))])
+
+    lib.calls.clear()
+    cold = MpcSolver('mpc_test', lib, warm_start=False, enabled=False)
+    cold.solve()
+    cold.solve()
+    self.assertEqual(lib.calls, [('run', ()), ('run', ())])
+
+  def test_stats(self):
+    lib = FakeLibMpc(n_its=2)
+    solver = MpcSolver('mpc_test', lib, log_decimation=3, enabled=False)
+    logged = []
+    for i in range(6):
+      if i == 4:
+        lib.n_its = 5
+      solver.solve()
+      logged.append(solver.should_log())
+    self.assertEqual(logged, [False, False, True, False, False, True])
+
+    stats = solver.stats()
+    self.assertEqual(stats['solves'], 6)
+    self.assertEqual(stats['iterations'], {'2': 4, '5': 2})
+    self.assertAlmostEqual(stats['mean_iterations'], 3.)
+    self.assertEqual(stats['solve']['n'], 6)
+
+  def test_export(self):
+    with tempfile.TemporaryDirectory() as d:
+      solver = MpcSolver('mpc_test', FakeLibMpc(), enabled=True)
+      solver.path = os.path.join(d, 'mpc_test')
+      solver.solve()
+      solver.export()
+      with open(solver.path) as f:
+        self.assertEqual(json.load(f)['solves'], 1)
+
+
+if __name__ == "__main__":
+  unittest.main()
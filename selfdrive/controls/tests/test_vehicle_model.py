@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import unittest
+
+import numpy as np
+
+from cereal import car
+from selfdrive.controls.lib.vehicle_model import VehicleModel, create_dyn_state_matrices, \
+                                                 create_dyn_state_matrices_batch, dyn_ss_sol, dyn_ss_sol_batch
+
+
+def make_vm():
+  CP = car.CarParams.new_message()
+  CP.mass = 1500.
+  CP.rotationalInertia = 2500.
+  CP.wheelbase = 2.7
+  CP.centerToFront = 1.2
+  CP.tireStiffnessFront = 2e5
+  CP.tireStiffnessRear = 2.5e5
+  CP.steerRatio = 15.
+  return VehicleModel(CP)
+
+
+class TestVehicleModel(unittest.TestCase):
+  def setUp(self):
+    self.VM = make_vm()
+    self.u = np.array([0., 0.05, 0.1, 0.5, 5., 20., 40.])
+    self.sa = np.radians(np.array([-90., -5., 0., 3., 45.]))
+
+  def test_dyn_state_matrices(self):
+    A, B = create_dyn_state_matrices_batch(self.u[1:], self.VM)
+    for i, u in enumerate(self.u[1:]):
+      A_ref, B_ref = create_dyn_state_matrices(u, self.VM)
+      np.testing.assert_allclose(A[i], A_ref)
+      np.testing.assert_allclose(B, B_ref)
+
+  def test_dyn_ss_sol(self):
+    sol = dyn_ss_sol_batch(self.sa[:, None], self.u[None, 1:], self.VM)
+    self.assertEqual(sol.shape, (len(self.sa), len(self.u) - 1, 2))
+    for i, sa in enumerate(self.sa):
+      for j, u in enumerate(self.u[1:]):
+        np.testing.assert_allclose(sol[i, j], dyn_ss_sol(sa, u, self.VM)[:, 0], atol=1e-12)
+
+  def test_steady_state_sol(self):
+    sol = self.VM.steady_state_sol_batch(self.sa[:, None], self.u[None, :])
+    self.assertTrue(np.all(np.isfinite(sol)))
+    for i, sa in enumerate(self.sa):
+      for j, u in enumerate(self.u):
+        np.testing.assert_allclose(sol[i, j], self.VM.steady_state_sol(sa, u)[:, 0], atol=1e-12)
+
+  def test_curvature(self):
+    curv = self.VM.calc_curvature(self.sa[:, None], self.u[None, :])
+    steer = self.VM.get_steer_from_curvature(curv, self.u[None, :])
+    for i, sa in enumerate(self.sa):
+      for j, u in enumerate(self.u):
+        self.assertAlmostEqual(curv[i, j], self.VM.calc_curvature(sa, u))
+    np.testing.assert_allclose(steer, np.broadcast_to(self.sa[:, None], steer.shape), atol=1e-12)
+
+
+if __name__ == "__main__":
+  unittest.main()
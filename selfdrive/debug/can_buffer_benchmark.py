@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+'''
+Times parsing and packing the USB CAN packets of the panda Python library on
+synthetic traffic that saturates all buses, against the implementations before
+the NumPy ones.
+  $ ./can_buffer_benchmark.py --seconds 5
+'''
+import argparse
+import random
+import struct
+import time
+
+import numpy as np
+
+from panda.python import CAN_MSG_DTYPE, pack_can_buffer, pack_can_buffer_array, parse_can_buffer, parse_can_buffer_array
+
+CAN_FRAME_BITS = 125  # standard frame with 8 data bytes, including bit stuffing
+NUM_BUSES = 3
+USB_PACKETS = 256  # per bulk read
+
+
+def parse_can_buffer_struct(dat):
+  """panda.python.parse_can_buffer before parse_can_buffer_array was added, for comparison"""
+  ret = []
+  for j in range(0, len(dat), 0x10):
+    ddat = dat[j:j + 0x10]
+    f1, f2 = struct.unpack("II", ddat[0:8])
+    extended = 4
+    if f1 & extended:
+      address = f1 >> 3
+    else:
+      address = f1 >> 21
+    dddat = ddat[8:8 + (f2 & 0xF)]
+    ret.append((address, f2 >> 16, dddat, (f2 >> 4) & 0xFF))
+  return ret
+
+
+def pack_can_buffer_struct(arr):
+  """Panda.can_send_many packing before pack_can_buffer was added, for comparison"""
+  snds = []
+  transmit = 1
+  extended = 4
+  for addr, _, dat, bus in arr:
+    assert len(dat) <= 8
+    if addr >= 0x800:
+      rir = (addr << 3) | transmit | extended
+    else:
+      rir = (addr << 21) | transmit
+    snd = struct.pack("II", rir, len(dat) | (bus << 4)) + dat
+    snd = snd.ljust(0x10, b'\x00')
+    snds.append(snd)
+  return b''.join(snds)
+
+
+def synthetic_msgs(n):
+  msgs = []
+  for i in range(n):
+    addr = random.randrange(0x800) if random.random() < 0.9 else 0x18DA00F1 + (random.randrange(256) << 8)
+    msgs.append([addr, None, bytes(random.randrange(256) for _ in range(random.randrange(9))), random.randrange(NUM_BUSES)])
+  return msgs
+
+
+def timed(f, args):
+  t = time.perf_counter()
+  for a in args:
+    f(a)
+  return time.perf_counter() - t
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark CAN packet parsing and packing at full bus load")
+  parser.add_argument("--seconds", type=float, default=1., help="seconds of bus traffic")
+  args = parser.parse_args()
+
+  msgs = synthetic_msgs(USB_PACKETS)
+  reads = [bytearray(pack_can_buffer_struct(msgs))]
+  # bulk reads carry the bus time in the upper half of the second word
+  for _ in range(15):
+    read = np.frombuffer(pack_can_buffer_struct(synthetic_msgs(USB_PACKETS)), np.uint32).copy()
+    read[1::4] |= np.random.randint(0, 1 << 16, USB_PACKETS, dtype=np.uint32) << 16
+    reads.append(bytearray(read.tobytes()))
+
+  assert all(parse_can_buffer(r) == parse_can_buffer_struct(r) for r in reads)
+  send_buf = bytearray(USB_PACKETS * 16)
+  assert bytes(pack_can_buffer(msgs, send_buf)) == pack_can_buffer_struct(msgs)
+  msg_array = parse_can_buffer_array(reads[0])
+  msg_array['busTime'] = 0
+  assert pack_can_buffer_array(msg_array) == pack_can_buffer_struct(msgs)
+  assert msg_array.dtype == CAN_MSG_DTYPE
+
+  batches = [msgs] * len(reads)
+  arrays = [msg_array] * len(reads)
+  cases = [
+    ("parse struct", parse_can_buffer_struct, reads),
+    ("parse tuples", parse_can_buffer, reads),
+    ("parse array", parse_can_buffer_array, reads),
+    ("pack struct", pack_can_buffer_struct, batches),
+    ("pack buffer", lambda m: pack_can_buffer(m, send_buf), batches),
+    ("pack array", pack_can_buffer_array, arrays),
+  ]
+
+  for kbps in (500, 1000):
+    frames = kbps * 1000 / CAN_FRAME_BITS * NUM_BUSES * args.seconds
+    n = int(np.ceil(frames / USB_PACKETS / len(reads)))
+    print(f"{kbps} kbps on {NUM_BUSES} buses: {frames / args.seconds:.0f} frames/s, {n * len(reads)} transfers")
+    print("%16s %12s %12s %10s" % ("", "[us/transfer]", "[ns/frame]", "cpu [%]"))
+    for name, f, inputs in cases:
+      dt = timed(f, inputs * n)
+      print("%16s %12.1f %12.1f %10.1f" % (name, dt / (n * len(inputs)) * 1e6, dt / (n * len(inputs) * USB_PACKETS) * 1e9,
+                                           dt / args.seconds * 100))
+    print()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+'''
+Times packing the carcontroller messages of a few brands from dicts and from
+precompiled message templates.
+  $ ./can_packer_benchmark.py -n 100000
+'''
+import argparse
+import time
+
+from opendbc.can.packer import CANPacker
+from selfdrive.car.honda import hondacan
+from selfdrive.car.hyundai import hyundaican
+from selfdrive.car.toyota import toyotacan
+
+# dbc, message, signal order of the template, values
+MESSAGES = [
+  ("honda_civic_touring_2016_can_generated", "BRAKE_COMMAND", hondacan.BRAKE_COMMAND,
+   (200, 1, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0)),
+  ("honda_civic_touring_2016_can_generated", "STEERING_CONTROL", hondacan.STEERING_CONTROL, (1000, 1)),
+  ("honda_accord_s2t_2018_can_generated", "ACC_CONTROL", hondacan.ACC_CONTROL, (5, 100, -0.5, 1, 1, 0, 0)),
+  ("toyota_corolla_2017_pt_generated", "STEERING_COMMAND", toyotacan.STEERING_COMMAND_CHECKSUM, (3, 1, 10.5, 1.25, 0)),
+  ("hyundai_kia_generic", "SCC12", hyundaican.SCC12_CHECKSUM, (1, 0, -0.5, -0.5, 3, 0)),
+  ("hyundai_kia_generic", "LFAHDA_MFC", hyundaican.LFAHDA_MFC, (2, 1, 2, 80)),
+]
+
+
+def run(n, pack):
+  t = time.perf_counter()
+  for i in range(n):
+    pack(i)
+  return time.perf_counter() - t
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark dict and template packing")
+  parser.add_argument("-n", type=int, default=100000, help="messages to pack per case")
+  args = parser.parse_args()
+
+  packers = {}
+  for dbc, name, signals, values in MESSAGES:
+    if dbc not in packers:
+      packers[dbc] = CANPacker(dbc)
+    packer = packers[dbc]
+    values_dict = dict(zip(signals, values))
+    tmpl = packer.template(name, signals)
+    assert packer.make_can_msg(name, 0, values_dict) == tmpl.make_can_msg(0, values), f"{name} packs differently"
+
+    t_dict = run(args.n, lambda i: packer.make_can_msg(name, 0, dict(zip(signals, values))))
+    t_tmpl = run(args.n, lambda i: packer.template(name, signals).make_can_msg(0, values))
+    t_bulk = run(args.n // 10, lambda i: packer.make_can_msgs([(tmpl, 0, values, -1)] * 10))
+    print("%-17s dict %6.2f us  template %6.2f us  bulk %6.2f us  %.1fx" %
+          (name, t_dict / args.n * 1e6, t_tmpl / args.n * 1e6, t_bulk / args.n * 1e6, t_dict / t_tmpl))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+'''
+Times the carstate CAN parsers of the car in each log on its recorded CAN,
+once string by string and once batched through update_strings.
+Pass logs of several brands to compare:
+  $ ./can_parser_benchmark.py --batch 5 honda.bz2 toyota.bz2 hyundai.bz2
+'''
+import argparse
+import os
+import time
+
+from cereal import car
+from tools.lib.logreader import LogReader
+
+os.environ['SKIP_FW_QUERY'] = "1"
+
+from selfdrive.car.car_helpers import interfaces  # pylint: disable=wrong-import-position
+
+
+def get_parsers(CP):
+  CS = interfaces[CP.carFingerprint][2](CP)
+  parsers = [CS.get_can_parser(CP), CS.get_cam_can_parser(CP), CS.get_body_can_parser(CP)]
+  return [p for p in parsers if p is not None]
+
+
+def run(parsers, batches, batched):
+  t = time.perf_counter()
+  for batch in batches:
+    for p in parsers:
+      if batched:
+        p.update_strings(batch)
+      else:
+        for s in batch:
+          p.update_string(s)
+  return time.perf_counter() - t
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark CANParser on recorded CAN")
+  parser.add_argument("logs", nargs="+", help="rlog paths")
+  parser.add_argument("--batch", type=int, default=1, help="can messages per update")
+  args = parser.parse_args()
+
+  for log_path in args.logs:
+    CP, can_strs = None, []
+    for msg in LogReader(log_path):
+      if msg.which() == 'carParams':
+        CP = msg.carParams
+      elif msg.which() == 'can':
+        can_strs.append(msg.as_builder().to_bytes())
+    if CP is None or CP.carFingerprint not in interfaces:
+      print(f"{os.path.basename(log_path)}: no supported carParams, skipping")
+      continue
+    CP = car.CarParams.from_bytes(CP.as_builder().to_bytes())
+
+    batches = [can_strs[i:i + args.batch] for i in range(0, len(can_strs), args.batch)]
+    single = get_parsers(CP)
+    batched = get_parsers(CP)
+    t_single = run(single, batches, False)
+    t_batched = run(batched, batches, True)
+
+    for a, b in zip(single, batched):
+      assert a.vl == b.vl, "batched parser values differ"
+      assert a.can_valid == b.can_valid, "batched parser validity differs"
+
+    n_sigs = sum(len(p.signal_keys) for p in single)
+    per_update = 1e6 / max(1, len(batches))
+    print(f"{os.path.basename(log_path)} ({CP.carFingerprint}, {len(single)} parsers, {n_sigs} signals, {len(can_strs)} msgs)")
+    print("  single  %8.2f us/update" % (t_single * per_update))
+    print("  batched %8.2f us/update  %.2fx" % (t_batched * per_update, t_single / max(t_batched, 1e-9)))
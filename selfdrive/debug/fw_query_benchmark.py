@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+'''
+Runs the VIN and FW version queries against the simulated ECUs of every car
+with FW versions in the fingerprints, times them per brand and checks that the
+FW versions match the car, like test_fw_query_on_routes.py does on routes.
+  $ ./fw_query_benchmark.py --brand toyota --pending 0.05
+'''
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from selfdrive.car.ecu_sim import SIM_VIN, car_can_bus, sim_sockets
+from selfdrive.car.fingerprints import get_attr_from_cars
+from selfdrive.car.fw_versions import get_fw_versions, match_fw_to_car
+from selfdrive.car.vin import get_vin
+
+BUS = 1
+
+
+def run_query(candidate, early_stop, **kwargs):
+  can_bus = car_can_bus(candidate, bus=BUS, **kwargs)
+  logcan, sendcan = sim_sockets(can_bus)
+
+  t = time.monotonic()
+  _, vin = get_vin(logcan, sendcan, BUS)
+  t_vin = time.monotonic() - t
+
+  t = time.monotonic()
+  car_fw = get_fw_versions(logcan, sendcan, BUS, early_stop=early_stop)
+  t_fw = time.monotonic() - t
+
+  return vin == SIM_VIN, match_fw_to_car(car_fw), t_vin, t_fw, can_bus.tx_frames + can_bus.rx_frames
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark the VIN and FW queries on simulated ECUs")
+  parser.add_argument("--brand", action="append", help="only cars of these brands")
+  parser.add_argument("--car", action="append", help="only these cars")
+  parser.add_argument("--version-idx", type=int, default=0, help="FW version of every ECU to simulate")
+  parser.add_argument("--pending", type=float, help="answer FW requests with response pending first, for this long [s]")
+  parser.add_argument("--nrc", type=lambda x: int(x, 0), help="negative response code to unknown requests, no answer by default")
+  parser.add_argument("--full", action="store_true", help="query all ECUs, without stopping at a unique match")
+  args = parser.parse_args()
+
+  stats = defaultdict(lambda: defaultdict(list))
+  mismatches = []
+  for brand, cars in get_attr_from_cars('FW_VERSIONS', combine_brands=False).items():
+    if args.brand and brand not in args.brand:
+      continue
+
+    for candidate, fws in cars.items():
+      if (args.car and candidate not in args.car) or not len(fws):
+        continue
+
+      vin_ok, candidates, t_vin, t_fw, frames = run_query(candidate, not args.full, version_idx=args.version_idx,
+                                                          pending_delay=args.pending, nrc=args.nrc)
+      result = "good" if candidates == {candidate} else "ambiguous" if candidate in candidates else "wrong"
+      print("%-40s vin %4.0f ms  fw %5.0f ms  %5d frames  %s" % (candidate, t_vin * 1e3, t_fw * 1e3, frames, result))
+
+      s = stats[brand]
+      s['vin_ok'].append(vin_ok)
+      s['result'].append(result)
+      s['t_vin'].append(t_vin)
+      s['t_fw'].append(t_fw)
+      s['frames'].append(frames)
+      if result != "good":
+        mismatches.append((candidate, result, candidates))
+
+  print()
+  print("%10s %5s %7s %5s %10s %10s %10s %10s %10s" % ("brand", "cars", "vin ok", "good", "vin [ms]", "vin max", "fw [ms]", "fw max", "frames/s"))
+  for brand, s in stats.items():
+    t_vin, t_fw = np.array(s['t_vin']), np.array(s['t_fw'])
+    print("%10s %5d %7d %5d %10.0f %10.0f %10.0f %10.0f %10.0f" % (
+      brand, len(t_fw), sum(s['vin_ok']), s['result'].count("good"), t_vin.mean() * 1e3, t_vin.max() * 1e3,
+      t_fw.mean() * 1e3, t_fw.max() * 1e3, sum(s['frames']) / (t_vin.sum() + t_fw.sum())))
+
+  if mismatches:
+    print()
+    print("Mismatches")
+    for candidate, result, candidates in mismatches:
+      print(f"  {candidate}: {result} {candidates}")
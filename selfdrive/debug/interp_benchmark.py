@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+'''
+Times the per cycle table lookups of selfdrive/controls/lib through the
+previous interp implementation, the current interp and precompiled Interp
+objects, on the tables as they are in the tree.
+  $ ./interp_benchmark.py -n 100000
+'''
+import argparse
+import random
+import time
+
+import numpy as np
+
+from common.numpy_fast import Interp, interp
+from selfdrive.controls.lib import fcw, longcontrol, longitudinal_planner as lp
+from selfdrive.controls.lib import dynamic_follow as df
+
+
+def interp_linear_scan(x, xp, fp):
+  """common.numpy_fast.interp before Interp was added, for comparison"""
+  N = len(xp)
+
+  def get_interp(xv):
+    hi = 0
+    while hi < N and xv > xp[hi]:
+      hi += 1
+    low = hi - 1
+    return fp[-1] if hi == N and xv > xp[low] else (
+      fp[0] if hi == 0 else
+      (xv - xp[low]) * (fp[hi] - fp[low]) / (xp[hi] - xp[low]) + fp[low])
+
+  return [get_interp(v) for v in x] if hasattr(x, '__iter__') else get_interp(x)
+
+
+# name, xp, fp and the range of the looked up value
+TABLES = [
+  ("a_cruise_min", lp._A_CRUISE_MIN_BP, lp._A_CRUISE_MIN_V, (0., 40.)),
+  ("a_cruise_max", lp._A_CRUISE_MAX_BP, lp._A_CRUISE_MAX_V, (0., 40.)),
+  ("a_cruise_max_following", lp._A_CRUISE_MAX_BP, lp._A_CRUISE_MAX_V_FOLLOWING, (0., 40.)),
+  ("a_total_max", lp._A_TOTAL_MAX_BP, lp._A_TOTAL_MAX_V, (0., 40.)),
+  ("fcw_a_act", fcw._FCW_A_ACT_BP, fcw._FCW_A_ACT_V, (0., 40.)),
+  ("gb_limit", longcontrol.GdMAX_V, longcontrol.GdMAX_OUT, (0., 40.)),
+  ("df_distance_cost", df._DISTANCE_COST_BP, df._DISTANCE_COST_V, (0.9, 2.7)),
+  ("df_v_rel_mod", [-1, 0, 0.66], [1.15, 1., 0.95], (-1., 0.66)),
+]
+
+
+def timed(f, xs, *args):
+  t = time.perf_counter()
+  for x in xs:
+    f(x, *args)
+  return (time.perf_counter() - t) / len(xs)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark interp on the controls tables")
+  parser.add_argument("-n", type=int, default=100000, help="lookups per table")
+  args = parser.parse_args()
+
+  print("%24s %10s %10s %10s %12s" % ("table", "old [ns]", "interp", "Interp", "array [ns]"))
+  for name, xp, fp, (lo, hi) in TABLES:
+    xs = [random.uniform(lo - 1., hi + 1.) for _ in range(args.n)]
+    f = Interp(xp, fp)
+    assert all(abs(f(x) - interp_linear_scan(x, xp, fp)) < 1e-9 for x in xs[:1000]), f"{name} differs"
+
+    t_old = timed(interp_linear_scan, xs, xp, fp)
+    t_new = timed(interp, xs, xp, fp)
+    t_obj = timed(f, xs)
+    xs_arr = np.array(xs)
+    t = time.perf_counter()
+    f(xs_arr)
+    t_arr = (time.perf_counter() - t) / len(xs)
+    print("%24s %10.0f %10.0f %10.0f %12.1f" % (name, t_old * 1e9, t_new * 1e9, t_obj * 1e9, t_arr * 1e9))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+'''
+Shows where the loop time of the realtime daemons goes. Start openpilot with
+LOOP_PROFILE=1 (or e.g. LOOP_PROFILE=controlsd,plannerd) so the daemons write
+their stats blocks, then run this on the device:
+  root@localhost:/data/openpilot$ selfdrive/debug/loop_profile.py controlsd radard
+The MPC solvers of plannerd write their own blocks (mpc_long1, mpc_long2, mpc_lat)
+with solve times and QP iteration histograms.
+'''
+import argparse
+import json
+import os
+import time
+
+from common.profiler import PROFILE_DIR
+
+DEFAULT_PROCS = ['controlsd', 'plannerd', 'radard', 'locationd', 'mpc_long1', 'mpc_long2', 'mpc_lat']
+
+
+def read_stats(procs):
+  stats = {}
+  for name in procs:
+    try:
+      with open(os.path.join(PROFILE_DIR, name)) as f:
+        stats[name] = json.load(f)
+    except (OSError, ValueError):
+      pass
+  return stats
+
+
+def format_row(name, s, budget=None):
+  row = "%30s: p50 %7.2f  p99 %7.2f  max %7.2f  mean %7.2f" % (name, s['p50'], s['p99'], s['max'], s['mean'])
+  if budget:
+    row += "  p99 budget %3.0f%%" % (s['p99'] / budget * 100.)
+  return row
+
+
+def print_solver_stats(name, s, stale):
+  print("******* %s (pid %d, %d solves, %d resets, warm start %s)%s *******" % (
+        name, s['pid'], s['solves'], s['resets'], "on" if s['warm_start'] else "off", stale))
+  print(format_row("solve [ms]", s['solve']))
+  print("%30s: mean %.2f  %s" % ("qp iterations", s['mean_iterations'],
+                                  "  ".join("%s: %d" % kv for kv in s['iterations'].items())))
+  print()
+
+
+def print_stats(stats, stale_time):
+  now = time.time()
+  for name, s in stats.items():
+    age = now - s['time']
+    stale = "  STALE (%.0f s)" % age if age > stale_time else ""
+    if 'solves' in s:
+      print_solver_stats(name, s, stale)
+      continue
+    print("******* %s (pid %d, %d iterations)%s *******" % (name, s['pid'], s['iterations'], stale))
+    print(format_row("wall [ms]", s['wall'], s['budget']))
+    print(format_row("cpu [ms]", s['cpu'], s['budget']))
+    if s['lag']['n']:
+      print(format_row("lag [ms]", s['lag']) + "  lagged %d" % s['lag']['count'])
+    print("%30s: count %d  total %.2f ms  max %.2f ms" % ("gc", s['gc']['count'], s['gc']['total'], s['gc']['max']))
+    for cp, cs in sorted(s['checkpoints'].items(), key=lambda x: -x[1]['mean']):
+      print(format_row(cp, cs, s['budget']) + ("  IGNORED" if cs['ignored'] else ""))
+    print()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Aggregate loop profiles written by common.profiler.LoopProfiler")
+  parser.add_argument("procs", nargs="*", default=DEFAULT_PROCS, help="process names")
+  parser.add_argument("--interval", type=float, default=5., help="refresh interval in seconds")
+  parser.add_argument("--once", action="store_true", help="print once and exit")
+  args = parser.parse_args()
+
+  while True:
+    stats = read_stats(args.procs)
+    if not stats:
+      print("no stats in %s, is openpilot running with LOOP_PROFILE set?" % PROFILE_DIR)
+    print_stats(stats, 3 * args.interval)
+    if args.once:
+      break
+    time.sleep(args.interval)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+'''
+Monitors rate, jitter, latency and drops of every service in cereal/services.py
+with a single poller and publishes a serviceStats summary once per window.
+Only the logMonoTime and valid fields of the Event header are read, the message
+body is never decoded, so this can keep running on a loaded test bench.
+  root@localhost:/data/openpilot$ selfdrive/debug/service_monitor.py --print
+'''
+import argparse
+import math
+import struct
+
+import cereal.messaging as messaging
+from cereal import log
+from cereal.services import service_list
+from common.realtime import sec_since_boot
+
+IGNORE_SERVICES = ['serviceStats']
+DROP_FACTOR = 1.5  # intervals longer than this many expected intervals count as drops
+
+_event_schema = log.Event.schema
+LOG_MONO_TIME_OFFSET = _event_schema.fields['logMonoTime'].proto.slot.offset * 8  # UInt64 slots
+VALID_BIT_OFFSET = _event_schema.fields['valid'].proto.slot.offset  # Bool slots, default true
+
+
+def read_header(dat):
+  """Returns (logMonoTime, valid) of a serialized Event without decoding it"""
+  # segment table, padded to a word
+  segments = struct.unpack_from('<I', dat, 0)[0] + 1
+  root = (4 * (segments + 1) + 7) & ~7
+
+  # root struct pointer: 30 bit signed offset, then data section size in words
+  ptr, data_words = struct.unpack_from('<IH', dat, root)
+  if ptr & 3 != 0:
+    # not a plain struct pointer, let capnp figure it out
+    with log.Event.from_bytes(dat) as msg:
+      return msg.logMonoTime, msg.valid
+  offset = ptr >> 2
+  if offset & (1 << 29):
+    offset -= 1 << 30
+  data = root + 8 + offset * 8
+  data_len = data_words * 8
+
+  # fields past the end of the data section have their default values
+  log_mono_time = 0
+  if LOG_MONO_TIME_OFFSET + 8 <= data_len:
+    log_mono_time = struct.unpack_from('<Q', dat, data + LOG_MONO_TIME_OFFSET)[0]
+  valid = True
+  if VALID_BIT_OFFSET // 8 < data_len:
+    valid = not (dat[data + VALID_BIT_OFFSET // 8] >> (VALID_BIT_OFFSET % 8)) & 1
+  return log_mono_time, valid
+
+
+class ServiceStats():
+  """Accumulates the stats of one service over a reporting window"""
+  def __init__(self, name, frequency):
+    self.name = name
+    self.frequency = frequency
+    self.expected_interval = 1. / frequency if frequency > 0 else None
+    self.last_log_time = None
+    self.reset()
+
+  def reset(self):
+    self.received = 0
+    self.dropped = 0
+    self.invalid = 0
+    self.intervals = 0
+    self.interval_sum = 0.
+    self.interval_sq_sum = 0.
+    self.max_interval = 0.
+    self.latency_sum = 0.
+    self.max_latency = 0.
+
+  def update(self, log_mono_time, valid, recv_time):
+    """log_mono_time and recv_time in ns since boot"""
+    t = log_mono_time * 1e-9
+    latency = max(0., recv_time * 1e-9 - t)
+
+    self.received += 1
+    self.invalid += not valid
+    self.latency_sum += latency
+    self.max_latency = max(self.max_latency, latency)
+
+    if self.last_log_time is not None:
+      dt = t - self.last_log_time
+      self.intervals += 1
+      self.interval_sum += dt
+      self.interval_sq_sum += dt * dt
+      self.max_interval = max(self.max_interval, dt)
+      if self.expected_interval is not None and dt > DROP_FACTOR * self.expected_interval:
+        self.dropped += int(round(dt / self.expected_interval)) - 1
+    self.last_log_time = t
+
+  def jitter(self):
+    if self.intervals < 2:
+      return 0.
+    mean = self.interval_sum / self.intervals
+    return math.sqrt(max(0., self.interval_sq_sum / self.intervals - mean * mean))
+
+  def fill(self, stat, window):
+    stat.name = self.name
+    stat.expectedFrequency = self.frequency
+    stat.frequency = self.received / window
+    stat.jitterMs = self.jitter() * 1e3
+    stat.maxIntervalMs = self.max_interval * 1e3
+    stat.latencyMs = self.latency_sum / self.received * 1e3 if self.received else 0.
+    stat.maxLatencyMs = self.max_latency * 1e3
+    stat.received = self.received
+    stat.dropped = self.dropped
+    stat.invalid = self.invalid
+
+
+def print_summary(msg):
+  print("%25s %8s %8s %9s %9s %9s %7s %7s" % ("service", "expected", "freq", "jitter", "latency", "max lat", "drops", "invalid"))
+  for s in msg.serviceStats.services:
+    if s.received == 0 and s.expectedFrequency == 0:
+      continue
+    print("%25s %8.2f %8.2f %9.2f %9.2f %9.2f %7d %7d" % (s.name, s.expectedFrequency, s.frequency, s.jitterMs,
+                                                       s.latencyMs, s.maxLatencyMs, s.dropped, s.invalid))
+  print()
+
+
+def service_monitor_thread(services, window, addr="127.0.0.1", print_stats=False):
+  poller = messaging.Poller()
+  sockets = {}
+  stats = {}
+  for name in services:
+    sock = messaging.sub_sock(name, poller=poller, addr=addr)
+    sockets[sock] = name
+    stats[sock] = ServiceStats(name, service_list[name].frequency)
+
+  pm = messaging.PubMaster(['serviceStats'])
+
+  window_start = sec_since_boot()
+  while True:
+    for sock in poller.poll(100):
+      for dat in messaging.drain_sock_raw(sock):
+        log_mono_time, valid = read_header(dat)
+        stats[sock].update(log_mono_time, valid, int(sec_since_boot() * 1e9))
+
+    t = sec_since_boot()
+    if t - window_start >= window:
+      elapsed = t - window_start
+      msg = messaging.new_message('serviceStats')
+      msg.serviceStats.windowSeconds = elapsed
+      stat_list = msg.serviceStats.init('services', len(stats))
+      for i, s in enumerate(stats.values()):
+        s.fill(stat_list[i], elapsed)
+        s.reset()
+      pm.send('serviceStats', msg)
+
+      if print_stats:
+        print_summary(msg)
+      window_start = t
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Monitor rate, jitter, latency and drops of all services")
+  parser.add_argument("services", nargs="*", help="services to monitor, all if empty")
+  parser.add_argument("--window", type=float, default=1., help="reporting window in seconds")
+  parser.add_argument("--addr", default="127.0.0.1")
+  parser.add_argument("--print", dest="print_stats", action="store_true", help="print the summary every window")
+  args = parser.parse_args()
+
+  services = args.services or [s for s in service_list if s not in IGNORE_SERVICES]
+  service_monitor_thread(services, args.window, args.addr, args.print_stats)
+
+
+if __name__ == "__main__":
+  main()
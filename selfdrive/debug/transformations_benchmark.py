@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+'''
+Times the coordinate and orientation conversions of common.transformations per
+row, on 1e3 to 1e7 rows, against calling the scalar version on every row like
+numpy_wrap used to.
+  $ ./transformations_benchmark.py --max-rows 1e6
+'''
+import argparse
+import time
+
+import numpy as np
+
+import common.transformations.coordinates as coord
+import common.transformations.orientation as orient
+import common.transformations.transformations as single
+
+# the scalar versions take ~1 us per row, don't wait minutes for them
+MAX_SCALAR_ROWS = 100000
+
+
+def per_row(f, *args):
+  rows = len(args[-1])
+  t = time.perf_counter()
+  f(*args)
+  return (time.perf_counter() - t) / rows * 1e9
+
+
+def scalar_rows(f):
+  return lambda *args: [f(*args[:-1], x) for x in args[-1]]
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark batched coordinate and orientation conversions")
+  parser.add_argument("--max-rows", type=float, default=1e7, help="largest number of rows")
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(0)
+  lc = coord.LocalCoord.from_geodetic([37.4, -122.1, 0.])
+  print("%23s %10s %14s %15s %8s" % ("", "rows", "batch [ns/row]", "scalar [ns/row]", "speedup"))
+  for rows in np.logspace(3, np.log10(args.max_rows), int(np.log10(args.max_rows)) - 2).astype(int):
+    euler = rng.uniform(-np.pi, np.pi, (rows, 3))
+    geodetic = np.column_stack([rng.uniform(-80, 80, rows), rng.uniform(-180, 180, rows), rng.uniform(-100, 3000, rows)])
+    quats = orient.euler2quat(euler)
+    rots = orient.euler2rot(euler)
+    ecef = coord.geodetic2ecef(geodetic)
+
+    cases = [
+      ("euler2quat", orient.euler2quat, single.euler2quat_single, (euler,)),
+      ("quat2euler", orient.quat2euler, single.quat2euler_single, (quats,)),
+      ("quat2rot", orient.quat2rot, single.quat2rot_single, (quats,)),
+      ("rot2quat", orient.rot2quat, single.rot2quat_single, (rots,)),
+      ("euler2rot", orient.euler2rot, single.euler2rot_single, (euler,)),
+      ("rot2euler", orient.rot2euler, single.rot2euler_single, (rots,)),
+      ("ecef_euler_from_ned", orient.ecef_euler_from_ned, single.ecef_euler_from_ned_single, (ecef[0], euler)),
+      ("ned_euler_from_ecef", orient.ned_euler_from_ecef, single.ned_euler_from_ecef_single, (ecef[0], euler)),
+      ("geodetic2ecef", coord.geodetic2ecef, single.geodetic2ecef_single, (geodetic,)),
+      ("ecef2geodetic", coord.ecef2geodetic, single.ecef2geodetic_single, (ecef,)),
+      ("LocalCoord.ecef2ned", lc.ecef2ned, lc.ecef2ned_single, (ecef,)),
+      ("LocalCoord.geodetic2ned", lc.geodetic2ned, lc.geodetic2ned_single, (geodetic,)),
+    ]
+    for name, batched, scalar, inputs in cases:
+      t_batch = per_row(batched, *inputs)
+      if rows <= MAX_SCALAR_ROWS:
+        t_scalar = per_row(scalar_rows(scalar), *inputs)
+        print("%23s %10d %14.1f %15.1f %7.1fx" % (name, rows, t_batch, t_scalar, t_scalar / t_batch))
+      else:
+        print("%23s %10d %14.1f %15s %8s" % (name, rows, t_batch, "-", "-"))
+    print()
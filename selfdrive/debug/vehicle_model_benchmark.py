@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+'''
+Times the vehicle model over a grid of speeds and steering angles, once
+point by point through the scalar functions and once through the batch ones.
+  $ ./vehicle_model_benchmark.py --speeds 200 --angles 200
+'''
+import argparse
+import time
+
+import numpy as np
+
+from selfdrive.car.car_helpers import interfaces
+from selfdrive.car.toyota.values import CAR as TOYOTA
+from selfdrive.controls.lib.vehicle_model import VehicleModel
+
+
+def timed(f):
+  t = time.perf_counter()
+  res = f()
+  return res, time.perf_counter() - t
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark scalar and batch vehicle model")
+  parser.add_argument("--car", default=TOYOTA.COROLLA, help="car fingerprint to take the parameters of")
+  parser.add_argument("--speeds", type=int, default=200, help="number of speeds")
+  parser.add_argument("--angles", type=int, default=200, help="number of steering angles")
+  args = parser.parse_args()
+
+  CarInterface = interfaces[args.car][0]
+  VM = VehicleModel(CarInterface.get_params(args.car))
+  u = np.linspace(0., 40., args.speeds)
+  sa = np.radians(np.linspace(-90., 90., args.angles))
+
+  cases = [
+    ("steady_state_sol",
+     lambda: np.array([[VM.steady_state_sol(a, v)[:, 0] for v in u] for a in sa]),
+     lambda: VM.steady_state_sol_batch(sa[:, None], u[None, :])),
+    ("calc_curvature",
+     lambda: np.array([[VM.calc_curvature(a, v) for v in u] for a in sa]),
+     lambda: VM.calc_curvature(sa[:, None], u[None, :])),
+    ("curvature_factor",
+     lambda: np.array([VM.curvature_factor(v) for v in u]),
+     lambda: VM.curvature_factor(u)),
+  ]
+
+  for name, scalar, batch in cases:
+    ref, t_scalar = timed(scalar)
+    res, t_batch = timed(batch)
+    assert np.allclose(ref, res), f"{name} differs"
+    n = ref.shape[0] * ref.shape[1] if ref.ndim > 1 else ref.shape[0]
+    print("%-17s %7d points  scalar %8.2f ms  batch %7.3f ms  %.0fx" %
+          (name, n, t_scalar * 1e3, t_batch * 1e3, t_scalar / max(t_batch, 1e-9)))
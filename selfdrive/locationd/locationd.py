@@ -5,6 +5,7 @@ import sympy as sp
 import cereal.messaging as messaging
 from cereal import log
 from common.params import Params
+from common.profiler import LoopProfiler
 import common.transformations.coordinates as coord
 from common.transformations.orientation import ecef_euler_from_ned, \
                                                euler_from_quat, \
@@ -300,9 +301,11 @@ def locationd_thread(sm, pm, disabled_logs=None):
 
   params = Params()
   localizer = Localizer(disabled_logs=disabled_logs)
+  prof = LoopProfiler('locationd')
 
   while True:
     sm.update()
+    prof.start()
 
     for sock, updated in sm.updated.items():
       if updated and sm.valid[sock]:
@@ -317,6 +320,7 @@ def locationd_thread(sm, pm, disabled_logs=None):
           localizer.handle_cam_odo(t, sm[sock])
         elif sock == "liveCalibration":
           localizer.handle_live_calib(t, sm[sock])
+    prof.checkpoint("Handle inputs")
 
     if sm.updated['cameraOdometry']:
       t = sm.logMonoTime['cameraOdometry']
@@ -338,6 +342,9 @@ def locationd_thread(sm, pm, disabled_logs=None):
           'altitude': msg.liveLocationKalman.positionGeodetic.value[2],
         }
         params.put("LastGPSPosition", json.dumps(location))
+      prof.checkpoint("Publish")
+
+    prof.end()
 
 
 def main(sm=None, pm=None):
@@ -18,6 +18,9 @@ static kj::Array<capnp::word> build_boot_log() {
 
   std::string launchLog = util::read_file("/tmp/launch_log");
   boot.setLaunchLog(capnp::Text::Reader(launchLog.data(), launchLog.size()));
+
+  std::string timeline = util::read_file("/tmp/boot_timeline");
+  boot.setTimeline(capnp::Text::Reader(timeline.data(), timeline.size()));
   return capnp::messageToFlatArray(msg);
 }
 
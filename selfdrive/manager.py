@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 import datetime
+import compileall
 import importlib
+import importlib.util
+import json
 import os
 import sys
 import fcntl
@@ -13,8 +16,9 @@ import time
 import traceback
 from common.op_params import opParams
 
-from multiprocessing import Process
-from typing import Dict
+from multiprocessing import Pool, Process
+from pathlib import Path
+from typing import Dict, List, Tuple
 
 from common.basedir import BASEDIR
 from common.spinner import Spinner
@@ -34,6 +38,20 @@ WEBCAM = os.getenv("WEBCAM") is not None
 PREBUILT = os.path.exists(os.path.join(BASEDIR, 'prebuilt'))
 KILL_UPDATED = opParams().get('update_behavior').lower().strip() == 'off' or os.path.exists('/data/no_ota_updates')
 
+# written by manager, included in the boot log by loggerd/bootlog
+BOOT_TIMELINE_PATH = "/tmp/boot_timeline"
+# source and bytecode state of the last successful process preparation
+PREPARE_CACHE_PATH = os.getenv("PREPARE_CACHE", os.path.join(str(Path.home()), ".comma", "prepare_cache") if PC else "/data/prepare_cache")
+
+# (name, start, duration), start is seconds since boot
+boot_timeline: List[Tuple[str, float, float]] = []
+def record_boot_event(name, start, end=None):
+  end = time.monotonic() if end is None else end
+  boot_timeline.append((name, start, end - start))
+
+_t = time.monotonic()
+record_boot_event("manager start", _t, _t)
+
 
 def unblock_stdout():
   # get a non-blocking stdout
@@ -142,12 +160,15 @@ def build():
       break
 
 if __name__ == "__main__" and not PREBUILT:
+  build_start = time.monotonic()
   build()
+  record_boot_event("build", build_start)
 
 import cereal.messaging as messaging
 from cereal import log
 
 from common.params import Params
+from common.realtime import DT_TRML, sec_since_boot
 from selfdrive.registration import register
 from selfdrive.launcher import launcher
 
@@ -192,6 +213,12 @@ running: Dict[str, Process] = {}
 def get_running():
   return running
 
+start_times: Dict[str, float] = {}
+restart_counts: Dict[str, int] = {}
+restart_at: Dict[str, float] = {}
+exit_codes: Dict[str, int] = {}
+child_exited = False
+
 # due to qualcomm kernel bugs SIGKILLing camerad sometimes causes page table corruption
 unkillable_processes = ['camerad']
 
@@ -266,6 +293,22 @@ else:
     'sensord',
   ]
 
+# processes are started after the processes they depend on and killed before them
+process_dependencies = {
+  'modeld': ['camerad'],
+  'dmonitoringmodeld': ['camerad'],
+  'dmonitoringd': ['dmonitoringmodeld'],
+  'plannerd': ['controlsd'],
+  'radard': ['controlsd'],
+  'paramsd': ['controlsd'],
+}
+
+# crashed processes are restarted after an exponential backoff
+RESTART_BACKOFF_MIN = 0.5  # s
+RESTART_BACKOFF_MAX = 30.  # s
+RESTART_BACKOFF_RESET = 60.  # s, a process that ran this long restarts without backoff
+SUPERVISOR_TICK_MS = 100
+
 def register_managed_process(name, desc, car_started=False):
   global managed_processes, car_started_processes, persistent_processes
   managed_processes[name] = desc
@@ -293,6 +336,7 @@ def start_managed_process(name):
     cloudlog.info("starting process %s" % name)
     running[name] = Process(name=name, target=nativelauncher, args=(pargs, cwd))
   running[name].start()
+  start_times[name] = time.monotonic()
 
 def start_daemon_process(name):
   params = Params()
@@ -337,6 +381,69 @@ def prepare_managed_process(p, build=False):
       subprocess.check_call(["scons", "-u", "-j4", "."], cwd=os.path.join(BASEDIR, proc[0]))
 
 
+def module_files(modules):
+  files = {}
+  for mod in modules:
+    path = getattr(mod, "__file__", None)
+    if path is not None and path.startswith(BASEDIR) and path.endswith(".py"):
+      st = os.stat(path)
+      files[path] = [st.st_mtime_ns, st.st_size]
+  return files
+
+
+def compile_worker(path):
+  """Compiles a source file to bytecode in a pool worker, when it's out of date"""
+  compileall.compile_file(path, quiet=2)
+
+
+def read_prepare_cache():
+  try:
+    with open(PREPARE_CACHE_PATH) as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return None
+
+
+def prepare_cache_valid(procs):
+  """True if the sources imported by the last prepare and their bytecode are unchanged"""
+  cache = read_prepare_cache()
+  if cache is None:
+    return False
+
+  if cache.get("version") != version or sorted(cache.get("processes", [])) != sorted(procs):
+    return False
+
+  for path, (mtime_ns, size) in cache["files"].items():
+    try:
+      st = os.stat(path)
+      pyc = os.stat(importlib.util.cache_from_source(path))
+    except OSError:
+      return False
+    if st.st_mtime_ns != mtime_ns or st.st_size != size or pyc.st_mtime_ns < mtime_ns:
+      return False
+  return True
+
+
+def write_prepare_cache(procs, files):
+  try:
+    os.makedirs(os.path.dirname(PREPARE_CACHE_PATH), exist_ok=True)
+    with open(PREPARE_CACHE_PATH + ".tmp", "w") as f:
+      json.dump({"version": version, "processes": procs, "files": files}, f)
+    os.replace(PREPARE_CACHE_PATH + ".tmp", PREPARE_CACHE_PATH)
+  except OSError:
+    cloudlog.exception("failed to write prepare cache")
+
+
+def write_boot_timeline():
+  timeline = [{"name": n, "start": start, "duration": duration} for n, start, duration in boot_timeline]
+  cloudlog.event("boot timeline", timeline=timeline)
+  try:
+    with open(BOOT_TIMELINE_PATH, "w") as f:
+      json.dump(timeline, f)
+  except OSError:
+    cloudlog.exception("failed to write boot timeline")
+
+
 def join_process(process, timeout):
   # Process().join(timeout) will hang due to a python 3 bug: https://bugs.python.org/issue28382
   # We have to poll the exitcode instead
@@ -345,34 +452,31 @@ def join_process(process, timeout):
     time.sleep(0.001)
 
 
-def kill_managed_process(name, retry=True):
-  if name not in running or name not in managed_processes:
-    return
+def signal_kill(name):
   cloudlog.info(f"killing {name}")
-
   if running[name].exitcode is None:
     sig = signal.SIGKILL if name in kill_processes else signal.SIGINT
     os.kill(running[name].pid, sig)
 
-    join_process(running[name], 5)
-
-    if running[name].exitcode is None:
-      if not retry:
-        raise Exception(f"{name} failed to die")
-
-      if name in unkillable_processes:
-        cloudlog.critical("unkillable process %s failed to exit! rebooting in 15 if it doesn't die" % name)
-        join_process(running[name], 15)
-        if running[name].exitcode is None:
-          cloudlog.critical("unkillable process %s failed to die!" % name)
-          os.system("date >> /data/unkillable_reboot")
-          os.sync()
-          HARDWARE.reboot()
-          raise RuntimeError
-      else:
-        cloudlog.info("killing %s with SIGKILL" % name)
-        os.kill(running[name].pid, signal.SIGKILL)
-        running[name].join()
+
+def finish_kill(name, retry):
+  if running[name].exitcode is None:
+    if not retry:
+      raise Exception(f"{name} failed to die")
+
+    if name in unkillable_processes:
+      cloudlog.critical("unkillable process %s failed to exit! rebooting in 15 if it doesn't die" % name)
+      join_process(running[name], 15)
+      if running[name].exitcode is None:
+        cloudlog.critical("unkillable process %s failed to die!" % name)
+        os.system("date >> /data/unkillable_reboot")
+        os.sync()
+        HARDWARE.reboot()
+        raise RuntimeError
+    else:
+      cloudlog.info("killing %s with SIGKILL" % name)
+      os.kill(running[name].pid, signal.SIGKILL)
+      running[name].join()
 
   ret = running[name].exitcode
   cloudlog.info(f"{name} is dead with {ret}")
@@ -380,6 +484,29 @@ def kill_managed_process(name, retry=True):
   return ret
 
 
+def kill_managed_process(name, retry=True):
+  if name not in running or name not in managed_processes:
+    return
+
+  signal_kill(name)
+  join_process(running[name], 5)
+  return finish_kill(name, retry)
+
+
+def kill_managed_processes(names, retry=True):
+  """Kills processes concurrently, dependents are signaled before their dependencies"""
+  names = [p for p in reversed(dependency_order(names)) if p in running and p in managed_processes]
+  for p in names:
+    signal_kill(p)
+
+  t = time.time()
+  while time.time() - t < 5 and any(running[p].exitcode is None for p in names):
+    time.sleep(0.001)
+
+  for p in names:
+    finish_kill(p, retry)
+
+
 def cleanup_all_processes(signal, frame):
   cloudlog.info("caught ctrl-c %s %s" % (signal, frame))
 
@@ -400,6 +527,97 @@ def send_managed_process_signal(name, sig):
   os.kill(running[name].pid, sig)
 
 
+# ****************** supervision ******************
+
+def sigchld_handler(signum, frame):
+  global child_exited
+  child_exited = True
+
+
+def dependency_order(names):
+  """Orders processes so that every process comes after the ones it depends on"""
+  order = []
+
+  def visit(name, stack):
+    if name in order:
+      return
+    if name in stack:
+      raise ValueError(f"circular process dependency: {stack + [name]}")
+    for dep in process_dependencies.get(name, []):
+      if dep in names:
+        visit(dep, stack + [name])
+    order.append(name)
+
+  for name in names:
+    visit(name, [])
+  return order
+
+
+def wanted_processes(started, logger_dead, driver_view):
+  wanted = list(persistent_processes)
+  if started:
+    wanted += [p for p in car_started_processes if not (p == "loggerd" and logger_dead)]
+  elif driver_view:
+    wanted += driver_view_processes
+  return [p for p in dependency_order(wanted) if p in managed_processes]
+
+
+def reap_dead_processes(wanted):
+  """Removes processes that exited on their own and schedules a restart for the wanted ones"""
+  now = time.monotonic()
+  for name in list(running):
+    exitcode = running[name].exitcode
+    if exitcode is None:
+      continue
+
+    del running[name]
+    exit_codes[name] = exitcode
+    if name not in wanted:
+      restart_at.pop(name, None)
+      continue
+
+    if now - start_times.get(name, now) > RESTART_BACKOFF_RESET:
+      restart_counts[name] = 0
+    delay = min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_MIN * 2 ** restart_counts.get(name, 0))
+    restart_counts[name] = restart_counts.get(name, 0) + 1
+    restart_at[name] = now + delay
+    cloudlog.error(f"{name} died with {exitcode}, restarting in {delay:.1f}s")
+
+
+def sync_processes(wanted):
+  """Kills unwanted processes and starts wanted ones that aren't backing off"""
+  kill_managed_processes([p for p in running if p not in wanted])
+
+  # a pending restart would otherwise keep the main loop syncing on every tick
+  for p in list(restart_at):
+    if p not in wanted:
+      del restart_at[p]
+
+  now = time.monotonic()
+  for p in wanted:
+    if p not in running and restart_at.get(p, 0.) <= now:
+      restart_at.pop(p, None)
+      start_managed_process(p)
+
+
+def manager_state_key():
+  return tuple((p, running[p].pid) for p in running), tuple(exit_codes.items())
+
+
+def build_manager_state():
+  msg = messaging.new_message('managerState')
+  states = msg.managerState.init('processes', len(managed_processes))
+  for state, p in zip(states, managed_processes):
+    state.name = p
+    if p in running:
+      state.running = running[p].is_alive()
+      state.pid = running[p].pid
+      state.exitCode = running[p].exitcode or 0
+    elif p in exit_codes:
+      state.exitCode = exit_codes[p]
+  return msg
+
+
 # ****************** run loop ******************
 
 def manager_init():
@@ -442,6 +660,7 @@ def manager_thread():
   cloudlog.info({"environ": os.environ})
 
   # save boot log
+  write_boot_timeline()
   subprocess.call("./bootlog", cwd=os.path.join(BASEDIR, "selfdrive/loggerd"))
 
   # start daemon processes
@@ -465,80 +684,112 @@ def manager_thread():
     for k in os.getenv("BLOCK").split(","):
       del managed_processes[k]
 
+  started = False
   started_prev = False
   logger_dead = False
+  driver_view = False
   params = Params()
-  device_state_sock = messaging.sub_sock('deviceState')
+  device_state_sock = messaging.sub_sock('deviceState', timeout=SUPERVISOR_TICK_MS)
   pm = messaging.PubMaster(['managerState'])
 
+  # handle child exits on the next tick instead of waiting for the next deviceState
+  global child_exited
+  signal.signal(signal.SIGCHLD, sigchld_handler)
+
+  wanted = wanted_processes(started, logger_dead, driver_view)
+  manager_state = None
+  manager_state_key_prev = None
+  last_manager_state_t = 0.
+
   while 1:
+    # a signal interrupting the blocking receive makes it exit the process, SIGCHLD is
+    # held back while waiting and handled when it's unblocked
+    signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGCHLD])
     msg = messaging.recv_sock(device_state_sock, wait=True)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, [signal.SIGCHLD])
+    now = time.monotonic()
+
+    sync = any(t <= now for t in restart_at.values())
+    if child_exited or msg is not None:
+      child_exited = False
+      reap_dead_processes(wanted)
+      sync = True
+
+    if msg is not None:
+      started = msg.deviceState.started
+      if started:
+        if msg.deviceState.freeSpacePercent < 5 or msg.deviceState.thermalStatus >= ThermalStatus.red:
+          logger_dead = True
+      else:
+        logger_dead = False
+        driver_view = params.get("IsDriverViewEnabled") == b"1"
+
+        # Exit main loop when uninstall is needed
+        if params.get("DoUninstall", encoding='utf8') == "1":
+          break
 
-    if msg.deviceState.freeSpacePercent < 5 or msg.deviceState.thermalStatus >= ThermalStatus.red:
-      logger_dead = True
+      wanted = wanted_processes(started, logger_dead, driver_view)
 
-    run_all = False
-    if msg.deviceState.started or run_all:
-      for p in car_started_processes:
-        if p == "loggerd" and logger_dead:
-          kill_managed_process(p)
-        else:
-          start_managed_process(p)
-    else:
-      logger_dead = False
-      driver_view = params.get("IsDriverViewEnabled") == b"1"
+    if sync:
+      sync_processes(wanted)
 
-      # TODO: refactor how manager manages processes
-      for p in reversed(car_started_processes):
-        if p not in driver_view_processes or not driver_view:
-          kill_managed_process(p)
+    if started and not started_prev:
+      cloudlog.event("car processes started", boot_time=time.monotonic())
 
-      for p in driver_view_processes:
-        if driver_view:
-          start_managed_process(p)
-        else:
-          kill_managed_process(p)
+    # trigger an update after going offroad
+    if started_prev and not started:
+      os.sync()
+      send_managed_process_signal("updated", signal.SIGHUP)
+    started_prev = started
 
-      # trigger an update after going offroad
-      if started_prev:
-        os.sync()
-        send_managed_process_signal("updated", signal.SIGHUP)
-
-    started_prev = msg.deviceState.started
-
-    # check the status of all processes, did any of them die?
-    running_list = ["%s%s\u001b[0m" % ("\u001b[32m" if running[p].is_alive() else "\u001b[31m", p) for p in running]
-    cloudlog.debug(' '.join(running_list))
-
-    # send managerState
-    states = []
-    for p in managed_processes:
-      state = log.ManagerState.ProcessState.new_message()
-      state.name = p
-      if p in running:
-        state.running = running[p].is_alive()
-        state.pid = running[p].pid
-        state.exitCode = running[p].exitcode or 0
-      states.append(state)
-    msg = messaging.new_message('managerState')
-    msg.managerState.processes = states
-    pm.send('managerState', msg)
-
-    # Exit main loop when uninstall is needed
-    if params.get("DoUninstall", encoding='utf8') == "1":
-      break
+    # send managerState, rebuilt only when a process started or died
+    key = manager_state_key()
+    if key != manager_state_key_prev:
+      manager_state_key_prev = key
+      manager_state = build_manager_state()
+      running_list = ["%s%s\u001b[0m" % ("\u001b[32m" if running[p].is_alive() else "\u001b[31m", p) for p in running]
+      cloudlog.debug(' '.join(running_list))
+    elif now - last_manager_state_t < DT_TRML:
+      continue
+
+    manager_state.logMonoTime = int(sec_since_boot() * 1e9)
+    pm.send('managerState', manager_state)
+    last_manager_state_t = now
 
 def manager_prepare():
   # build all processes
   os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
   total = 100.0 - (0 if PREBUILT else MAX_BUILD_PROGRESS)
-
-  for i, p in enumerate(managed_processes):
+  prepare_start = time.monotonic()
+
+  python_procs = [p for p in managed_processes if isinstance(managed_processes[p], str)]
+  cache_valid = prepare_cache_valid(python_procs)
+  cache = read_prepare_cache()
+  if not cache_valid and cache is not None:
+    # compile the bytecode of the sources imported last time in parallel, the
+    # preimport below only has to load it. Only compiling is done in the pool, the
+    # modules are imported by manager so the processes it forks share them.
+    compile_start = time.monotonic()
+    with Pool(os.cpu_count()) as pool:
+      pool.map(compile_worker, [f for f in cache.get("files", {}) if os.path.isfile(f)], chunksize=16)
+    record_boot_event("compile", compile_start)
+
+  for i, p in enumerate(python_procs):
+    start = time.monotonic()
     prepare_managed_process(p)
-    perc = (100.0 - total) + total * (i + 1) / len(managed_processes)
+    record_boot_event(f"prepare {p}", start)
+    perc = (100.0 - total) + total * (i + 1) / len(python_procs)
     spinner.update_progress(perc, 100.)
 
+  if not cache_valid:
+    write_prepare_cache(python_procs, module_files(list(sys.modules.values())))
+
+  for p in managed_processes:
+    if p not in python_procs:
+      prepare_managed_process(p)
+  record_boot_event("prepare", prepare_start)
+
 def main():
   params = Params()
   params.manager_start()
@@ -575,7 +826,9 @@ def main():
 
   if EON:
     update_apks()
+  init_start = time.monotonic()
   manager_init()
+  record_boot_event("manager init", init_start)
   manager_prepare()
 
   if os.getenv("PREPAREONLY") is not None:
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+'''
+Replays the recorded lead and ego states of drives through plannerd and reports
+the solve time percentiles and QP iterations of the longitudinal and lateral
+MPCs, once solved from the previous solution as is and once warm started from
+the shifted previous solution.
+  $ ./mpc_benchmark.py -j 8 rlog1.bz2 rlog2.bz2
+'''
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+MODES = {"cold": "0", "warm": "1"}
+
+
+def init_worker():
+  # params are read from $HOME/.comma/params on PC, give every worker its own
+  os.environ['HOME'] = tempfile.mkdtemp()
+
+
+def run_replay(args):
+  log_path, mode = args
+  os.environ['MPC_WARM_START'] = MODES[mode]
+
+  # imported in the worker, after the environment is set up
+  from selfdrive.controls.lib.mpc_solver import MpcSolver
+  from selfdrive.test.process_replay.process_replay import CONFIGS_BY_NAME, load_msgs, replay_process
+  from tools.lib.logreader import LogReader
+
+  solvers = []
+  solver_init = MpcSolver.__init__
+
+  def recording_init(self, *a, **kw):
+    # keep every solve instead of a window
+    solver_init(self, *a, **dict(kw, window=None))
+    solvers.append(self)
+
+  MpcSolver.__init__ = recording_init
+
+  replay_process(CONFIGS_BY_NAME['plannerd'], load_msgs(LogReader(log_path)))
+  return log_path, mode, [s.stats() for s in solvers]
+
+
+def format_stats(mode, s):
+  return "%10s %s: %6d solves  p50 %6.3f ms  p99 %6.3f ms  max %7.3f ms  mean %6.3f ms  its %5.2f  resets %d" % (
+         s['name'], mode, s['solves'], s['solve']['p50'], s['solve']['p99'], s['solve']['max'], s['solve']['mean'],
+         s['mean_iterations'], s['resets'])
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark the planner MPCs on replayed drives")
+  parser.add_argument("logs", nargs="+", help="rlog paths")
+  parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="start modes to compare")
+  parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="parallel workers")
+  args = parser.parse_args()
+
+  jobs = [(log_path, mode) for log_path in args.logs for mode in args.modes]
+  results = {}
+  ctx = multiprocessing.get_context("spawn")
+  with ctx.Pool(args.jobs, initializer=init_worker, maxtasksperchild=1) as pool:
+    for log_path, mode, stats in pool.imap_unordered(run_replay, jobs):
+      results[(log_path, mode)] = stats
+
+  for log_path in args.logs:
+    print(os.path.basename(log_path))
+    rows = [(mode, s) for mode in args.modes for s in results[(log_path, mode)]]
+    for mode, s in sorted(rows, key=lambda r: r[1]['name']):
+      print(format_stats(mode, s))
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+import importlib
+import os
+import time
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+import cereal.messaging as messaging
+from cereal import log
+from common.params import Params
+
+ProcessConfig = namedtuple('ProcessConfig', ['proc_name', 'module', 'subs', 'pubs', 'triggers', 'sockets'])
+
+CONFIGS = [
+  ProcessConfig(
+    proc_name="controlsd",
+    module="selfdrive.controls.controlsd",
+    subs=['deviceState', 'pandaState', 'modelV2', 'liveCalibration', 'driverMonitoringState', 'longitudinalPlan',
+          'lateralPlan', 'liveLocationKalman', 'roadCameraState', 'driverCameraState', 'managerState',
+          'liveParameters', 'radarState'],
+    pubs=['sendcan', 'controlsState', 'carState', 'carControl', 'carEvents', 'carParams'],
+    triggers=['can'],
+    sockets=['can'],
+  ),
+  ProcessConfig(
+    proc_name="radard",
+    module="selfdrive.controls.radard",
+    subs=['modelV2', 'carState'],
+    pubs=['radarState', 'liveTracks'],
+    triggers=['can'],
+    sockets=['can'],
+  ),
+  ProcessConfig(
+    proc_name="plannerd",
+    module="selfdrive.controls.plannerd",
+    subs=['carState', 'controlsState', 'radarState', 'modelV2', 'liveParameters', 'modelLongButton'],
+    pubs=['longitudinalPlan', 'liveLongitudinalMpc', 'lateralPlan', 'liveMpc'],
+    triggers=['radarState', 'modelV2'],
+    sockets=[],
+  ),
+]
+CONFIGS_BY_NAME = {cfg.proc_name: cfg for cfg in CONFIGS}
+
+# fields that depend on wall time and never match between runs
+IGNORE_FIELDS = ['logMonoTime', 'controlsState.startMonoTime', 'controlsState.cumLagMs', 'radarState.cumLagMs',
+                 'liveLongitudinalMpc.calculationTime', 'liveMpc.calculationTime']
+
+
+class ReplayDone(Exception):
+  pass
+
+
+class ReplayFeeder():
+  """Hands out the logged messages in logMonoTime order, one trigger message at a time"""
+  def __init__(self, msgs, cfg):
+    self.msgs = msgs
+    self.triggers = set(cfg.triggers)
+    self.idx = 0
+    self.cur_time = msgs[0][0] * 1e-9 if len(msgs) else 0.
+    self.sm = None
+    self.sockets = {}
+    self.step_start = None
+    self.step_times = []
+
+  def first(self, service):
+    return next((dat for _, s, dat in self.msgs if s == service), None)
+
+  def advance(self):
+    # time spent since the last trigger is the cost of one step of the process
+    t = time.perf_counter()
+    if self.step_start is not None:
+      self.step_times.append(t - self.step_start)
+
+    while self.idx < len(self.msgs):
+      log_mono_time, service, dat = self.msgs[self.idx]
+      self.idx += 1
+      self.cur_time = log_mono_time * 1e-9
+
+      if service in self.sockets:
+        self.sockets[service].data.append(dat)
+      elif self.sm is not None and service in self.sm.data:
+        self.sm.pending.append(log.Event.from_bytes(dat))
+
+      if service in self.triggers:
+        self.step_start = time.perf_counter()
+        return
+    raise ReplayDone
+
+
+class FakeSocket():
+  def __init__(self, feeder=None, init_msg=None):
+    self.feeder = feeder
+    self.init_msg = init_msg
+    self.data = []
+
+  def receive(self, non_blocking=False):
+    if not len(self.data) and not non_blocking:
+      if self.init_msg is not None:
+        # blocking reads of sockets that aren't fed, e.g. waiting for pandaState on init
+        return self.init_msg
+      self.feeder.advance()
+    return self.data.pop(0) if len(self.data) else None
+
+  def setTimeout(self, timeout):
+    pass
+
+
+class FakeSubMaster(messaging.SubMaster):
+  def __init__(self, services, feeder):
+    super().__init__(services, addr=None)
+    self.feeder = feeder
+    self.sock = {s: FakeSocket(feeder, feeder.first(s)) for s in services}
+    self.pending = []
+    # the process waits on the submaster unless it is driven by a socket
+    self.drives = not len(feeder.sockets) and len(feeder.triggers & set(services)) > 0
+
+  def update(self, timeout=1000):
+    if self.drives and timeout != 0:
+      self.feeder.advance()
+    msgs, self.pending = self.pending, []
+    self.update_msgs(self.feeder.cur_time, msgs)
+
+
+class FakePubMaster():
+  def __init__(self, services):
+    self.sock = {s: FakeSocket() for s in services}
+    self.outputs = []
+
+  def send(self, s, dat):
+    if not isinstance(dat, bytes):
+      dat = dat.to_bytes()
+    self.outputs.append((s, dat))
+
+
+def load_msgs(lr):
+  """(logMonoTime, service, bytes) of every message in a log, sorted by logMonoTime"""
+  msgs = []
+  for msg in lr:
+    try:
+      service = msg.which()
+    except Exception:
+      continue
+    msgs.append((msg.logMonoTime, service, msg.as_builder().to_bytes()))
+  return sorted(msgs, key=lambda m: m[0])
+
+
+def setup_env(msgs):
+  car_params = next((dat for _, s, dat in msgs if s == 'carParams'), None)
+  if car_params is None:
+    raise Exception("log has no carParams")
+
+  with log.Event.from_bytes(car_params) as evt:
+    CP = evt.carParams
+    os.environ['FINGERPRINT'] = CP.carFingerprint
+    os.environ['SKIP_FW_QUERY'] = "1"
+    Params().put("CarParams", CP.as_builder().to_bytes())
+  os.environ['NO_CAN_TIMEOUT'] = "1"
+
+
+def replay_process(cfg, msgs):
+  """Runs a process over the messages as fast as possible.
+  Returns the published (service, bytes) and the duration of every step."""
+  setup_env(msgs)
+  inputs = [m for m in msgs if m[1] in cfg.subs or m[1] in cfg.sockets]
+
+  feeder = ReplayFeeder(inputs, cfg)
+  feeder.sockets = {s: FakeSocket(feeder) for s in cfg.sockets}
+  sm = FakeSubMaster(cfg.subs, feeder)
+  feeder.sm = sm
+  pm = FakePubMaster(cfg.pubs)
+
+  mod = importlib.import_module(cfg.module)
+  try:
+    if len(cfg.sockets):
+      mod.main(sm, pm, feeder.sockets[cfg.sockets[0]])
+    else:
+      mod.main(sm, pm)
+  except ReplayDone:
+    pass
+  return pm.outputs, np.array(feeder.step_times)
+
+
+def flatten(d, prefix, out):
+  if isinstance(d, dict):
+    for k, v in d.items():
+      flatten(v, f"{prefix}.{k}", out)
+  elif isinstance(d, list):
+    for i, v in enumerate(d):
+      flatten(v, f"{prefix}[{i}]", out)
+  elif isinstance(d, (bytes, bytearray)):
+    out[prefix] = d.hex()
+  else:
+    out[prefix] = d
+
+
+def to_columns(outputs, ignore=IGNORE_FIELDS):
+  """Turns published messages into one array per field, numeric fields as float with nan for missing values"""
+  rows = defaultdict(list)
+  for s, dat in outputs:
+    with log.Event.from_bytes(dat) as evt:
+      row = {}
+      flatten(getattr(evt, s).to_dict(), s, row)
+      row[f"{s}.valid"] = evt.valid
+      rows[s].append(row)
+
+  columns = {}
+  for s, service_rows in rows.items():
+    keys = set().union(*service_rows)
+    for k in keys:
+      if k in ignore or k.split('.', 1)[-1] in ignore:
+        continue
+      vals = [r.get(k) for r in service_rows]
+      if all(isinstance(v, (bool, int, float)) or v is None for v in vals):
+        columns[k] = np.array([np.nan if v is None else float(v) for v in vals])
+      else:
+        columns[k] = np.array([str(v) for v in vals])
+  return columns
+
+
+def compare_columns(ref, new, tolerance=1e-5):
+  """Returns a list of (field, reason) for every field that differs"""
+  diffs = []
+  for k in sorted(set(ref) | set(new)):
+    if k not in ref or k not in new:
+      diffs.append((k, "missing in " + ("ref" if k not in ref else "new")))
+    elif ref[k].shape != new[k].shape:
+      diffs.append((k, f"length {ref[k].shape[0]} != {new[k].shape[0]}"))
+    elif ref[k].dtype.kind == 'f' and new[k].dtype.kind == 'f':
+      err = np.abs(ref[k] - new[k])
+      nan_mismatch = np.isnan(ref[k]) != np.isnan(new[k])
+      if np.any(nan_mismatch) or np.nanmax(err, initial=0.) > tolerance:
+        idx = int(np.argmax(nan_mismatch | (np.nan_to_num(err) > tolerance)))
+        diffs.append((k, f"first diff at {idx}: {ref[k][idx]} != {new[k][idx]}"))
+    elif np.any(ref[k].astype(str) != new[k].astype(str)):
+      idx = int(np.argmax(ref[k].astype(str) != new[k].astype(str)))
+      diffs.append((k, f"first diff at {idx}: {ref[k][idx]} != {new[k][idx]}"))
+  return diffs
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+'''
+Replays drives through controlsd and reports the cost of publishing its
+messages every step, next to the cost of the whole step.
+  $ ./publish_benchmark.py rlog1.bz2 rlog2.bz2
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from common.profiler import summarize
+
+
+def format_stats(name, s):
+  return "%10s: p50 %6.3f ms  p99 %6.3f ms  max %7.3f ms  mean %6.3f ms" % (name, s['p50'], s['p99'], s['max'], s['mean'])
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark controlsd publish_logs on replayed drives")
+  parser.add_argument("logs", nargs="+", help="rlog paths")
+  args = parser.parse_args()
+
+  # params are read from $HOME/.comma/params on PC, don't touch the real ones
+  os.environ['HOME'] = tempfile.mkdtemp()
+
+  from selfdrive.controls.controlsd import Controls
+  from selfdrive.test.process_replay.process_replay import CONFIGS_BY_NAME, load_msgs, replay_process
+  from tools.lib.logreader import LogReader
+
+  durations = []
+  publish_logs = Controls.publish_logs
+
+  def timed_publish_logs(self, *a):
+    t = time.perf_counter()
+    publish_logs(self, *a)
+    durations.append(time.perf_counter() - t)
+
+  Controls.publish_logs = timed_publish_logs
+
+  for log_path in args.logs:
+    durations.clear()
+    _, step_times = replay_process(CONFIGS_BY_NAME['controlsd'], load_msgs(LogReader(log_path)))
+    print(f"{os.path.basename(log_path)}: {len(durations)} steps")
+    print(format_stats("publish", summarize(durations)))
+    print(format_stats("step", summarize(step_times)))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+'''
+Replays logged messages through controlsd, radard and plannerd as fast as
+possible, reports the per-step cost and diffs the outputs against references.
+  $ ./test_processes.py --update-refs --ref-dir /tmp/refs rlog1.bz2 rlog2.bz2   # on the reference commit
+  $ ./test_processes.py --ref-dir /tmp/refs -j 16 rlog1.bz2 rlog2.bz2          # on the change
+Every (log, process) pair runs in its own worker process with its own params
+directory, so many logs can run in parallel.
+'''
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+DEFAULT_PROCS = ["controlsd", "radard", "plannerd"]
+
+
+def init_worker():
+  # params are read from $HOME/.comma/params on PC, give every worker its own
+  os.environ['HOME'] = tempfile.mkdtemp()
+
+
+def run_replay(args):
+  log_path, proc_name, ref_dir, update_refs = args
+
+  # imported in the worker, after the params directory is set up
+  from selfdrive.test.process_replay.process_replay import CONFIGS_BY_NAME, compare_columns, load_msgs, \
+                                                           replay_process, to_columns
+  from tools.lib.logreader import LogReader
+
+  msgs = load_msgs(LogReader(log_path))
+  outputs, step_times = replay_process(CONFIGS_BY_NAME[proc_name], msgs)
+  columns = to_columns(outputs)
+
+  diffs = None
+  if ref_dir is not None:
+    ref_path = os.path.join(ref_dir, f"{os.path.basename(log_path)}_{proc_name}.npz")
+    if update_refs:
+      np.savez_compressed(ref_path, **columns)
+    else:
+      with np.load(ref_path) as ref:
+        diffs = compare_columns(dict(ref), columns)
+
+  return log_path, proc_name, len(outputs), step_times, diffs
+
+
+def format_step_times(step_times):
+  if not len(step_times):
+    return "no steps"
+  ms = step_times * 1e3
+  return "%6d steps  p50 %6.3f ms  p99 %6.3f ms  max %7.3f ms  total %6.2f s" % \
+         (len(ms), np.percentile(ms, 50), np.percentile(ms, 99), np.max(ms), np.sum(step_times))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Offline process replay and benchmark")
+  parser.add_argument("logs", nargs="+", help="rlog paths")
+  parser.add_argument("--procs", nargs="+", default=DEFAULT_PROCS, help="processes to replay")
+  parser.add_argument("--ref-dir", help="directory with reference outputs")
+  parser.add_argument("--update-refs", action="store_true", help="write reference outputs instead of comparing")
+  parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="parallel workers")
+  args = parser.parse_args()
+
+  if args.update_refs and args.ref_dir is None:
+    parser.error("--update-refs needs --ref-dir")
+  if args.ref_dir is not None:
+    os.makedirs(args.ref_dir, exist_ok=True)
+
+  jobs = [(log_path, proc, args.ref_dir, args.update_refs) for log_path in args.logs for proc in args.procs]
+
+  failed = False
+  ctx = multiprocessing.get_context("spawn")
+  with ctx.Pool(args.jobs, initializer=init_worker, maxtasksperchild=1) as pool:
+    for log_path, proc_name, n_outputs, step_times, diffs in pool.imap_unordered(run_replay, jobs):
+      print(f"{os.path.basename(log_path)} {proc_name}: {n_outputs} msgs, {format_step_times(step_times)}")
+      if diffs:
+        failed = True
+        for field, reason in diffs:
+          print(f"  {field}: {reason}")
+
+  sys.exit(int(failed))
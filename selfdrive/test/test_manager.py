@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import os
+import py_compile
 import signal
+import tempfile
 import time
 import unittest
+from unittest import mock
 
 os.environ['FAKEUPLOAD'] = "1"
 
@@ -33,6 +36,62 @@ class TestManager(unittest.TestCase):
       t = time.monotonic() - start
       assert t < MAX_STARTUP_TIME, f"startup took {t}s, expected <{MAX_STARTUP_TIME}s"
 
+  def test_dependency_order(self):
+    order = manager.dependency_order(ALL_PROCESSES)
+    self.assertEqual(sorted(order), sorted(set(ALL_PROCESSES)))
+    for p, deps in manager.process_dependencies.items():
+      for dep in deps:
+        if p in order and dep in order:
+          self.assertLess(order.index(dep), order.index(p))
+
+  def test_wanted_processes(self):
+    offroad = manager.wanted_processes(False, False, False)
+    onroad = manager.wanted_processes(True, False, False)
+    self.assertTrue(all(p in onroad for p in offroad))
+    self.assertIn("controlsd", onroad)
+    self.assertNotIn("controlsd", offroad)
+    self.assertNotIn("loggerd", manager.wanted_processes(True, True, False))
+
+  def test_restart_dropped_when_unwanted(self):
+    onroad = manager.wanted_processes(True, False, False)
+    offroad = manager.wanted_processes(False, False, False)
+    dead = mock.Mock(exitcode=1)
+    with mock.patch.dict(manager.running, {"controlsd": dead}, clear=True), \
+         mock.patch.dict(manager.restart_at, clear=True), \
+         mock.patch.dict(manager.restart_counts), \
+         mock.patch.dict(manager.exit_codes), \
+         mock.patch.object(manager, "start_managed_process"), \
+         mock.patch.object(manager, "kill_managed_processes"):
+      manager.reap_dead_processes(onroad)
+      self.assertIn("controlsd", manager.restart_at)
+
+      # going offroad before the restart
+      manager.sync_processes(offroad)
+      self.assertNotIn("controlsd", manager.restart_at)
+
+      # dying while not wanted doesn't schedule a restart
+      manager.running["controlsd"] = dead
+      manager.reap_dead_processes(offroad)
+      self.assertNotIn("controlsd", manager.restart_at)
+
+  def test_prepare_cache(self):
+    with tempfile.TemporaryDirectory() as tmp, \
+         mock.patch.object(manager, "PREPARE_CACHE_PATH", os.path.join(tmp, "prepare_cache")):
+      src = os.path.join(tmp, "proc.py")
+      with open(src, "w") as f:
+        f.write("x = 1\n")
+      py_compile.compile(src)
+
+      procs = ["proc"]
+      self.assertFalse(manager.prepare_cache_valid(procs))
+      manager.write_prepare_cache(procs, {src: [os.stat(src).st_mtime_ns, os.stat(src).st_size]})
+      self.assertTrue(manager.prepare_cache_valid(procs))
+      self.assertFalse(manager.prepare_cache_valid(procs + ["other"]))
+
+      with open(src, "w") as f:
+        f.write("x = 22\n")
+      self.assertFalse(manager.prepare_cache_valid(procs))
+
   # ensure all processes exit cleanly
   def test_clean_exit(self):
     manager.manager_prepare()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+import unittest
+
+from cereal import log
+from selfdrive.debug.service_monitor import read_header, ServiceStats
+
+
+class TestServiceMonitor(unittest.TestCase):
+  def test_read_header(self):
+    for valid in (True, False):
+      for service in ('carState', 'modelV2', 'deviceState'):
+        msg = log.Event.new_message()
+        msg.logMonoTime = 123456789012
+        msg.valid = valid
+        msg.init(service)
+        self.assertEqual(read_header(msg.to_bytes()), (123456789012, valid))
+
+  def test_read_header_multi_segment(self):
+    msg = log.Event.new_message()
+    msg.logMonoTime = 42
+    msg.valid = False
+    msg.init('can', 5000)
+    self.assertEqual(read_header(msg.to_bytes()), (42, False))
+
+  def test_stats(self):
+    stats = ServiceStats('carState', 100.)
+    # 10 ms apart, with 2 messages missing between 20 and 50 ms
+    for i, t_ms in enumerate([0, 10, 20, 50, 60]):
+      stats.update(t_ms * 10**6, i != 2, t_ms * 10**6 + 10**6)
+
+    self.assertEqual(stats.received, 5)
+    self.assertEqual(stats.dropped, 2)
+    self.assertEqual(stats.invalid, 1)
+    self.assertAlmostEqual(stats.max_interval, 0.03)
+    self.assertAlmostEqual(stats.latency_sum / stats.received, 0.001)
+
+    msg = log.Event.new_message()
+    stat = msg.init('serviceStats').init('services', 1)[0]
+    stats.fill(stat, 1.)
+    self.assertEqual(stat.received, 5)
+    self.assertAlmostEqual(stat.frequency, 5.)
+
+    stats.reset()
+    self.assertEqual(stats.received, 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,116 @@
+import os
+import time
+
+from selfdrive.swaglog import cloudlog
+
+# points to a fake tree when testing on a PC
+SYSFS_ROOT = os.environ.get('SYSFS_ROOT', '/')
+READ_SIZE = 64
+# a file that didn't exist isn't looked for again until this long after
+MISSING_RETRY = 10.
+
+
+class SysfsReader():
+  """Reads small sysfs attributes through file descriptors that are kept open. An
+  attribute's contents are regenerated on every read at offset 0, so a pread replaces
+  the open, read and close of each sample."""
+  def __init__(self, root=SYSFS_ROOT):
+    self.root = root
+    self._fds = {}
+    self._missing = {}
+
+  def _fd(self, path):
+    fd = self._fds.get(path)
+    if fd is None:
+      t = time.monotonic()
+      if t < self._missing.get(path, 0.):
+        return None
+      try:
+        fd = os.open(os.path.join(self.root, path.lstrip('/')), os.O_RDONLY)
+      except OSError:
+        self._missing[path] = t + MISSING_RETRY
+        return None
+      self._fds[path] = fd
+    return fd
+
+  def read(self, path, parser=int, default=0):
+    """parser(contents of path), default when it's missing or can't be parsed"""
+    fd = self._fd(path)
+    if fd is None:
+      return default
+
+    try:
+      return parser(os.pread(fd, READ_SIZE, 0))
+    except OSError:
+      # the device went away, open it again next time
+      os.close(self._fds.pop(path))
+      return default
+    except ValueError:
+      return default
+
+  def close(self):
+    for fd in self._fds.values():
+      os.close(fd)
+    self._fds = {}
+
+
+class SourceStats():
+  def __init__(self):
+    self.samples = 0
+    self.errors = 0
+    self.time_sum = 0.
+    self.time_max = 0.
+
+  def update(self, dt, error):
+    self.samples += 1
+    self.errors += error
+    self.time_sum += dt
+    self.time_max = max(self.time_max, dt)
+
+  @property
+  def time_mean(self):
+    return self.time_sum / max(self.samples, 1)
+
+
+class Sampler():
+  """Samples each source on its own interval and keeps its last value in between, so
+  slow changing state isn't fetched every cycle. A source that raises keeps its
+  previous value. How long every source takes is kept in stats."""
+  def __init__(self):
+    self.stats = {}
+    self._sources = {}
+    self._values = {}
+
+  def add(self, name, interval, f, default=None):
+    """Samples f every interval seconds, every update when it's 0"""
+    self.stats[name] = SourceStats()
+    self._sources[name] = [interval, f, 0.]
+    self._values[name] = default
+
+  def expire(self, *names):
+    """Samples the sources again on the next update, whatever their interval"""
+    for name in names:
+      self._sources[name][2] = 0.
+
+  def update(self, now):
+    for name, source in self._sources.items():
+      interval, f, next_t = source
+      if now < next_t:
+        continue
+
+      t = time.perf_counter()
+      error = False
+      try:
+        self._values[name] = f()
+      except Exception:
+        cloudlog.exception(f"Error sampling {name}")
+        error = True
+      self.stats[name].update(time.perf_counter() - t, error)
+      source[2] = now + interval
+
+  def __getitem__(self, name):
+    return self._values[name]
+
+  def report(self):
+    return {name: {'samples': s.samples, 'errors': s.errors, 'mean_ms': round(s.time_mean * 1e3, 3), 'max_ms': round(s.time_max * 1e3, 3)}
+            for name, s in self.stats.items()}
@@ -0,0 +1,26 @@
+import os
+import shutil
+import tempfile
+
+
+class FakeSysfs():
+  """Directory laid out like sysfs, for a SysfsReader rooted at it on a PC"""
+  def __init__(self):
+    self.root = tempfile.mkdtemp()
+
+  def _path(self, path):
+    return os.path.join(self.root, path.lstrip('/'))
+
+  def write(self, path, value):
+    os.makedirs(os.path.dirname(self._path(path)), exist_ok=True)
+    with open(self._path(path), 'w') as f:
+      f.write(f"{value}\n")
+
+  def remove(self, path):
+    os.remove(self._path(path))
+
+  def set_tz(self, x, temp):
+    self.write(f"/sys/devices/virtual/thermal/thermal_zone{x}/temp", temp)
+
+  def cleanup(self):
+    shutil.rmtree(self.root)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import unittest
+from unittest import mock
+
+from selfdrive.hardware.base import ThermalConfig
+from selfdrive.thermald.sampler import Sampler, SysfsReader
+from selfdrive.thermald.tests.helpers import FakeSysfs
+from selfdrive.thermald.thermald import read_thermal
+
+BATTERY_CAPACITY = "/sys/class/power_supply/battery/capacity"
+
+
+class TestSysfsReader(unittest.TestCase):
+  def setUp(self):
+    self.sysfs = FakeSysfs()
+    self.reader = SysfsReader(self.sysfs.root)
+
+  def tearDown(self):
+    self.reader.close()
+    self.sysfs.cleanup()
+
+  def test_read(self):
+    self.sysfs.write(BATTERY_CAPACITY, 80)
+    self.assertEqual(self.reader.read(BATTERY_CAPACITY), 80)
+    self.sysfs.write(BATTERY_CAPACITY, 79)
+    self.assertEqual(self.reader.read(BATTERY_CAPACITY), 79)
+    self.assertEqual(self.reader.read(BATTERY_CAPACITY, lambda x: x.strip()), b"79")
+
+  def test_fd_kept_open(self):
+    self.sysfs.write(BATTERY_CAPACITY, 80)
+    self.reader.read(BATTERY_CAPACITY)
+    with mock.patch("os.open") as os_open:
+      for _ in range(10):
+        self.assertEqual(self.reader.read(BATTERY_CAPACITY), 80)
+      os_open.assert_not_called()
+
+  def test_missing(self):
+    self.assertEqual(self.reader.read(BATTERY_CAPACITY, default=100), 100)
+
+    # not looked for again until the retry interval passed
+    self.sysfs.write(BATTERY_CAPACITY, 80)
+    self.assertEqual(self.reader.read(BATTERY_CAPACITY, default=100), 100)
+    with mock.patch("time.monotonic", return_value=1e9):
+      self.assertEqual(self.reader.read(BATTERY_CAPACITY, default=100), 80)
+
+  def test_invalid(self):
+    self.sysfs.write(BATTERY_CAPACITY, "full")
+    self.assertEqual(self.reader.read(BATTERY_CAPACITY, default=100), 100)
+
+  def test_read_thermal(self):
+    thermal_config = ThermalConfig(cpu=((5, 7, 10, 12), 10), gpu=((16,), 10), mem=(2, 10), bat=(29, 1000), ambient=(25, 1))
+    for x, temp in [(5, 450), (7, 460), (10, 470), (12, 480), (16, 400), (2, 350), (29, 30000), (25, 25)]:
+      self.sysfs.set_tz(x, temp)
+
+    ds = read_thermal(thermal_config, self.reader).deviceState
+    self.assertEqual(list(ds.cpuTempC), [45., 46., 47., 48.])
+    self.assertEqual(list(ds.gpuTempC), [40.])
+    self.assertEqual(ds.memoryTempC, 35.)
+    self.assertEqual(ds.batteryTempC, 30.)
+    self.assertEqual(ds.ambientTempC, 25.)
+
+    # zones that don't exist read as 0
+    thermal_config = ThermalConfig(cpu=((5, 6), 10), gpu=((None,), 1), mem=(None, 1), bat=(None, 1), ambient=(None, 1))
+    ds = read_thermal(thermal_config, self.reader).deviceState
+    self.assertEqual(list(ds.cpuTempC), [45., 0.])
+    self.assertEqual(list(ds.gpuTempC), [0.])
+
+
+class TestSampler(unittest.TestCase):
+  def setUp(self):
+    self.calls = {"fast": 0, "slow": 0}
+    self.sampler = Sampler()
+    self.sampler.add("fast", 0., lambda: self._sample("fast"))
+    self.sampler.add("slow", 10., lambda: self._sample("slow"), default=-1)
+
+  def _sample(self, name):
+    self.calls[name] += 1
+    return self.calls[name]
+
+  def test_intervals(self):
+    for i in range(40):
+      self.sampler.update(i * 0.5)
+    self.assertEqual(self.calls, {"fast": 40, "slow": 2})
+    self.assertEqual(self.sampler["fast"], 40)
+    self.assertEqual(self.sampler["slow"], 2)
+
+  def test_expire(self):
+    self.sampler.update(0.)
+    self.sampler.update(1.)
+    self.sampler.expire("slow")
+    self.sampler.update(2.)
+    self.assertEqual(self.calls["slow"], 2)
+    # the interval starts over from the expired sample
+    self.sampler.update(11.)
+    self.assertEqual(self.calls["slow"], 2)
+    self.sampler.update(12.)
+    self.assertEqual(self.calls["slow"], 3)
+
+  def test_error_keeps_value(self):
+    self.sampler.update(0.)
+    self.sampler.add("broken", 0., lambda: 1 / 0, default=-1)
+    for i in range(3):
+      self.sampler.update(i)
+    self.assertEqual(self.sampler["broken"], -1)
+    self.assertEqual(self.sampler.stats["broken"].errors, 3)
+
+  def test_stats(self):
+    for i in range(4):
+      self.sampler.update(i)
+    report = self.sampler.report()
+    self.assertEqual(report["fast"]["samples"], 4)
+    self.assertEqual(report["slow"]["samples"], 1)
+    self.assertGreaterEqual(report["fast"]["max_ms"], report["fast"]["mean_ms"])
+
+
+if __name__ == "__main__":
+  unittest.main()
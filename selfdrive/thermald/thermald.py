@@ -19,6 +19,7 @@ from selfdrive.loggerd.config import get_available_percent
 from selfdrive.pandad import get_expected_signature
 from selfdrive.swaglog import cloudlog
 from selfdrive.thermald.power_monitoring import PowerMonitoring
+from selfdrive.thermald.sampler import Sampler, SysfsReader
 from selfdrive.version import get_git_branch, terms_version, training_version
 
 FW_SIGNATURE = get_expected_signature()
@@ -32,32 +33,63 @@ DAYS_NO_CONNECTIVITY_MAX = 30  # do not allow to engage after a week without int
 DAYS_NO_CONNECTIVITY_PROMPT = 26  # send an offroad prompt after 4 days with no internet
 DISCONNECT_TIMEOUT = 5.  # wait 5 seconds before going offroad after disconnect so you get an alert
 
+# sampling intervals of the slow changing state, in seconds
+NETWORK_INTERVAL = 10.  # get_network_type is an expensive call
+PARAMS_INTERVAL = 2.
+FREE_SPACE_INTERVAL = 5.
+BATTERY_LEVEL_INTERVAL = 5.
+GIT_BRANCH_INTERVAL = 600.
+PARAMS = ["LastUpdateTime", "UpdateFailedCount", "LastUpdateException", "Offroad_ConnectivityNeeded", "DisableUpdates", "DoUninstall",
+          "HasAcceptedTerms", "PandaFirmware", "CompletedTrainingVersion", "IsDriverViewEnabled", "IsTakingSnapshot"]
+
 prev_offroad_states: Dict[str, Tuple[bool, Optional[str]]] = {}
 
 LEON = False
 last_eon_fan_val = None
 
-def read_tz(x):
+def read_tz(sysfs, x):
   if x is None:
     return 0
-
-  try:
-    with open(f"/sys/devices/virtual/thermal/thermal_zone{x}/temp") as f:
-      return int(f.read())
-  except FileNotFoundError:
-    return 0
+  return sysfs.read(f"/sys/devices/virtual/thermal/thermal_zone{x}/temp")
 
 
-def read_thermal(thermal_config):
+def read_thermal(thermal_config, sysfs):
   dat = messaging.new_message('deviceState')
-  dat.deviceState.cpuTempC = [read_tz(z) / thermal_config.cpu[1] for z in thermal_config.cpu[0]]
-  dat.deviceState.gpuTempC = [read_tz(z) / thermal_config.gpu[1] for z in thermal_config.gpu[0]]
-  dat.deviceState.memoryTempC = read_tz(thermal_config.mem[0]) / thermal_config.mem[1]
-  dat.deviceState.ambientTempC = read_tz(thermal_config.ambient[0]) / thermal_config.ambient[1]
-  dat.deviceState.batteryTempC = read_tz(thermal_config.bat[0]) / thermal_config.bat[1]
+  dat.deviceState.cpuTempC = [read_tz(sysfs, z) / thermal_config.cpu[1] for z in thermal_config.cpu[0]]
+  dat.deviceState.gpuTempC = [read_tz(sysfs, z) / thermal_config.gpu[1] for z in thermal_config.gpu[0]]
+  dat.deviceState.memoryTempC = read_tz(sysfs, thermal_config.mem[0]) / thermal_config.mem[1]
+  dat.deviceState.ambientTempC = read_tz(sysfs, thermal_config.ambient[0]) / thermal_config.ambient[1]
+  dat.deviceState.batteryTempC = read_tz(sysfs, thermal_config.bat[0]) / thermal_config.bat[1]
   return dat
 
 
+def read_network():
+  network_type = HARDWARE.get_network_type()
+  return network_type, HARDWARE.get_network_strength(network_type)
+
+
+def read_battery_level():
+  return HARDWARE.get_battery_capacity(), HARDWARE.get_battery_status()
+
+
+def read_battery():
+  return HARDWARE.get_battery_current(), HARDWARE.get_battery_voltage(), HARDWARE.get_usb_present()
+
+
+def setup_sampler(thermal_config, sysfs, params):
+  sampler = Sampler()
+  sampler.add("thermal", 0., lambda: read_thermal(thermal_config, sysfs))
+  sampler.add("battery", 0., read_battery, default=(0, 0, False))
+  sampler.add("memory", 0., lambda: int(round(psutil.virtual_memory().percent)), default=0)
+  sampler.add("cpu", 0., lambda: int(round(psutil.cpu_percent())), default=0)
+  sampler.add("battery_level", BATTERY_LEVEL_INTERVAL, read_battery_level, default=(100, ""))
+  sampler.add("free_space", FREE_SPACE_INTERVAL, lambda: get_available_percent(default=100.0), default=100.0)
+  sampler.add("network", NETWORK_INTERVAL, read_network, default=(NetworkType.none, NetworkStrength.unknown))
+  sampler.add("params", PARAMS_INTERVAL, lambda: {k: params.get(k) for k in PARAMS}, default={})
+  sampler.add("git_branch", GIT_BRANCH_INTERVAL, get_git_branch)
+  return sampler
+
+
 def setup_eon_fan():
   global LEON
 
@@ -168,10 +200,6 @@ def thermald_thread():
   started_seen = False
   thermal_status = ThermalStatus.green
   usb_power = True
-  current_branch = get_git_branch()
-
-  network_type = NetworkType.none
-  network_strength = NetworkStrength.unknown
 
   current_filter = FirstOrderFilter(0., CURRENT_TAU, DT_TRML)
   cpu_temp_filter = FirstOrderFilter(0., CPU_TEMP_TAU, DT_TRML)
@@ -186,10 +214,18 @@ def thermald_thread():
   no_panda_cnt = 0
 
   thermal_config = HARDWARE.get_thermal_config()
+  sampler = setup_sampler(thermal_config, SysfsReader(), params)
 
   while 1:
     pandaState = messaging.recv_sock(pandaState_sock, wait=True)
-    msg = read_thermal(thermal_config)
+
+    # with the ignition on the params that hold back going onroad are checked every cycle
+    if startup_conditions["ignition"] and started_ts is None:
+      sampler.expire("params")
+    sampler.update(sec_since_boot())
+    msg = sampler["thermal"]
+    current_branch = sampler["git_branch"]
+    cached_params = sampler["params"]
 
     if pandaState is not None:
       usb_power = pandaState.pandaState.usbPowerMode != log.PandaState.UsbPowerMode.client
@@ -225,24 +261,12 @@ def thermald_thread():
           params.panda_disconnect()
       pandaState_prev = pandaState
 
-    # get_network_type is an expensive call. update every 10s
-    if (count % int(10. / DT_TRML)) == 0:
-      try:
-        network_type = HARDWARE.get_network_type()
-        network_strength = HARDWARE.get_network_strength(network_type)
-      except Exception:
-        cloudlog.exception("Error getting network status")
-
-    msg.deviceState.freeSpacePercent = get_available_percent(default=100.0)
-    msg.deviceState.memoryUsagePercent = int(round(psutil.virtual_memory().percent))
-    msg.deviceState.cpuUsagePercent = int(round(psutil.cpu_percent()))
-    msg.deviceState.networkType = network_type
-    msg.deviceState.networkStrength = network_strength
-    msg.deviceState.batteryPercent = HARDWARE.get_battery_capacity()
-    msg.deviceState.batteryStatus = HARDWARE.get_battery_status()
-    msg.deviceState.batteryCurrent = HARDWARE.get_battery_current()
-    msg.deviceState.batteryVoltage = HARDWARE.get_battery_voltage()
-    msg.deviceState.usbOnline = HARDWARE.get_usb_present()
+    msg.deviceState.freeSpacePercent = sampler["free_space"]
+    msg.deviceState.memoryUsagePercent = sampler["memory"]
+    msg.deviceState.cpuUsagePercent = sampler["cpu"]
+    msg.deviceState.networkType, msg.deviceState.networkStrength = sampler["network"]
+    msg.deviceState.batteryPercent, msg.deviceState.batteryStatus = sampler["battery_level"]
+    msg.deviceState.batteryCurrent, msg.deviceState.batteryVoltage, msg.deviceState.usbOnline = sampler["battery"]
 
     # Fake battery levels on uno for frame
     if (not EON) or is_uno:
@@ -294,20 +318,20 @@ def thermald_thread():
 
     # Show update prompt
     try:
-      last_update = datetime.datetime.fromisoformat(params.get("LastUpdateTime", encoding='utf8'))
-    except (TypeError, ValueError):
+      last_update = datetime.datetime.fromisoformat(cached_params.get("LastUpdateTime").decode('utf8'))
+    except (AttributeError, ValueError):
       last_update = now
     dt = now - last_update
 
-    update_failed_count = params.get("UpdateFailedCount")
+    update_failed_count = cached_params.get("UpdateFailedCount")
     update_failed_count = 0 if update_failed_count is None else int(update_failed_count)
-    last_update_exception = params.get("LastUpdateException", encoding='utf8')
+    last_update_exception = cached_params.get("LastUpdateException")
 
     if update_failed_count > 15 and last_update_exception is not None:
       if current_branch in ["release2", "dashcam"]:
         extra_text = "Ensure the software is correctly installed"
       else:
-        extra_text = last_update_exception
+        extra_text = last_update_exception.decode('utf8')
 
 #      set_offroad_alert_if_changed("Offroad_ConnectivityNeeded", False)
 #      set_offroad_alert_if_changed("Offroad_ConnectivityNeededPrompt", False)
@@ -326,20 +350,20 @@ def thermald_thread():
 #      set_offroad_alert_if_changed("Offroad_ConnectivityNeeded", False)
 #      set_offroad_alert_if_changed("Offroad_ConnectivityNeededPrompt", False)
 
-    startup_conditions["up_to_date"] = params.get("Offroad_ConnectivityNeeded") is None or params.get("DisableUpdates") == b"1"
-    startup_conditions["not_uninstalling"] = not params.get("DoUninstall") == b"1"
-    startup_conditions["accepted_terms"] = params.get("HasAcceptedTerms") == terms_version
+    startup_conditions["up_to_date"] = cached_params.get("Offroad_ConnectivityNeeded") is None or cached_params.get("DisableUpdates") == b"1"
+    startup_conditions["not_uninstalling"] = not cached_params.get("DoUninstall") == b"1"
+    startup_conditions["accepted_terms"] = cached_params.get("HasAcceptedTerms") == terms_version
 
-    panda_signature = params.get("PandaFirmware")
+    panda_signature = cached_params.get("PandaFirmware")
     startup_conditions["fw_version_match"] = (panda_signature is None) or (panda_signature == FW_SIGNATURE)   # don't show alert is no panda is connected (None)
     set_offroad_alert_if_changed("Offroad_PandaFirmwareMismatch", (not startup_conditions["fw_version_match"]))
 
     # with 2% left, we killall, otherwise the phone will take a long time to boot
     startup_conditions["free_space"] = msg.deviceState.freeSpacePercent > 2
-    startup_conditions["completed_training"] = params.get("CompletedTrainingVersion") == training_version or \
+    startup_conditions["completed_training"] = cached_params.get("CompletedTrainingVersion") == training_version or \
                                                (current_branch in ['dashcam', 'dashcam-staging'])
-    startup_conditions["not_driver_view"] = not params.get("IsDriverViewEnabled") == b"1"
-    startup_conditions["not_taking_snapshot"] = not params.get("IsTakingSnapshot") == b"1"
+    startup_conditions["not_driver_view"] = not cached_params.get("IsDriverViewEnabled") == b"1"
+    startup_conditions["not_taking_snapshot"] = not cached_params.get("IsTakingSnapshot") == b"1"
     # if any CPU gets above 107 or the battery gets above 63, kill all processes
     # controls will warn with CPU above 95 or battery above 60
     startup_conditions["device_temp_good"] = thermal_status < ThermalStatus.danger
@@ -404,6 +428,7 @@ def thermald_thread():
                      pandaState=(pandaState.to_dict() if pandaState else None),
                      location=(location.gpsLocationExternal.to_dict() if location else None),
                      deviceState=msg.to_dict())
+      cloudlog.event("thermald sampler", stats=sampler.report())
 
     count += 1
 
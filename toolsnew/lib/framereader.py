@@ -239,7 +239,7 @@ def decompress_video_data(rawdat, vid_fmt, w, h, pix_fmt):
     if proc.wait() != 0:
       raise DataUnreadableError("ffmpeg failed")
 
-  if pix_fmt == "rgb24":
+  if pix_fmt in ("rgb24", "bgr24"):
     ret = np.frombuffer(dat, dtype=np.uint8).reshape(-1, h, w, 3)
   elif pix_fmt == "yuv420p":
     ret = np.frombuffer(dat, dtype=np.uint8).reshape(-1, (h*w*3//2))
@@ -558,7 +558,7 @@ class GOPFrameReader(BaseFrameReader):
     if num + count > self.frame_count:
       raise ValueError("{} > {}".format(num + count, self.frame_count))
 
-    if pix_fmt not in ("yuv420p", "rgb24", "yuv444p"):
+    if pix_fmt not in ("yuv420p", "rgb24", "bgr24", "yuv444p"):
       raise ValueError("Unsupported pixel format %r" % pix_fmt)
 
     ret = [self._get_one(num + i, pix_fmt) for i in range(count)]
@@ -2,6 +2,7 @@
 import os
 import sys
 import bz2
+import struct
 import urllib.parse
 import capnp
 
@@ -11,6 +12,20 @@ except ImportError:
   from tools.lib.filereader import FileReader
 from cereal import log as capnp_log
 
+
+def capnp_message_offsets(dat):
+  """Start offsets of the messages in a stream of serialized capnp messages, and the end of the last one"""
+  offsets = [0]
+  pos = 0
+  while pos < len(dat):
+    num_segments = struct.unpack_from("<I", dat, pos)[0] + 1
+    segment_sizes = struct.unpack_from("<%dI" % num_segments, dat, pos + 4)
+    # segment table is padded to a word, segment sizes are in words
+    pos += ((num_segments + 1) * 4 + 7) & ~7
+    pos += sum(segment_sizes) * 8
+    offsets.append(pos)
+  return offsets
+
 # this is an iterator itself, and uses private variables from LogReader
 class MultiLogIterator(object):
   def __init__(self, log_paths, wraparound=True):
@@ -56,6 +71,13 @@ class MultiLogIterator(object):
       self._inc()
       return ret
 
+  def next_with_bytes(self):
+    """Like next, but also returns the message as it's serialized in the log"""
+    lr = self._log_reader(self._current_log)
+    idx = self._idx
+    self._inc()
+    return lr._ents[idx], lr.ent_bytes(idx)
+
   def tell(self):
     # returns seconds from start of log
     return (self._log_reader(self._current_log)._ts[self._idx] - self.start_time) * 1e-9
@@ -96,6 +118,16 @@ class LogReader(object):
     self.data_version = data_version
     self._only_union_types = only_union_types
 
+    self._dat = dat
+    self._offsets = None
+
+  def ent_bytes(self, i):
+    """The serialized message i, without copying it out of the log"""
+    if self._offsets is None:
+      self._offsets = capnp_message_offsets(self._dat)
+      assert len(self._offsets) == len(self._ents) + 1, "log has trailing data"
+    return memoryview(self._dat)[self._offsets[i]:self._offsets[i + 1]]
+
   def __iter__(self):
     for ent in self._ents:
       if self._only_union_types:
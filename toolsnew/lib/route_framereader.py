@@ -1,5 +1,9 @@
 """RouteFrameReader indexes and reads frames across routes, by frameId or segment indices."""
-from tools.lib.framereader import FrameReader
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.lib.framereader import FrameReader, decompress_video_data
 
 
 class _FrameReaderDict(dict):
@@ -14,13 +18,18 @@ class _FrameReaderDict(dict):
     self._camera_paths = camera_paths
     self._cache_paths = cache_paths
     self._framereader_kwargs = framereader_kwargs
+    self._lock = threading.Lock()
 
   def __missing__(self, key):
     if key < len(self._camera_paths) and self._camera_paths[key] is not None:
-      frame_reader = FrameReader(self._camera_paths[key],
-                                 self._cache_paths.get(key), **self._framereader_kwargs)
-      self[key] = frame_reader
-      return frame_reader
+      # the RouteFramePrefetcher workers open segments too
+      with self._lock:
+        if key in self:
+          return self[key]
+        frame_reader = FrameReader(self._camera_paths[key],
+                                   self._cache_paths.get(key), **self._framereader_kwargs)
+        self[key] = frame_reader
+        return frame_reader
     else:
       raise KeyError("Segment index out of bounds: {}".format(key))
 
@@ -87,3 +96,100 @@ class RouteFrameReader(object):
 
   def __exit__(self, exc_type, exc_value, traceback):
     self.close()
+
+
+class RouteFramePrefetcher(object):
+  """Decodes the frames of a RouteFrameReader ahead of time in a pool of workers.
+
+     Frames are decoded a whole GOP at a time, directly to pix_fmt. Call prefetch with the
+     frameIds as their encode indices come in, and get once the frame is needed.
+  """
+  def __init__(self, frame_reader, pix_fmt="bgr24", workers=4, prefetch_gops=1, max_gops=8):
+    """Inputs:
+        frame_reader: The RouteFrameReader to read from, shared frame_id_lookup included.
+        pix_fmt: Pixel format of the returned frames.
+        workers: Number of GOPs decoded in parallel.
+        prefetch_gops: Number of GOPs to decode after the one of a prefetched frame.
+        max_gops: Number of decoded GOPs to keep, the oldest are dropped first.
+    """
+    self._frame_reader = frame_reader
+    self._pix_fmt = pix_fmt
+    self._prefetch_gops = prefetch_gops
+    self._max_gops = max(max_gops, workers * (prefetch_gops + 1))
+
+    self._pool = ThreadPoolExecutor(workers)
+    self._gops = OrderedDict()  # (segment_num, first frame) -> future of the frames
+    self._opening = {}  # segment_num -> future of the segment's frame reader
+
+  def _segment(self, frame_id):
+    segment_num, segment_id = self._frame_reader._frame_id_lookup.get(frame_id, (None, None))
+    if segment_num is None or segment_num == -1 or segment_id == -1:
+      return None, None
+    return segment_num, segment_id
+
+  def _decode_gop(self, fr, num):
+    frame_b, num_frames, skip_frames, rawdat = fr.get_gop(num)
+    ret = decompress_video_data(rawdat, fr.vid_fmt, fr.w, fr.h, self._pix_fmt)[skip_frames:]
+    assert ret.shape[0] == num_frames
+    return ret
+
+  def _schedule(self, segment_num, fr, num):
+    """Future of the GOP with frame num, its first frame and the frame after it"""
+    frame_b, frame_e, _, _ = fr._lookup_gop(num)
+    key = (segment_num, frame_b)
+    if key in self._gops:
+      self._gops.move_to_end(key)
+    else:
+      self._gops[key] = self._pool.submit(self._decode_gop, fr, num)
+      while len(self._gops) > self._max_gops:
+        self._gops.popitem(last=False)[1].cancel()
+    return self._gops[key], frame_b, frame_e
+
+  def prefetch(self, frame_id):
+    """Starts decoding the GOP of frame_id and the next prefetch_gops ones"""
+    segment_num, segment_id = self._segment(frame_id)
+    if segment_num is None:
+      return
+
+    # opening a segment probes and indexes the video, don't wait for it
+    frame_readers = self._frame_reader._frame_readers
+    if segment_num not in frame_readers:
+      if segment_num not in self._opening:
+        self._opening[segment_num] = self._pool.submit(frame_readers.__getitem__, segment_num)
+      return
+    self._opening.pop(segment_num, None)
+
+    fr = frame_readers[segment_num]
+    if not hasattr(fr, "get_gop"):
+      return
+    num = segment_id
+    for _ in range(self._prefetch_gops + 1):
+      if num >= fr.frame_count:
+        break
+      _, _, num = self._schedule(segment_num, fr, num)
+
+  def get(self, frame_id):
+    """Get a frame for a route based on frameId, waits when it's still being decoded.
+       Frames of GOPs that weren't prefetched are decoded right away."""
+    segment_num, segment_id = self._segment(frame_id)
+    if segment_num is None:
+      return None
+
+    fr = self._frame_reader._frame_readers[segment_num]
+    if not hasattr(fr, "get_gop"):
+      return fr.get(segment_id, pix_fmt=self._pix_fmt)[0]
+    gop, frame_b, _ = self._schedule(segment_num, fr, segment_id)
+    return gop.result()[segment_id - frame_b]
+
+  def close(self):
+    for future in list(self._gops.values()) + list(self._opening.values()):
+      future.cancel()
+    self._gops.clear()
+    self._opening.clear()
+    self._pool.shutdown()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
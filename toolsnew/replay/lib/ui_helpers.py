@@ -1,4 +1,3 @@
-import itertools
 from typing import Any, Dict, Tuple
 
 import matplotlib
@@ -8,7 +7,7 @@ import pygame  # pylint: disable=import-error
 
 from common.transformations.camera import (eon_f_frame_size, eon_f_focal_length,
                                            tici_f_frame_size, tici_f_focal_length,
-                                           get_view_frame_from_calib_frame)
+                                           CameraProjection)
 from selfdrive.config import UIParams as UP
 from selfdrive.config import RADAR_TO_CAMERA
 
@@ -44,19 +43,18 @@ for width, height, focal in cams:
 
 
 METER_WIDTH = 20
+# pixels around each path point that are drawn
+PATH_DOT = ((-1, 0), (-1, -1), (0, -1))
 
 class Calibration:
   def __init__(self, num_px, rpy, intrinsic):
     self.intrinsic = intrinsic
-    self.extrinsics_matrix = get_view_frame_from_calib_frame(rpy[0], rpy[1], rpy[2], 0.0)[:,:3]
+    self.projection = CameraProjection(rpy, intrinsic)
+    self.extrinsics_matrix = self.projection.view_from_calib[:, :3]
     self.zoom = _BB_TO_FULL_FRAME[num_px][0, 0]
 
   def car_space_to_ff(self, x, y, z):
-    car_space_projective = np.column_stack((x, y, z)).T
-
-    ep = self.extrinsics_matrix.dot(car_space_projective)
-    kep = self.intrinsic.dot(ep)
-    return (kep[:-1, :] / kep[-1, :]).T
+    return self.projection.img_from_calib(np.column_stack((x, y, z)))
 
   def car_space_to_bb(self, x, y, z):
     pts = self.car_space_to_ff(x, y, z)
@@ -85,25 +83,28 @@ def to_topdown_pt(y, x):
   return -1, -1
 
 
-def draw_path(path, color, img, calibration, top_down, lid_color=None, z_off=0):
-  x, y, z = np.asarray(path.x), np.asarray(path.y), np.asarray(path.z) + z_off
-  pts = calibration.car_space_to_bb(x, y, z)
-  pts = np.round(pts).astype(int)
-
+def draw_projected_path(pts, x, y, color, img, top_down, lid_color=None):
   # draw lidar path point on lidar
   # find color in 8 bit
   if lid_color is not None and top_down is not None:
     tcolor = find_color(top_down[0], lid_color)
-    for i in range(len(x)):
-      px, py = to_topdown_pt(x[i], y[i])
-      if px != -1:
-        top_down[1][px, py] = tcolor
+    # to_topdown_pt(x, y) of every point
+    px, py = y * UP.lidar_zoom + UP.lidar_car_x, -x * UP.lidar_zoom + UP.lidar_car_y
+    on_top_down = (px > 0) & (py > 0) & (px < UP.lidar_x) & (py < UP.lidar_y)
+    top_down[1][px[on_top_down].astype(int), py[on_top_down].astype(int)] = tcolor
 
   height, width = img.shape[:2]
-  for x, y in pts:
-    if 1 < x < width - 1 and 1 < y < height - 1:
-      for a, b in itertools.permutations([-1, 0, -1], 2):
-        img[y + a, x + b] = color
+  pts = pts[np.isfinite(pts).all(axis=1)]
+  pts = np.round(pts).astype(int)
+  pts = pts[(pts[:, 0] > 1) & (pts[:, 0] < width - 1) & (pts[:, 1] > 1) & (pts[:, 1] < height - 1)]
+  for a, b in PATH_DOT:
+    img[pts[:, 1] + a, pts[:, 0] + b] = color
+
+
+def draw_path(path, color, img, calibration, top_down, lid_color=None, z_off=0):
+  x, y, z = np.asarray(path.x), np.asarray(path.y), np.asarray(path.z) + z_off
+  pts = calibration.car_space_to_bb(x, y, z)
+  draw_projected_path(pts, x, y, color, img, top_down, lid_color)
 
 
 def init_plots(arr, name_to_arr_idx, plot_xlims, plot_ylims, plot_names, plot_colors, plot_styles, bigplots=False):
@@ -201,17 +202,25 @@ def plot_model(m, img, calibration, top_down):
     px, py_bottom = to_topdown_pt(x - x_std, y)
     top_down[1][int(round(px - 4)):int(round(px + 4)), py_top:py_bottom] = find_color(top_down[0], YELLOW)
 
+  # (path, color, top down color, z offset)
+  paths = []
   for path, prob, _ in zip(m.laneLines, m.laneLineProbs, m.laneLineStds):
-    color = (0, int(255 * prob), 0)
-    draw_path(path, color, img, calibration, top_down, YELLOW)
+    paths.append((path, (0, int(255 * prob), 0), YELLOW, 0))
 
   for edge, std in zip(m.roadEdges, m.roadEdgeStds):
     prob = max(1 - std, 0)
-    color = (int(255 * prob), 0, 0)
-    draw_path(edge, color, img, calibration, top_down, RED)
-
-  color = (255, 0, 0)
-  draw_path(m.position, color, img, calibration, top_down, RED, 1.22)
+    paths.append((edge, (int(255 * prob), 0, 0), RED, 0))
+
+  paths.append((m.position, (255, 0, 0), RED, 1.22))
+
+  # project all paths at once
+  xs = [np.asarray(path.x) for path, _, _, _ in paths]
+  ys = [np.asarray(path.y) for path, _, _, _ in paths]
+  zs = [np.asarray(path.z) + z_off for path, _, _, z_off in paths]
+  pts = calibration.car_space_to_bb(np.concatenate(xs), np.concatenate(ys), np.concatenate(zs))
+  splits = np.cumsum([len(x) for x in xs])[:-1]
+  for (_, color, lid_color, _), path_pts, x, y in zip(paths, np.split(pts, splits), xs, ys):
+    draw_projected_path(path_pts, x, y, color, img, top_down, lid_color)
 
 
 def maybe_update_radar_points(lt, lid_overlay):
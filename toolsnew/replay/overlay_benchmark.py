@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+'''
+Times drawing the model paths and lane lines of the replay UI on a synthetic
+modelV2, against projecting and drawing every path point by point like
+ui_helpers used to, and checks that both draw the same pixels.
+  $ ./overlay_benchmark.py --frames 200
+'''
+import argparse
+import itertools
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from common.transformations.camera import eon_f_frame_size, get_view_frame_from_calib_frame
+from tools.replay.lib.ui_helpers import (_FULL_FRAME_SIZE, _INTRINSICS, RED, YELLOW, Calibration,
+                                         find_color, plot_model, to_topdown_pt)
+from selfdrive.config import UIParams as UP
+
+FRAME_RATE = 20
+PATH_POINTS = 33
+
+
+class PointByPointCalibration(Calibration):
+  """ui_helpers.Calibration before it used CameraProjection, for comparison"""
+  def __init__(self, num_px, rpy, intrinsic):
+    super().__init__(num_px, rpy, intrinsic)
+    self.extrinsics_matrix = get_view_frame_from_calib_frame(rpy[0], rpy[1], rpy[2], 0.0)[:, :3]
+
+  def car_space_to_ff(self, x, y, z):
+    car_space_projective = np.column_stack((x, y, z)).T
+    ep = self.extrinsics_matrix.dot(car_space_projective)
+    kep = self.intrinsic.dot(ep)
+    return (kep[:-1, :] / kep[-1, :]).T
+
+
+def draw_path_point_by_point(path, color, img, calibration, top_down, lid_color=None, z_off=0):
+  """ui_helpers.draw_path before it drew whole paths at once, for comparison"""
+  x, y, z = np.asarray(path.x), np.asarray(path.y), np.asarray(path.z) + z_off
+  pts = calibration.car_space_to_bb(x, y, z)
+  pts = np.round(pts).astype(int)
+
+  if lid_color is not None and top_down is not None:
+    tcolor = find_color(top_down[0], lid_color)
+    for i in range(len(x)):
+      px, py = to_topdown_pt(x[i], y[i])
+      if px != -1:
+        top_down[1][px, py] = tcolor
+
+  height, width = img.shape[:2]
+  for x, y in pts:
+    if 1 < x < width - 1 and 1 < y < height - 1:
+      for a, b in itertools.permutations([-1, 0, -1], 2):
+        img[y + a, x + b] = color
+
+
+def plot_model_point_by_point(m, img, calibration, top_down):
+  for path, prob, _ in zip(m.laneLines, m.laneLineProbs, m.laneLineStds):
+    draw_path_point_by_point(path, (0, int(255 * prob), 0), img, calibration, top_down, YELLOW)
+  for edge, std in zip(m.roadEdges, m.roadEdgeStds):
+    draw_path_point_by_point(edge, (int(255 * max(1 - std, 0)), 0, 0), img, calibration, top_down, RED)
+  draw_path_point_by_point(m.position, (255, 0, 0), img, calibration, top_down, RED, 1.22)
+
+
+class Palette:
+  def get_palette(self):
+    return [YELLOW, RED]
+
+
+def synthetic_model(rng):
+  x = np.linspace(0., 190., PATH_POINTS) ** 1.2 / 190 ** 0.2
+  curvature = rng.uniform(-1e-3, 1e-3)
+
+  def path(y_off, z):
+    return SimpleNamespace(x=x.tolist(), y=(y_off + curvature * x ** 2).tolist(), z=np.full(PATH_POINTS, z).tolist())
+
+  return SimpleNamespace(leads=[], laneLines=[path(y, 1.22) for y in (-5.4, -1.8, 1.8, 5.4)],
+                         laneLineProbs=[0.5, 0.9, 0.9, 0.5], laneLineStds=[0.2] * 4,
+                         roadEdges=[path(y, 1.22) for y in (-7., 7.)], roadEdgeStds=[0.3, 0.6],
+                         position=path(0., 0.))
+
+
+def timed(f, models, calibration):
+  img = np.zeros((eon_f_frame_size[1], eon_f_frame_size[0], 3), dtype=np.uint8)
+  top_down = (Palette(), np.zeros((UP.lidar_x, UP.lidar_y), dtype=np.uint8))
+  t = time.perf_counter()
+  for m in models:
+    f(m, img, calibration, top_down)
+  return time.perf_counter() - t, img, top_down[1]
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark drawing the model overlay of the replay UI")
+  parser.add_argument("--frames", type=int, default=FRAME_RATE * 10, help="model frames to draw")
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(0)
+  models = [synthetic_model(rng) for _ in range(args.frames)]
+  num_px = eon_f_frame_size[0] * eon_f_frame_size[1]
+  assert _FULL_FRAME_SIZE[num_px] == eon_f_frame_size
+  rpy = [0., 0.02, -0.01]
+
+  t_old, img_old, top_down_old = timed(plot_model_point_by_point, models, PointByPointCalibration(num_px, rpy, _INTRINSICS[num_px]))
+  t_new, img_new, top_down_new = timed(plot_model, models, Calibration(num_px, rpy, _INTRINSICS[num_px]))
+  assert np.array_equal(img_old, img_new) and np.array_equal(top_down_old, top_down_new)
+
+  budget = 1. / FRAME_RATE
+  print("%14s %12s %16s" % ("", "[ms/frame]", f"of {FRAME_RATE} Hz [%]"))
+  for name, t in (("point by point", t_old), ("batched", t_new)):
+    print("%14s %12.3f %16.2f" % (name, t / args.frames * 1e3, t / args.frames / budget * 100))
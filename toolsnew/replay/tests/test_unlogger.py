@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import argparse
+import unittest
+
+from tools.replay.unlogger import MAX_LAG, SPEED_REPORT_INTERVAL, ReplayClock, positive_float
+
+
+class FakeTime():
+  def __init__(self):
+    self.t = 100.
+    self.sleeps = []
+
+  def clock(self):
+    return self.t
+
+  def sleep(self, dt):
+    self.sleeps.append(dt)
+    self.t += dt
+
+
+class TestReplayClock(unittest.TestCase):
+
+  def replay(self, speed, msg_times, work=0.):
+    """Runs msg_times through a ReplayClock, each send taking work seconds"""
+    t = FakeTime()
+    clock = ReplayClock(speed, clock=t.clock, sleep=t.sleep)
+    for msg_time in msg_times:
+      clock.wait(msg_time)
+      t.t += work
+    return t, clock
+
+  def test_realtime(self):
+    t, _ = self.replay(1., [0., 0.1, 0.2, 0.2005, 0.5])
+    # the message due in 0.5ms is sent without sleeping
+    self.assertEqual(len(t.sleeps), 3)
+    for dt, expected in zip(t.sleeps, [0.1, 0.1, 0.3]):
+      self.assertAlmostEqual(dt, expected)
+    self.assertAlmostEqual(t.t, 100.5)
+
+  def test_speed(self):
+    t, _ = self.replay(2., [0., 0.1, 0.2, 1.])
+    self.assertAlmostEqual(sum(t.sleeps), 0.5)
+    self.assertAlmostEqual(t.t, 100.5)
+
+  def test_no_realtime(self):
+    t, _ = self.replay(0., [0., 10., 20.])
+    self.assertEqual(t.sleeps, [])
+
+  def test_catch_up(self):
+    # a short stall is caught up on by sending without sleeping
+    t, clock = self.replay(1., [0., 0.1])
+    t.t += MAX_LAG / 2
+    clock.wait(0.2)
+    clock.wait(0.3)
+    self.assertEqual(len(t.sleeps), 1)
+
+    # falling more than MAX_LAG behind restarts the schedule at the late message
+    t, clock = self.replay(1., [0., 0.1])
+    t.t += MAX_LAG * 2
+    clock.wait(0.2)
+    clock.wait(0.3)
+    self.assertEqual(len(t.sleeps), 2)
+    self.assertAlmostEqual(t.sleeps[-1], 0.1)
+
+  def test_reset(self):
+    t, clock = self.replay(1., [0., 0.1])
+    t.t += 5.
+    clock.reset()
+    clock.wait(60.)
+    clock.wait(60.2)
+    self.assertAlmostEqual(t.sleeps[-1], 0.2)
+    self.assertAlmostEqual(sum(t.sleeps), 0.3)
+
+  def test_report(self):
+    t, clock = self.replay(2., [0., 1.])
+    self.assertIsNone(clock.report(1.))
+    t.t += SPEED_REPORT_INTERVAL
+    self.assertAlmostEqual(clock.report(1. + 2 * SPEED_REPORT_INTERVAL), 2.)
+    self.assertIsNone(clock.report(2.))
+
+  def test_positive_speed(self):
+    self.assertEqual(positive_float("0.5"), 0.5)
+    for s in ("0", "-1", "nan"):
+      with self.assertRaises(argparse.ArgumentTypeError):
+        positive_float(s)
+
+
+if __name__ == "__main__":
+  unittest.main()
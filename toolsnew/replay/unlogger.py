@@ -21,7 +21,7 @@ from common.transformations.camera import eon_f_frame_size, tici_f_frame_size
 from tools.lib.kbhit import KBHit
 from tools.lib.logreader import MultiLogIterator
 from tools.lib.route import Route
-from tools.lib.route_framereader import RouteFrameReader
+from tools.lib.route_framereader import RouteFramePrefetcher, RouteFrameReader
 
 # Commands.
 SetRoute = namedtuple("SetRoute", ("name", "start_time", "data_dir"))
@@ -31,10 +31,64 @@ TogglePause = namedtuple("TogglePause", ())
 StopAndQuit = namedtuple("StopAndQuit", ())
 VIPC_TYP = "vipc"
 
+# messages due sooner than this are sent right away instead of sleeping, one at a time
+MIN_SLEEP = 1e-3
+# falling further behind than this restarts the schedule at the current message
+MAX_LAG = 1.
+SPEED_REPORT_INTERVAL = 5.
+
+
+class ReplayClock(object):
+  """Paces messages on their logMonoTime, at speed times real time. A speed of 0 doesn't
+  pace at all, the messages are sent in order as fast as they come. clock and sleep
+  are the time source, they can be replaced for testing."""
+  def __init__(self, speed=1., clock=realtime.sec_since_boot, sleep=time.sleep):
+    self.speed = speed
+    self._clock = clock
+    self._sleep = sleep
+    self._msg_start = None
+    self._real_start = None
+    self._report_msg_time = None
+    self._report_real_time = None
+
+  def reset(self):
+    """Restarts the schedule at the next message, after a seek or pause"""
+    self._msg_start = None
+    self._report_msg_time = None
+
+  def wait(self, msg_time_seconds):
+    """Sleeps until the message is due"""
+    now = self._clock()
+    if self._msg_start is None:
+      self._msg_start, self._real_start = msg_time_seconds, now
+    if self._report_msg_time is None:
+      self._report_msg_time, self._report_real_time = msg_time_seconds, now
+    if not self.speed:
+      return
+
+    lag = self._real_start + (msg_time_seconds - self._msg_start) / self.speed - now
+    if lag > MIN_SLEEP and lag < 30:  # a large jump is OK, likely due to an out of order segment
+      if lag > 1:
+        print("sleeping for", lag)
+      self._sleep(lag)
+    elif lag < -MAX_LAG:
+      # Relax the schedule when we slip far behind.
+      self._msg_start, self._real_start = msg_time_seconds, now
+
+  def report(self, msg_time_seconds):
+    """Achieved speed since the last report, None until SPEED_REPORT_INTERVAL passed"""
+    now = self._clock()
+    if self._report_msg_time is None or now - self._report_real_time < SPEED_REPORT_INTERVAL:
+      return None
+    speed = (msg_time_seconds - self._report_msg_time) / (now - self._report_real_time)
+    self._report_msg_time, self._report_real_time = msg_time_seconds, now
+    return speed
+
 
 class UnloggerWorker(object):
   def __init__(self):
     self._frame_reader = None
+    self._frame_prefetcher = None
     self._cookie = None
     self._readahead = deque()
 
@@ -70,6 +124,8 @@ class UnloggerWorker(object):
         self._read_logs(cookie, pub_types)
         self._send_logs(data_socket)
     finally:
+      if self._frame_prefetcher is not None:
+        self._frame_prefetcher.close()
       if self._frame_reader is not None:
         self._frame_reader.close()
       data_socket.close()
@@ -80,7 +136,7 @@ class UnloggerWorker(object):
     lr = self._lr
     while len(self._readahead) < 1000:
       route_time = lr.tell()
-      msg = next(lr)
+      msg, msg_bytes = lr.next_with_bytes()
       typ = msg.which()
       if typ not in pub_types:
         continue
@@ -91,12 +147,14 @@ class UnloggerWorker(object):
         self._frame_id_lookup[
           msg.roadEncodeIdx.frameId] = msg.roadEncodeIdx.segmentNum, msg.roadEncodeIdx.segmentId
         #print "encode", msg.roadEncodeIdx.frameId, len(self._readahead), route_time
-      self._readahead.appendleft((typ, msg, route_time, cookie))
+        # decode while the messages before the frame are sent
+        if self._frame_prefetcher is not None:
+          self._frame_prefetcher.prefetch(msg.roadEncodeIdx.frameId)
+      self._readahead.appendleft((typ, msg, msg_bytes, route_time, cookie))
 
   def _send_logs(self, data_socket):
     while len(self._readahead) > 500:
-      typ, msg, route_time, cookie = self._readahead.pop()
-      smsg = msg.as_builder()
+      typ, msg, msg_bytes, route_time, cookie = self._readahead.pop()
 
       if typ == "roadCameraState":
         frame_id = msg.roadCameraState.frameId
@@ -105,7 +163,7 @@ class UnloggerWorker(object):
         # load the frame readers as needed
         s1 = time.time()
         try:
-          img = self._frame_reader.get(frame_id, pix_fmt="rgb24")
+          img = self._frame_prefetcher.get(frame_id)
         except Exception:
           img = None
 
@@ -114,18 +172,18 @@ class UnloggerWorker(object):
           print("FRAME(%d) LAG -- %.2f ms" % (frame_id, fr_time*1000.0))
 
         if img is not None:
-          img = img[:, :, ::-1]  # Convert RGB to BGR, which is what the camera outputs
-          img = img.flatten()
-          bts = img.tobytes()
-
-          smsg.roadCameraState.image = bts
-
-          extra = (smsg.roadCameraState.frameId, smsg.roadCameraState.timestampSof, smsg.roadCameraState.timestampEof)
+          # decoded as BGR, which is what the camera outputs, so the frame is sent as is
+          extra = (msg.roadCameraState.frameId, msg.roadCameraState.timestampSof, msg.roadCameraState.timestampEof)
           data_socket.send_pyobj((cookie, VIPC_TYP, msg.logMonoTime, route_time, extra), flags=zmq.SNDMORE)
-          data_socket.send(bts, copy=False)
+          data_socket.send(img, copy=False)
+
+          smsg = msg.as_builder()
+          smsg.roadCameraState.image = img.tobytes()
+          msg_bytes = smsg.to_bytes()
 
+      # everything else is sent as it's in the log
       data_socket.send_pyobj((cookie, typ, msg.logMonoTime, route_time), flags=zmq.SNDMORE)
-      data_socket.send(smsg.to_bytes(), copy=False)
+      data_socket.send(msg_bytes, copy=False)
 
   def _process_commands(self, cmd, route, pub_types):
     seek_to = None
@@ -133,13 +191,18 @@ class UnloggerWorker(object):
       seek_to = cmd.start_time
       route = Route(cmd.name, cmd.data_dir)
       self._lr = MultiLogIterator(route.log_paths(), wraparound=True)
+      if self._frame_prefetcher is not None:
+        self._frame_prefetcher.close()
+        self._frame_prefetcher = None
       if self._frame_reader is not None:
         self._frame_reader.close()
       if "roadCameraState" in pub_types or "roadEncodeIdx" in pub_types:
-        # reset frames for a route
+        # reset frames for a route, the prefetcher reads ahead instead of the frame readers
         self._frame_id_lookup = {}
         self._frame_reader = RouteFrameReader(
-          route.camera_paths(), None, self._frame_id_lookup, readahead=True)
+          route.camera_paths(), None, self._frame_id_lookup)
+        if "roadCameraState" in pub_types:
+          self._frame_prefetcher = RouteFramePrefetcher(self._frame_reader, pix_fmt="bgr24")
 
     # always reset this on a seek
     if isinstance(cmd, SeekRelativeTime):
@@ -169,7 +232,7 @@ def _get_vipc_server(length):
   vipc_server.start_listener()
   return vipc_server
 
-def unlogger_thread(command_address, forward_commands_address, data_address, run_realtime,
+def unlogger_thread(command_address, forward_commands_address, data_address, speed,
                     address_mapping, publish_time_length, bind_early, no_loop, no_visionipc):
   # Clear context to avoid problems with multiprocessing.
   zmq.Context._instance = None
@@ -206,9 +269,9 @@ def unlogger_thread(command_address, forward_commands_address, data_address, run
   printed_at = 0
   generation = 0
   paused = False
-  reset_time = True
   prev_msg_time = None
   vipc_server = None
+  clock = ReplayClock(speed)
 
   while True:
     evts = dict(poller.poll())
@@ -228,7 +291,7 @@ def unlogger_thread(command_address, forward_commands_address, data_address, run
         if isinstance(cmd, StopAndQuit):
           return
 
-      reset_time = True
+      clock.reset()
     elif data_socket in evts:
       msg_generation, typ, msg_time, route_time, *extra = data_socket.recv_pyobj(flags=zmq.RCVMORE)
       msg_bytes = data_socket.recv()
@@ -243,11 +306,7 @@ def unlogger_thread(command_address, forward_commands_address, data_address, run
       prev_msg_time = msg_time
 
       msg_time_seconds = msg_time * 1e-9
-      if reset_time:
-        msg_start_time = msg_time_seconds
-        real_start_time = realtime.sec_since_boot()
-        start_time = min(start_time, msg_start_time)
-        reset_time = False
+      start_time = min(start_time, msg_time_seconds)
 
       if publish_time_length and msg_time_seconds - start_time > publish_time_length:
         generation += 1
@@ -273,18 +332,11 @@ def unlogger_thread(command_address, forward_commands_address, data_address, run
           # Skip messages that we are not registered to publish.
           continue
 
-      # Sleep as needed for real time playback.
-      if run_realtime:
-        msg_time_offset = msg_time_seconds - msg_start_time
-        real_time_offset = realtime.sec_since_boot() - real_start_time
-        lag = msg_time_offset - real_time_offset
-        if lag > 0 and lag < 30:  # a large jump is OK, likely due to an out of order segment
-          if lag > 1:
-            print("sleeping for", lag)
-          time.sleep(lag)
-        elif lag < -1:
-          # Relax the real time schedule when we slip far behind.
-          reset_time = True
+      # Sleep as needed for the playback speed.
+      clock.wait(msg_time_seconds)
+      achieved_speed = clock.report(msg_time_seconds)
+      if achieved_speed is not None:
+        print("speed %.2fx (requested %s)" % (achieved_speed, "%.2fx" % speed if speed else "max"))
 
       # Send message.
       try:
@@ -299,6 +351,12 @@ def unlogger_thread(command_address, forward_commands_address, data_address, run
       except MultiplePublishersError:
         del send_funcs[typ]
 
+def positive_float(s):
+  f = float(s)
+  if not f > 0:
+    raise argparse.ArgumentTypeError(f"{s} is not a positive number")
+  return f
+
 def timestamp_to_s(tss):
   return time.mktime(datetime.strptime(tss, '%Y-%m-%d--%H-%M-%S').timetuple())
 
@@ -395,8 +453,12 @@ def get_arg_parser():
     help="Length of interval in event time for which messages should be published.")
 
   parser.add_argument(
-    "--no-realtime", dest="realtime", action="store_false", default=True,
-    help="Publish messages as quickly as possible instead of realtime.")
+    "--speed", type=positive_float, default=1.,
+    help="Publish messages at this multiple of realtime.")
+
+  parser.add_argument(
+    "--no-realtime", dest="speed", action="store_const", const=0., default=1.,
+    help="Publish messages in order as quickly as possible instead of realtime.")
 
   parser.add_argument(
     "--no-interactive", dest="interactive", action="store_false", default=True,
@@ -448,7 +510,7 @@ def main(argv):
 
     subprocesses["control"] = multiprocessing.Process(
       target=unlogger_thread,
-      args=(command_address, forward_commands_address, data_address, args.realtime,
+      args=(command_address, forward_commands_address, data_address, args.speed,
             _get_address_mapping(args), args.publish_time_length, args.bind_early, args.no_loop, args.no_visionipc))
 
     subprocesses["data"].start()
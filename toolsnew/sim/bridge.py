@@ -1,21 +1,22 @@
 #!/usr/bin/env python3
 # type: ignore
-import carla # pylint: disable=import-error
-import time
 import math
 import atexit
 import numpy as np
-import threading
 import cereal.messaging as messaging
 import argparse
+from cereal.services import service_list
 from common.params import Params
-from common.realtime import Ratekeeper, DT_DMON
+from common.realtime import Ratekeeper
 from lib.can import can_function
+from lib.frame_ring import FrameRing
+from lib.scheduler import Scheduler
 from selfdrive.car.honda.values import CruiseButtons
 from selfdrive.test.helpers import set_params_enabled
 
 parser = argparse.ArgumentParser(description='Bridge between CARLA and openpilot.')
 parser.add_argument('--joystick', action='store_true')
+parser.add_argument('--headless', action='store_true', help='run without CARLA, with synthetic camera frames')
 parser.add_argument('--town', type=str, default='Town04')
 parser.add_argument('--spawn_point', dest='num_selected_spawn_point',
         type=int, default=16)
@@ -31,8 +32,11 @@ W, H = 1164, 874
 REPEAT_COUNTER = 5
 PRINT_DECIMATION = 100
 STEER_RATIO = 15.
+FRAME_RING_SIZE = 4
+# new frames are published this often, faster than the camera so they go out soon after they come in
+CAMERA_POLL_RATE = 100.
+STATS_INTERVAL = 10.
 
-pm = messaging.PubMaster(['roadCameraState', 'sensorEvents', 'can'])
 sm = messaging.SubMaster(['carControl','controlsState'])
 
 class VehicleState:
@@ -42,6 +46,14 @@ class VehicleState:
     self.cruise_button= 0
     self.is_engaged=False
 
+class ImuState:
+  """Latest IMU measurement, replaced as a whole so it's always consistent"""
+  def __init__(self):
+    self.measurement = ((0., 0., 0.), (0., 0., 0.))
+
+  def update(self, accel, gyro):
+    self.measurement = (accel, gyro)
+
 def steer_rate_limit(old, new):
   # Rate limiting to 0.5 degrees per step
   limit = 0.5
@@ -52,89 +64,108 @@ def steer_rate_limit(old, new):
   else:
     return new
 
-frame_id = 0
-def cam_callback(image):
-  global frame_id
-  img = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-  img = np.reshape(img, (H, W, 4))
-  img = img[:, :, [0, 1, 2]].copy()
-
-  dat = messaging.new_message('roadCameraState')
-  dat.roadCameraState = {
-    "frameId": image.frame,
-    "image": img.tostring(),
-    "transform": [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
-  }
-  pm.send('roadCameraState', dat)
-  frame_id += 1
+def camera_function(pm, frame_ring):
+  frame = frame_ring.read()
+  while frame is not None:
+    frame_id, img = frame
+    dat = messaging.new_message('roadCameraState')
+    dat.roadCameraState = {
+      "frameId": frame_id,
+      "image": img,
+      "transform": [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
+    }
+    pm.send('roadCameraState', dat)
+    frame = frame_ring.read()
 
-def imu_callback(imu):
+def imu_function(pm, imu_state):
+  accel, gyro = imu_state.measurement
   dat = messaging.new_message('sensorEvents', 2)
   dat.sensorEvents[0].sensor = 4
   dat.sensorEvents[0].type = 0x10
   dat.sensorEvents[0].init('acceleration')
-  dat.sensorEvents[0].acceleration.v = [imu.accelerometer.x, imu.accelerometer.y, imu.accelerometer.z]
+  dat.sensorEvents[0].acceleration.v = list(accel)
   # copied these numbers from locationd
   dat.sensorEvents[1].sensor = 5
   dat.sensorEvents[1].type = 0x10
   dat.sensorEvents[1].init('gyroUncalibrated')
-  dat.sensorEvents[1].gyroUncalibrated.v = [imu.gyroscope.x, imu.gyroscope.y, imu.gyroscope.z]
+  dat.sensorEvents[1].gyroUncalibrated.v = list(gyro)
   pm.send('sensorEvents', dat)
 
-def panda_state_function():
-  pm = messaging.PubMaster(['pandaState'])
-  while 1:
-    dat = messaging.new_message('pandaState')
-    dat.valid = True
-    dat.pandaState = {
-      'ignitionLine': True,
-      'pandaType': "blackPanda",
-      'controlsAllowed': True,
-      'safetyModel': 'hondaNidec'
-    }
-    pm.send('pandaState', dat)
-    time.sleep(0.5)
+def panda_state_function(pm):
+  dat = messaging.new_message('pandaState')
+  dat.valid = True
+  dat.pandaState = {
+    'ignitionLine': True,
+    'pandaType': "blackPanda",
+    'controlsAllowed': True,
+    'safetyModel': 'hondaNidec'
+  }
+  pm.send('pandaState', dat)
 
-def fake_gps():
+def fake_gps(pm):
   # TODO: read GPS from CARLA
-  pm = messaging.PubMaster(['gpsLocationExternal'])
-  while 1:
-    dat = messaging.new_message('gpsLocationExternal')
-    pm.send('gpsLocationExternal', dat)
-    time.sleep(0.01)
-
-def fake_driver_monitoring():
-  pm = messaging.PubMaster(['driverState','driverMonitoringState'])
-  while 1:
-
-    # dmonitoringmodeld output
-    dat = messaging.new_message('driverState')
-    dat.driverState.faceProb = 1.0
-    pm.send('driverState', dat)
-
-    # dmonitoringd output
-    dat = messaging.new_message('driverMonitoringState')
-    dat.driverMonitoringState = {
-      "faceDetected": True,
-      "isDistracted": False,
-      "awarenessStatus": 1.,
-      "isRHD": False,
-    }
-    pm.send('driverMonitoringState', dat)
-
-    time.sleep(DT_DMON)
-
-def can_function_runner(vs):
-  i = 0
-  while 1:
-    can_function(pm, vs.speed, vs.angle, i, vs.cruise_button, vs.is_engaged)
-    time.sleep(0.01)
-    i+=1
-
-
-def go(q):
+  dat = messaging.new_message('gpsLocationExternal')
+  pm.send('gpsLocationExternal', dat)
+
+def fake_driver_monitoring(pm):
+  # dmonitoringmodeld output
+  dat = messaging.new_message('driverState')
+  dat.driverState.faceProb = 1.0
+  pm.send('driverState', dat)
+
+  # dmonitoringd output
+  dat = messaging.new_message('driverMonitoringState')
+  dat.driverMonitoringState = {
+    "faceDetected": True,
+    "isDistracted": False,
+    "awarenessStatus": 1.,
+    "isRHD": False,
+  }
+  pm.send('driverMonitoringState', dat)
+
+class CanFunctionRunner:
+  def __init__(self, pm, vs):
+    self.pm = pm
+    self.vs = vs
+    self.i = 0
+
+  def __call__(self):
+    vs = self.vs
+    can_function(self.pm, vs.speed, vs.angle, self.i, vs.cruise_button, vs.is_engaged)
+    self.i += 1
+
+def print_stats(scheduler, frame_ring):
+  print("frames: %d, %d dropped" % (frame_ring.write_count, frame_ring.dropped))
+  print(scheduler.report())
+
+def setup_scheduler(vehicle_state, frame_ring, imu_state):
+  """All fake services, published from one thread at their rates in cereal/services.py"""
+  pm = messaging.PubMaster(['roadCameraState', 'sensorEvents', 'can', 'pandaState', 'gpsLocationExternal',
+                            'driverState', 'driverMonitoringState'])
+  scheduler = Scheduler()
+  scheduler.add('roadCameraState', CAMERA_POLL_RATE, lambda: camera_function(pm, frame_ring))
+  scheduler.add('sensorEvents', service_list['sensorEvents'].frequency, lambda: imu_function(pm, imu_state))
+  scheduler.add('can', service_list['can'].frequency, CanFunctionRunner(pm, vehicle_state))
+  scheduler.add('pandaState', service_list['pandaState'].frequency, lambda: panda_state_function(pm))
+  scheduler.add('gpsLocationExternal', service_list['gpsLocationExternal'].frequency, lambda: fake_gps(pm))
+  scheduler.add('driverMonitoringState', service_list['driverMonitoringState'].frequency, lambda: fake_driver_monitoring(pm))
+  scheduler.add('stats', 1. / STATS_INTERVAL, lambda: print_stats(scheduler, frame_ring))
+  return scheduler
+
+def setup_carla(frame_ring, imu_state):
+  import carla # pylint: disable=import-error
+
+  def cam_callback(image):
+    img = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
+    img = np.reshape(img, (H, W, 4))
+    # BGRA to BGR, straight into the ring
+    np.copyto(frame_ring.write_slot(), img[:, :, :3])
+    frame_ring.commit(image.frame)
+
+  def imu_callback(imu):
+    imu_state.update((imu.accelerometer.x, imu.accelerometer.y, imu.accelerometer.z),
+                     (imu.gyroscope.x, imu.gyroscope.y, imu.gyroscope.z))
 
-  # setup CARLA
   client = carla.Client("127.0.0.1", 2000)
   client.set_timeout(10.0)
   world = client.load_world(args.town)
@@ -191,16 +222,31 @@ def go(q):
     camera.destroy()
     vehicle.destroy()
     print("done")
+
+  return vehicle, max_steer_angle, carla.VehicleControl, destroy
+
+def setup_headless(frame_ring, imu_state):
+  from lib.headless import HeadlessSim, VehicleControl
+  sim = HeadlessSim(frame_ring, imu_state.update)
+  return sim.vehicle, sim.vehicle.max_steer_angle, VehicleControl, sim.destroy
+
+
+def go(q):
+  frame_ring = FrameRing(FRAME_RING_SIZE, (H, W, 3))
+  imu_state = ImuState()
+
+  if args.headless:
+    vehicle, max_steer_angle, VehicleControl, destroy = setup_headless(frame_ring, imu_state)
+  else:
+    vehicle, max_steer_angle, VehicleControl, destroy = setup_carla(frame_ring, imu_state)
   atexit.register(destroy)
 
 
   vehicle_state = VehicleState()
 
-  # launch fake car threads
-  threading.Thread(target=panda_state_function).start()
-  threading.Thread(target=fake_driver_monitoring).start()
-  threading.Thread(target=fake_gps).start()
-  threading.Thread(target=can_function_runner, args=(vehicle_state,)).start()
+  # publish the fake services
+  scheduler = setup_scheduler(vehicle_state, frame_ring, imu_state)
+  scheduler.start()
 
   # can loop
   rk = Ratekeeper(100, print_delay_threshold=0.05)
@@ -211,7 +257,7 @@ def go(q):
   steer_ease_out_counter = REPEAT_COUNTER
 
 
-  vc = carla.VehicleControl(throttle=0, steer=0, brake=0, reverse=False)
+  vc = VehicleControl(throttle=0, steer=0, brake=0, reverse=False)
 
   is_openpilot_engaged = False
   throttle_out = steer_out = brake_out = 0
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class FrameRing():
+  """Preallocated ring of camera frames, written by the simulator's camera callback
+  and read by the publisher without a lock. There's a single writer and a single
+  reader: the writer only publishes a slot by bumping write_count once the frame is
+  complete, and the reader checks after copying a frame out that the writer didn't
+  come around and overwrite it in the meantime."""
+  def __init__(self, size, shape, dtype=np.uint8):
+    assert size >= 2
+    self.size = size
+    self.frames = np.zeros((size,) + tuple(shape), dtype=dtype)
+    self.frame_ids = np.zeros(size, dtype=np.int64)
+
+    self.write_count = 0
+    self.read_count = 0
+    self.dropped = 0
+
+  def write_slot(self):
+    """Slot to write the next frame into, in place"""
+    return self.frames[self.write_count % self.size]
+
+  def commit(self, frame_id):
+    """Publishes the frame written to write_slot"""
+    self.frame_ids[self.write_count % self.size] = frame_id
+    self.write_count += 1
+
+  def read(self):
+    """(frame id, frame bytes) of the oldest unread frame, None when there's none.
+    Frames the writer overwrote before they were read are counted in dropped.
+
+    This is the one copy a frame takes on its way to the message: the slot can't be
+    handed out as a view since the writer reuses it, and pycapnp only takes bytes for
+    Data fields, so it's copied out before checking it wasn't overwritten."""
+    while True:
+      write_count = self.write_count
+      if self.read_count >= write_count:
+        return None
+
+      # the slot at write_count is being written to
+      oldest = write_count - (self.size - 1)
+      if self.read_count < oldest:
+        self.dropped += oldest - self.read_count
+        self.read_count = oldest
+
+      idx = self.read_count % self.size
+      frame_id, dat = int(self.frame_ids[idx]), self.frames[idx].tobytes()
+      if self.write_count - self.read_count < self.size:
+        self.read_count += 1
+        return frame_id, dat
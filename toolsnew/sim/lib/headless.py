@@ -0,0 +1,109 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+CAMERA_RATE = 20.
+MAX_STEER_ANGLE = 70.  # deg, of the front wheels
+MAX_ACCEL = 3.  # m/s^2, at full throttle
+MAX_DECEL = 8.  # m/s^2, at full brake
+DRAG = 0.01  # 1/s
+WHEELBASE = 2.9
+
+
+class VehicleControl():
+  """Same fields as carla.VehicleControl"""
+  def __init__(self, throttle=0., steer=0., brake=0., reverse=False):
+    self.throttle = throttle
+    self.steer = steer
+    self.brake = brake
+    self.reverse = reverse
+
+
+class Vector3D():
+  def __init__(self, x=0., y=0., z=0.):
+    self.x, self.y, self.z = x, y, z
+
+
+class HeadlessVehicle():
+  """Point mass stand-in for the CARLA vehicle, moving straight along the road"""
+  def __init__(self):
+    self.max_steer_angle = MAX_STEER_ANGLE
+    self.speed = 0.
+    self.distance = 0.
+    self.yaw_rate = 0.
+    self.accel = 0.
+    self._control = VehicleControl()
+    self._t = time.monotonic()
+    # stepped by the control loop and the camera thread
+    self._lock = threading.Lock()
+
+  def apply_control(self, vc):
+    with self._lock:
+      self._step()
+      self._control = VehicleControl(vc.throttle, vc.steer, vc.brake, vc.reverse)
+
+  def step(self):
+    with self._lock:
+      self._step()
+
+  def _step(self):
+    t = time.monotonic()
+    dt, self._t = t - self._t, t
+
+    vc = self._control
+    self.accel = min(max(vc.throttle, 0.), 1.) * MAX_ACCEL - min(max(vc.brake, 0.), 1.) * MAX_DECEL - DRAG * self.speed
+    self.speed = max(self.speed + self.accel * dt, 0.)
+    self.distance += self.speed * dt
+    self.yaw_rate = self.speed * math.tan(math.radians(vc.steer * self.max_steer_angle)) / WHEELBASE
+
+  def get_velocity(self):
+    return Vector3D(x=self.speed)
+
+
+class HeadlessSim():
+  """Stands in for the CARLA client on machines without a GPU. Synthetic camera
+  frames are written to the frame ring at the camera rate, with lane markings
+  that move with the vehicle, and the IMU callback gets its acceleration."""
+  def __init__(self, frame_ring, imu_callback, camera_rate=CAMERA_RATE):
+    self.vehicle = HeadlessVehicle()
+    self.frame_ring = frame_ring
+    self.imu_callback = imu_callback
+    self.camera_rate = camera_rate
+
+    h, w = frame_ring.frames.shape[1:3]
+    # sky over road, BGR
+    self._background = np.zeros((h, w, 3), dtype=np.uint8)
+    self._background[:h // 2] = (200, 150, 100)
+    self._background[h // 2:] = (90, 90, 90)
+
+    self._frame = 0
+    self._exit = threading.Event()
+    self._thread = threading.Thread(target=self._camera_thread, daemon=True)
+    self._thread.start()
+
+  def _camera_thread(self):
+    h, w = self._background.shape[:2]
+    lane_cols = [w // 2 - w // 4, w // 2 + w // 4]
+    next_t = time.monotonic()
+    while not self._exit.is_set():
+      self.vehicle.step()
+
+      img = self.frame_ring.write_slot()
+      np.copyto(img, self._background)
+      # a lane marking dash every 10 m, coming closer as the vehicle moves
+      row = h // 2 + int((self.vehicle.distance % 10.) / 10. * (h // 2))
+      for col in lane_cols:
+        img[row:min(row + h // 16, h), col - 4:col + 4] = 255
+      self.frame_ring.commit(self._frame)
+      self._frame += 1
+
+      self.imu_callback((self.vehicle.accel, 0., 0.), (0., 0., self.vehicle.yaw_rate))
+
+      next_t += 1. / self.camera_rate
+      self._exit.wait(max(next_t - time.monotonic(), 0.))
+
+  def destroy(self):
+    self._exit.set()
+    self._thread.join()
@@ -0,0 +1,66 @@
+import heapq
+import threading
+import time
+
+
+class TaskStats():
+  def __init__(self):
+    self.runs = 0
+    self.missed = 0
+    self.jitter_sum = 0.
+    self.jitter_max = 0.
+
+  def update(self, jitter, missed):
+    self.runs += 1
+    self.missed += missed
+    self.jitter_sum += jitter
+    self.jitter_max = max(self.jitter_max, jitter)
+
+  @property
+  def jitter_mean(self):
+    return self.jitter_sum / max(self.runs, 1)
+
+
+class Scheduler():
+  """Runs tasks at fixed rates from a single thread. Every task is scheduled on the
+  same monotonic clock, a task that falls more than a period behind skips the runs
+  it missed instead of bursting to catch up. Jitter is how late a run started."""
+  def __init__(self):
+    self.stats = {}
+    self._tasks = []
+    self._exit = threading.Event()
+    self._thread = None
+
+  def add(self, name, rate, f):
+    self.stats[name] = TaskStats()
+    heapq.heappush(self._tasks, (time.monotonic(), len(self.stats), 1. / rate, name, f))
+
+  def run(self):
+    while self._tasks and not self._exit.is_set():
+      t, seq, period, name, f = self._tasks[0]
+      remaining = t - time.monotonic()
+      if remaining > 0:
+        self._exit.wait(remaining)
+        continue
+
+      jitter = -remaining
+      f()
+
+      missed = int(jitter / period)
+      self.stats[name].update(jitter, missed)
+      heapq.heapreplace(self._tasks, (t + (missed + 1) * period, seq, period, name, f))
+
+  def start(self):
+    self._exit.clear()
+    self._thread = threading.Thread(target=self.run, daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._exit.set()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  def report(self):
+    return "  ".join("%s: %d runs, %d missed, jitter %.1f/%.1f ms" % (name, s.runs, s.missed, s.jitter_mean * 1e3, s.jitter_max * 1e3)
+                     for name, s in self.stats.items())